@@ -1,5 +1,6 @@
 import asyncio
 import sys
+import time
 
 # Fix for Windows aiodns issue - MUST be at the very top
 if sys.platform == 'win32':
@@ -10,15 +11,26 @@ from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
-from config_reader import get_config, BotConfig, LogConfig, DatabaseConfig
+from config_reader import get_config, BotConfig, LogConfig, DatabaseConfig, WebhookConfig
 from logs import get_structlog_config
 from structlog.typing import FilteringBoundLogger
 
 from dispatcher import dp
+from middlewares import SendLimitMiddleware
 import handlers
-from db import init_database
+from db import init_database, init_leaderboard
+from utils.xp_buffer import xp_accumulator
+from utils.activity_tracker import activity_tracker
+from utils.xp_ledger import xp_ledger
+from utils.ranking import ranking_config, ranking_refresher
+from utils.send_limiter import send_limiter
+from utils.scheduler import scheduler
+from utils.message_cleanup import message_cleanup
+from webhook import run_webhook
 
 async def main():
+    started = time.perf_counter()
+
     # init logging
     log_config: LogConfig = get_config(model=LogConfig, root_key="logs")
     structlog.configure(**get_structlog_config(log_config))
@@ -29,12 +41,15 @@ async def main():
     # get database config
     db_config: DatabaseConfig = get_config(model=DatabaseConfig, root_key="database")
 
+    # get webhook config
+    webhook_config: WebhookConfig = get_config(model=WebhookConfig, root_key="webhook")
+
     # init logger
     logger: FilteringBoundLogger = structlog.get_logger()
     
-    # init database
+    # check database schema (DDL only with schema_mode = "migrate")
     await init_database()
-    logger.info("Database initialized successfully")
+    await init_leaderboard()
 
     # init bot object
     bot = Bot(
@@ -44,15 +59,46 @@ async def main():
         )
     )
 
+    # bot identity is resolved once and passed to handlers as bot_info
+    dp["bot_info"] = await bot.me()
+
+    # outgoing requests wait for per-chat and global rate limits
+    bot.session.middleware(SendLimitMiddleware(send_limiter))
+    dp.startup.register(send_limiter.start)
+    dp.shutdown.register(send_limiter.stop)
+
+    # delayed jobs (game timeouts, message cleanup) are reloaded from the database;
+    # cleanup jobs wait for the batched deletion, so the queue stops after the scheduler
+    dp.startup.register(message_cleanup.start)
+    dp.startup.register(scheduler.start)
+    dp.shutdown.register(scheduler.stop)
+    dp.shutdown.register(message_cleanup.stop)
+
+    # background writers: started with polling, flushed on shutdown
+    dp.startup.register(xp_accumulator.start)
+    dp.shutdown.register(xp_accumulator.stop)
+    dp.startup.register(activity_tracker.start)
+    dp.shutdown.register(activity_tracker.stop)
+    # (the ledger stops last: the flushes above add XP events to it)
+    dp.startup.register(xp_ledger.start)
+    dp.shutdown.register(xp_ledger.stop)
+    if ranking_config.materialized_view:
+        dp.startup.register(ranking_refresher.start)
+        dp.shutdown.register(ranking_refresher.stop)
+
     # start the logger
-    await logger.ainfo("Starting the bot...")
+    await logger.ainfo(f"Starting the bot... (cold start {(time.perf_counter() - started) * 1000:.0f} ms)")
 
-    # start polling
     try:
-        await dp.start_polling(bot, skip_updates=False) # Don't skip updates, if your bot will process payments or other important stuff
+        if webhook_config.enabled:
+            # receive updates from the embedded aiohttp server
+            await run_webhook(dp, bot, webhook_config)
+        else:
+            # a webhook left from webhook mode blocks getUpdates
+            await bot.delete_webhook(drop_pending_updates=False)
+            await dp.start_polling(bot, skip_updates=False) # Don't skip updates, if your bot will process payments or other important stuff
     finally:
         await bot.session.close()
 
-
 if __name__ == "__main__":
     asyncio.run(main())
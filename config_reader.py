@@ -2,7 +2,7 @@ from enum import StrEnum, auto
 from functools import lru_cache
 from os import environ
 from tomllib import load
-from typing import Type, TypeVar
+from typing import Optional, Type, TypeVar
 
 from pydantic import BaseModel, SecretStr, field_validator
 
@@ -14,6 +14,11 @@ class LogRenderer(StrEnum):
     CONSOLE = auto()
 
 
+class SchemaMode(StrEnum):
+    CHECK = auto()
+    MIGRATE = auto()
+
+
 class BotConfig(BaseModel):
     token: SecretStr
     owners: list
@@ -40,6 +45,81 @@ class DatabaseConfig(BaseModel):
     user: str
     password: str
     echo: bool
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = -1
+    pool_pre_ping: bool = True
+    statement_cache_size: int = 100
+    replica_dsn: Optional[str] = None
+    replica_retry_interval: float = 30.0
+    schema_mode: SchemaMode = SchemaMode.CHECK
+
+    @field_validator('schema_mode', mode="before")
+    @classmethod
+    def schema_mode_to_lower(cls, v: str):
+        return v.lower()
+
+
+class XpBufferConfig(BaseModel):
+    flush_interval: float = 5.0
+    max_pending: int = 500
+
+
+class ActivityConfig(BaseModel):
+    window: float = 60.0
+    flush_interval: float = 10.0
+
+
+class UserCacheConfig(BaseModel):
+    ttl: float = 30.0
+    max_size: int = 10000
+
+
+class ProfilePhotoCacheConfig(BaseModel):
+    ttl: float = 600.0
+    max_size: int = 10000
+
+
+class AdminCacheConfig(BaseModel):
+    ttl: float = 300.0
+
+
+class LeaderboardConfig(BaseModel):
+    page_size: int = 10
+
+
+class RankingConfig(BaseModel):
+    materialized_view: bool = False
+    refresh_interval: float = 10.0
+
+
+class XpLedgerConfig(BaseModel):
+    flush_interval: float = 2.0
+    max_pending: int = 1000
+    max_buffered: int = 100000
+    partitions_ahead: int = 2
+
+
+class MessageCleanupConfig(BaseModel):
+    flush_interval: float = 1.0
+
+
+class SendLimiterConfig(BaseModel):
+    global_rate: float = 30.0
+    private_rate: float = 1.0
+    private_burst: int = 3
+    group_per_minute: float = 20.0
+    group_burst: int = 5
+
+
+class WebhookConfig(BaseModel):
+    enabled: bool = False
+    url: str = ""
+    path: str = "/webhook"
+    host: str = "0.0.0.0"
+    port: int = 8080
+    secret_token: Optional[SecretStr] = None
 
 
 class Config(BaseModel):
@@ -1,32 +1,42 @@
-import asyncio
+import time
+
 import structlog
-from sqlalchemy.ext.asyncio import AsyncEngine
-from sqlalchemy.schema import CreateTable
-from sqlalchemy import text
 
-from db.models import Base
-from db.models.user import User, ChatMembership
-from db.connection import engine, async_session_maker
+from config_reader import SchemaMode
+from db.connection import engine, async_session_maker, db_config
+from db.queries import get_leaderboard_rows
+from db.schema import get_current_revisions, get_head_revisions, upgrade_schema
+from utils.leaderboard import leaderboard
 
 logger = structlog.get_logger()
 
-async def create_tables():
-    """Створення всіх таблиць в базі даних"""
-    async with engine.begin() as conn:
-        await conn.execute(text("SET CONSTRAINTS ALL DEFERRED"))
+async def init_database():
+    """
+    Перевірка схеми бази даних при запуску.
+    Якщо ревізія бази збігається з останньою міграцією, DDL не виконується.
+    Міграції застосовуються лише в режимі schema_mode = "migrate".
+    """
+    started = time.perf_counter()
+    heads = get_head_revisions()
+    current = await get_current_revisions(engine)
+
+    if current != heads:
+        if db_config.schema_mode != SchemaMode.MIGRATE:
+            error = (
+                f"Database schema revision {sorted(current) or 'none'} does not match {sorted(heads)}: "
+                f"run 'alembic upgrade head' or set schema_mode = \"migrate\""
+            )
+            logger.error(error)
+            raise RuntimeError(error)
 
-        logger.info("Creating database tables...")
-        await conn.run_sync(Base.metadata.create_all)
+        logger.info(f"Upgrading database schema {sorted(current) or 'none'} -> {sorted(heads)}...")
+        await upgrade_schema()
 
-        await conn.execute(text("SET CONSTRAINTS ALL IMMEDIATE"))
-        
-    logger.info("Database tables created successfully")
+    logger.info(f"Database schema checked in {(time.perf_counter() - started) * 1000:.0f} ms")
 
-async def init_database():
-    """Ініціалізація бази даних"""
-    try:
-        await create_tables()
-        logger.info("Database initialized successfully")
-    except Exception as e:
-        logger.error(f"Error initializing database: {e}")
-        raise
+async def init_leaderboard():
+    """Завантаження рейтингу користувачів в пам'ять"""
+    async with async_session_maker() as session:
+        rows = await get_leaderboard_rows(session)
+    leaderboard.rebuild(rows)
+    logger.info(f"Leaderboard loaded: {len(leaderboard)} users")
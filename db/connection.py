@@ -1,20 +1,40 @@
 import asyncio
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Callable
 
 import structlog
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from config_reader import get_config, DatabaseConfig
+from db.pool import InstrumentedQueuePool
 
 db_config: DatabaseConfig = get_config(model=DatabaseConfig, root_key="database")
 
 DATABASE_URL = f"postgresql+asyncpg://{db_config.user}:{db_config.password}@{db_config.host}:{db_config.port}/{db_config.name}"
 
-engine = create_async_engine(DATABASE_URL, echo=db_config.echo)
+engine_options = dict(
+    echo=db_config.echo,
+    poolclass=InstrumentedQueuePool,
+    pool_size=db_config.pool_size,
+    max_overflow=db_config.max_overflow,
+    pool_timeout=db_config.pool_timeout,
+    pool_recycle=db_config.pool_recycle,
+    pool_pre_ping=db_config.pool_pre_ping,
+    connect_args={"statement_cache_size": db_config.statement_cache_size}
+)
+
+engine = create_async_engine(DATABASE_URL, **engine_options)
 
 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Репліка для запитів лише на читання (необов'язкова)
+replica_engine = create_async_engine(db_config.replica_dsn, **engine_options) if db_config.replica_dsn else None
+
+replica_session_maker = sessionmaker(
+    replica_engine, class_=AsyncSession, expire_on_commit=False, info={"replica": True}
+) if replica_engine is not None else None
+
 logger = structlog.get_logger()
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
@@ -29,3 +49,32 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
             logger.debug("Closed DB session")
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Виконати callback після успішного коміту транзакції сесії.
+    Використовується для оновлення стану в пам'яті (рейтинг, кеші) лише для записаних даних.
+    """
+    session.info.setdefault("on_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session: Session) -> None:
+    for callback in session.info.pop("on_commit", []):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Error in on_commit callback: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_commit_callbacks(session: Session) -> None:
+    session.info.pop("on_commit", None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_writes(orm_execute_state) -> None:
+    # Сесія, яка вже щось записала, читає лише з основної БД (репліка може відставати)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
@@ -1,4 +1,7 @@
 from db.models.base import Base, TimestampMixin
 from db.models.user import User, ChatMembership
+from db.models.xp_event import XpEvent, XpLedgerState, XpSource
+from db.models.ranking import user_ranking
+from db.models.scheduled_job import ScheduledJob
 
-__all__ = ["Base", "TimestampMixin", "User", "ChatMembership"]
+__all__ = ["Base", "TimestampMixin", "User", "ChatMembership", "XpEvent", "XpLedgerState", "XpSource", "user_ranking", "ScheduledJob"]
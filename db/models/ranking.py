@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, Column, Integer, MetaData, String, Table
+
+# Матеріалізоване представлення рейтингу (створюється міграцією, не create_all),
+# тому воно описане в окремих метаданих
+ranking_metadata = MetaData()
+
+user_ranking = Table(
+    "user_ranking",
+    ranking_metadata,
+    Column("user_id", BigInteger, primary_key=True),
+    Column("xp", Integer),
+    Column("first_name", String(64)),
+    # Місце в рейтингу: dense_rank() за XP, однакове XP - однакове місце
+    Column("rank", BigInteger),
+    # Порядковий номер (з 1) у порядку (xp DESC, user_id) - для сторінок топу
+    Column("position", BigInteger)
+)
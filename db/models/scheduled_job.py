@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, DateTime, Identity, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.models.base import Base
+
+
+class ScheduledJob(Base):
+    """
+    Відкладене завдання (завершення гри за часом, видалення повідомлень).
+    Рядок видаляється після виконання; невиконані завдання завантажуються при запуску бота.
+    """
+    __tablename__ = "scheduled_jobs"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    # Ключ, за яким завдання можна замінити або скасувати (напр. "game:<chat>:<prompt_message_id>")
+    key: Mapped[Optional[str]] = mapped_column(String(128), unique=True)
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+
+    def __repr__(self):
+        return f"<ScheduledJob {self.id} {self.kind} at {self.run_at}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, String, Integer, Boolean, Text, ForeignKey, func
+from sqlalchemy import BigInteger, String, Integer, Boolean, Text, ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import Optional, List
@@ -19,7 +19,9 @@ class User(Base, TimestampMixin):
     xp: Mapped[int] = mapped_column(Integer, default=0)
     bonuses: Mapped[int] = mapped_column(Integer, default=0)
 
-    invited_by: Mapped[Optional[int]] = mapped_column(ForeignKey("users.user_id"), nullable=True)
+    invited_by: Mapped[Optional[int]] = mapped_column(ForeignKey("users.user_id"), nullable=True, index=True)
+    # Кількість запрошених, оновлюється разом зі створенням запрошеного користувача
+    referral_count: Mapped[int] = mapped_column(Integer, default=0)
     referrals: Mapped[List["User"]] = relationship(
         "User", 
         foreign_keys=[invited_by],
@@ -28,21 +30,45 @@ class User(Base, TimestampMixin):
         uselist=True
     )
 
-    last_activity: Mapped[datetime] = mapped_column(default=func.now())
+    last_activity: Mapped[datetime] = mapped_column(default=func.now(), index=True)
+    # Коли востаннє отримано щоденний бонус (None - ще не отримувався)
+    last_daily_bonus: Mapped[Optional[datetime]] = mapped_column(nullable=True)
     
     def __repr__(self):
         return f"<User {self.user_id} {self.username}>"
 
 
+# Загальний рейтинг: топ, ранг і пагінація за (xp, user_id)
+Index("ix_users_xp_desc_user_id", User.xp.desc(), User.user_id)
+
+
 class ChatMembership(Base, TimestampMixin):
     """Модель для зберігання членства користувачів в групових чатах"""
     __tablename__ = "chat_memberships"
+    __table_args__ = (
+        UniqueConstraint("user_id", "chat_id", name="uq_chat_memberships_user_id_chat_id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.user_id", ondelete="CASCADE"))
     chat_id: Mapped[int] = mapped_column(BigInteger)
 
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    # XP, зароблений користувачем саме в цьому чаті
+    xp: Mapped[int] = mapped_column(Integer, default=0)
     
     def __repr__(self):
         return f"<ChatMembership user={self.user_id} chat={self.chat_id}>"
+
+
+# Пошук учасників чату
+Index("ix_chat_memberships_chat_id_user_id", ChatMembership.chat_id, ChatMembership.user_id)
+
+# Рейтинг чату: топ і ранг без сканування всіх учасників
+Index(
+    "ix_chat_memberships_chat_id_xp",
+    ChatMembership.chat_id,
+    ChatMembership.xp.desc(),
+    ChatMembership.user_id
+)
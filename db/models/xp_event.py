@@ -0,0 +1,62 @@
+from datetime import datetime
+from enum import StrEnum
+from typing import Optional
+
+from sqlalchemy import BigInteger, Boolean, DateTime, Identity, Index, Integer, SmallInteger, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.models.base import Base
+
+
+class XpSource(StrEnum):
+    """Джерела змін XP"""
+    OPENING_BALANCE = "opening_balance"
+    GAME = "game"
+    GROUP_GAME = "group_game"
+    CHAT_ACTIVITY = "chat_activity"
+    GROUP_JOIN = "group_join"
+    DAILY_BONUS = "daily_bonus"
+    REFERRAL = "referral"
+    ADMIN = "admin"
+    RECONCILE = "reconcile"
+
+
+class XpEvent(Base):
+    """
+    Журнал змін XP (лише додавання).
+    Таблиця секціонована за місяцями created_at, тому первинний ключ включає created_at.
+    Зовнішніх ключів немає, щоб пакетний COPY не перевіряв кожен рядок.
+    """
+    __tablename__ = "xp_events"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    # Час UTC без часового поясу (так пише і XpLedger)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, primary_key=True, server_default=func.timezone("utc", func.now())
+    )
+
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    chat_id: Mapped[Optional[int]] = mapped_column(BigInteger)
+    source: Mapped[str] = mapped_column(String(32), nullable=False)
+    delta: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<XpEvent user={self.user_id} {self.source} {self.delta:+d}>"
+
+
+class XpLedgerState(Base):
+    """
+    Стан журналу XP (один рядок з id = 1).
+    running - процес бота пише журнал і ще не зупинився штатно; incomplete - у журналі можуть
+    бракувати подій (аварійна зупинка або переповнений буфер), тому перераховувати баланси за ним не можна.
+    """
+    __tablename__ = "xp_ledger_state"
+
+    id: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    running: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    incomplete: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+
+# Історія і перерахунок балансу користувача
+Index("ix_xp_events_user_id_created_at", XpEvent.user_id, XpEvent.created_at)
@@ -0,0 +1,75 @@
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass
+class PoolCounters:
+    """Накопичувальні лічильники видачі з'єднань з пулу"""
+    checkouts: int = 0
+    timeouts: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+@dataclass
+class PoolStats:
+    """Знімок стану пулу з'єднань"""
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул з'єднань, який рахує кількість видач, тайм-аути і час очікування з'єднання.
+    Час очікування включає створення нового з'єднання і pre-ping.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counters = PoolCounters()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.counters.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.counters.checkouts += 1
+            self.counters.total_wait += waited
+            self.counters.max_wait = max(self.counters.max_wait, waited)
+
+    def recreate(self):
+        # Лічильники переживають engine.dispose()
+        pool = super().recreate()
+        pool.counters = self.counters
+        return pool
+
+
+def get_pool_stats(engine: AsyncEngine) -> PoolStats:
+    """Отримати статистику пулу з'єднань двигуна"""
+    pool = engine.pool
+    counters = getattr(pool, "counters", PoolCounters())
+    return PoolStats(
+        size=pool.size(),
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        # QueuePool веде лічильник переповнення від -pool_size
+        overflow=max(pool.overflow(), 0),
+        checkouts=counters.checkouts,
+        timeouts=counters.timeouts,
+        avg_wait_ms=counters.total_wait / counters.checkouts * 1000 if counters.checkouts else 0.0,
+        max_wait_ms=counters.max_wait * 1000
+    )
@@ -1,25 +1,87 @@
 from db.queries.users import (
     get_user,
+    upsert_user,
     create_user,
+    create_users,
     update_user_activity,
+    touch_users_activity,
     update_user_xp,
+    update_users_xp,
     update_user_bonuses,
-    get_top_users,
+    claim_daily_bonus,
+    update_users_balances,
     get_user_rank,
+    get_users_count,
+    refresh_user_ranking,
+    get_top_page,
+    get_user_top_page,
+    get_profile_bundle,
+    get_leaderboard_rows,
     register_chat_member,
+    register_chat_members,
+    award_group_xp,
+    get_chat_top_users,
+    get_chat_user_rank,
     get_user_chats,
-    get_referral_count
+    get_referral_count,
+    ProfileBundle
+)
+from db.queries.xp_events import (
+    ensure_xp_event_partitions,
+    copy_xp_events,
+    get_ledger_balances,
+    start_xp_ledger_run,
+    finish_xp_ledger_run,
+    mark_xp_ledger_incomplete,
+    is_xp_ledger_incomplete,
+    reconcile_xp_ledger,
+    replay_xp_balances
+)
+from db.queries.jobs import (
+    insert_scheduled_job,
+    delete_scheduled_jobs_by_key,
+    delete_scheduled_jobs,
+    get_scheduled_jobs
 )
 
 __all__ = [
     "get_user",
+    "upsert_user",
     "create_user",
+    "create_users",
     "update_user_activity",
+    "touch_users_activity",
     "update_user_xp",
+    "update_users_xp",
     "update_user_bonuses",
-    "get_top_users",
+    "claim_daily_bonus",
+    "update_users_balances",
     "get_user_rank",
+    "get_users_count",
+    "refresh_user_ranking",
+    "get_top_page",
+    "get_user_top_page",
+    "get_profile_bundle",
+    "get_leaderboard_rows",
     "register_chat_member",
+    "register_chat_members",
+    "award_group_xp",
+    "get_chat_top_users",
+    "get_chat_user_rank",
     "get_user_chats",
-    "get_referral_count"
+    "get_referral_count",
+    "ProfileBundle",
+    "ensure_xp_event_partitions",
+    "copy_xp_events",
+    "get_ledger_balances",
+    "start_xp_ledger_run",
+    "finish_xp_ledger_run",
+    "mark_xp_ledger_incomplete",
+    "is_xp_ledger_incomplete",
+    "reconcile_xp_ledger",
+    "replay_xp_balances",
+    "insert_scheduled_job",
+    "delete_scheduled_jobs_by_key",
+    "delete_scheduled_jobs",
+    "get_scheduled_jobs"
 ]
@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence
+
+from sqlalchemy import select, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.scheduled_job import ScheduledJob
+
+
+async def insert_scheduled_job(
+    session: AsyncSession,
+    kind: str,
+    run_at: datetime,
+    payload: dict,
+    key: Optional[str] = None
+) -> int:
+    """Додати відкладене завдання, повертає його id"""
+    result = await session.execute(
+        insert(ScheduledJob)
+        .values(kind=kind, run_at=run_at, payload=payload, key=key)
+        .returning(ScheduledJob.id)
+    )
+    return result.scalar_one()
+
+
+async def delete_scheduled_jobs_by_key(session: AsyncSession, key: str) -> List[int]:
+    """Видалити завдання з ключем key, повертає id видалених"""
+    result = await session.execute(
+        delete(ScheduledJob).where(ScheduledJob.key == key).returning(ScheduledJob.id)
+    )
+    return list(result.scalars())
+
+
+async def delete_scheduled_jobs(session: AsyncSession, job_ids: Iterable[int]) -> None:
+    """Видалити виконані завдання"""
+    job_ids = list(job_ids)
+    if job_ids:
+        await session.execute(delete(ScheduledJob).where(ScheduledJob.id.in_(job_ids)))
+
+
+async def get_scheduled_jobs(session: AsyncSession) -> Sequence[ScheduledJob]:
+    """Отримати всі невиконані завдання"""
+    result = await session.execute(select(ScheduledJob).order_by(ScheduledJob.run_at))
+    return result.scalars().all()
@@ -1,17 +1,133 @@
-from sqlalchemy import select, func, desc, update
+from sqlalchemy import select, func, desc, update, values, column, inspect, text, and_, or_, literal, literal_column, BigInteger, Integer
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from typing import Optional, List, Tuple
+from sqlalchemy.orm import aliased, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+from datetime import datetime
+from typing import Any, Optional, List, NamedTuple, Tuple, Dict, Iterable
 
+from db.connection import on_commit
+from db.routing import read_only
 from db.models.user import User, ChatMembership
+from db.models.xp_event import XpSource
+from db.models.ranking import user_ranking
+from utils.leaderboard import leaderboard, LeaderboardEntry
+from utils.user_cache import user_cache
+from utils.xp_ledger import xp_ledger
+from utils.ranking import ranking_config
+
+
+class ProfileBundle(NamedTuple):
+    """Дані для екранів профілю: користувач, його місце в рейтингу і загальна кількість користувачів"""
+    user: User
+    rank: int
+    referral_count: int
+    total_users: int
 
 # Користувачі
 
+def _detached_copy(user: User) -> User:
+    """Копія користувача, не прив'язана до жодної сесії (для зберігання в кеші)"""
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+def _invalidate_users(session: AsyncSession, user_ids: Iterable[int]) -> None:
+    """
+    Прибрати змінених користувачів з кешу: одразу і ще раз після коміту,
+    щоб прочитані іншими сесіями до коміту дані не залишились у кеші.
+    До кінця сесії ці користувачі читаються в обхід кешу.
+    """
+    user_ids = list(user_ids)
+    session.info.setdefault("dirty_users", set()).update(user_ids)
+    user_cache.invalidate_many(user_ids)
+    on_commit(session, lambda: user_cache.invalidate_many(user_ids))
+
 async def get_user(session: AsyncSession, user_id: int) -> Optional[User]:
-    """Отримати користувача за ID"""
+    """Отримати користувача за ID (через кеш користувачів)"""
+    dirty = user_id in session.info.get("dirty_users", ())
+    if not dirty:
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            # Якщо користувач вже є в сесії, повертаємо його, інакше прив'язуємо копію з кешу без запиту
+            existing = session.identity_map.get(identity_key(User, cached.id))
+            if existing is not None:
+                return existing
+            return await session.merge(cached, load=False)
+
+    generation = user_cache.generation(user_id)
     stmt = select(User).where(User.user_id == user_id)
     result = await session.execute(stmt)
-    return result.scalar_one_or_none()
+    user = result.scalar_one_or_none()
+    # Дані з репліки можуть відставати, тому в кеш потрапляє лише прочитане з основної БД
+    if user is not None and not dirty and not session.info.get("replica"):
+        user_cache.set(user_id, _detached_copy(user), generation=generation)
+    return user
+
+async def upsert_user(
+    session: AsyncSession,
+    user_id: int,
+    username: Optional[str],
+    first_name: str,
+    last_name: Optional[str] = None,
+    language_code: Optional[str] = None,
+    invited_by: Optional[int] = None,
+    referral_bonus: int = 0
+) -> Tuple[User, bool]:
+    """
+    Створити користувача або оновити його дані одним запитом (INSERT ... ON CONFLICT).
+    Якщо користувача створено за запрошенням, в тій же транзакції рефереру
+    збільшується лічильник запрошених і нараховується referral_bonus XP.
+    Повертає користувача і ознаку, чи був він щойно створений.
+    """
+    stmt = insert(User).values(
+        user_id=user_id,
+        username=username,
+        first_name=first_name,
+        last_name=last_name,
+        language_code=language_code,
+        # Неіснуючий реферер просто не записується, замість порушення зовнішнього ключа
+        invited_by=select(User.user_id).where(User.user_id == invited_by).scalar_subquery()
+            if invited_by is not None else None
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User.user_id],
+        set_={
+            "username": stmt.excluded.username,
+            "first_name": stmt.excluded.first_name,
+            "last_name": stmt.excluded.last_name,
+            "language_code": stmt.excluded.language_code,
+            "last_activity": func.now(),
+            "updated_at": func.now()
+        }
+    ).returning(User, literal_column("xmax = 0").label("created"))
+
+    result = await session.execute(stmt, execution_options={"populate_existing": True})
+    user, created = result.one()
+    _invalidate_users(session, [user_id])
+
+    referrer_xp = None
+    if created and user.invited_by is not None:
+        stmt = (
+            update(User)
+            .where(User.user_id == user.invited_by)
+            .values(referral_count=User.referral_count + 1, xp=User.xp + referral_bonus)
+            .returning(User.xp)
+        )
+        result = await session.execute(stmt)
+        referrer_xp = result.scalar_one_or_none()
+        _invalidate_users(session, [user.invited_by])
+
+    user_xp, first_name, referrer_id = user.xp, user.first_name, user.invited_by
+
+    def update_leaderboard():
+        leaderboard.add_user(user_id, user_xp, first_name)
+        if referrer_xp is not None:
+            leaderboard.add_xp(referrer_id, referral_bonus)
+            xp_ledger.record(referrer_id, referral_bonus, XpSource.REFERRAL)
+
+    on_commit(session, update_leaderboard)
+    return user, created
 
 async def create_user(
     session: AsyncSession,
@@ -20,59 +136,267 @@ async def create_user(
     first_name: str,
     last_name: Optional[str] = None,
     language_code: Optional[str] = None,
-    invited_by: Optional[int] = None
+    invited_by: Optional[int] = None,
+    referral_bonus: int = 0
 ) -> User:
-    """Створити нового користувача"""
-    user = User(
+    """Створити нового користувача (якщо він вже існує, повертається наявний запис)"""
+    user, _ = await upsert_user(
+        session,
         user_id=user_id,
         username=username,
         first_name=first_name,
         last_name=last_name,
         language_code=language_code,
-        invited_by=invited_by
+        invited_by=invited_by,
+        referral_bonus=referral_bonus
     )
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
     return user
 
+async def create_users(session: AsyncSession, users: Iterable[Dict[str, Any]]) -> None:
+    """Створити кількох користувачів одним запитом, наявні записи не змінюються"""
+    users = list(users)
+    if not users:
+        return
+    stmt = (
+        insert(User)
+        .values(users)
+        .on_conflict_do_nothing(index_elements=[User.user_id])
+        .returning(User.user_id, User.xp, User.first_name)
+    )
+    result = await session.execute(stmt)
+    created = result.all()
+
+    def update_leaderboard():
+        for row in created:
+            leaderboard.add_user(row.user_id, row.xp, row.first_name)
+
+    on_commit(session, update_leaderboard)
+
 async def update_user_activity(session: AsyncSession, user_id: int) -> None:
     """Оновити час останньої активності користувача"""
     stmt = update(User).where(User.user_id == user_id).values(last_activity=func.now())
     await session.execute(stmt)
-    await session.commit()
+    _invalidate_users(session, [user_id])
 
-async def update_user_xp(session: AsyncSession, user_id: int, xp_delta: int) -> int:
-    """Оновити XP користувача і повернути нове значення"""
-    user = await get_user(session, user_id)
-    if not user:
-        return 0
-        
-    user.xp += xp_delta
-    await session.commit()
-    await session.refresh(user)
-    return user.xp
-
-async def update_user_bonuses(session: AsyncSession, user_id: int, bonus_delta: int) -> int:
-    """Оновити бонуси користувача і повернути нове значення"""
-    user = await get_user(session, user_id)
-    if not user:
-        return 0
-        
-    user.bonuses += bonus_delta
-    await session.commit()
-    await session.refresh(user)
-    return user.bonuses
-
-async def get_top_users(session: AsyncSession, limit: int = 3) -> List[User]:
-    """Отримати топ користувачів за XP"""
-    stmt = select(User).order_by(desc(User.xp)).limit(limit)
+async def touch_users_activity(session: AsyncSession, user_ids: Iterable[int]) -> None:
+    """Оновити час останньої активності кількох користувачів одним запитом"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    stmt = update(User).where(User.user_id.in_(user_ids)).values(last_activity=func.now())
+    await session.execute(stmt)
+    _invalidate_users(session, user_ids)
+
+async def update_user_xp(
+    session: AsyncSession,
+    user_id: int,
+    xp_delta: int,
+    source: str
+) -> Optional[Tuple[int, str]]:
+    """
+    Атомарно змінити XP користувача і повернути (нове XP, ім'я) (None, якщо користувача немає).
+    source - джерело зміни для журналу XP (XpSource).
+    """
+    stmt = (
+        update(User)
+        .where(User.user_id == user_id)
+        .values(xp=User.xp + xp_delta)
+        .returning(User.xp, User.first_name)
+    )
     result = await session.execute(stmt)
-    return result.scalars().all()
+    row = result.one_or_none()
+    if row is None:
+        return None
+    _invalidate_users(session, [user_id])
+
+    def after_commit():
+        leaderboard.add_xp(user_id, xp_delta)
+        xp_ledger.record(user_id, xp_delta, source)
+
+    on_commit(session, after_commit)
+    return row.xp, row.first_name
+
+async def update_users_xp(
+    session: AsyncSession,
+    xp_deltas: Dict[int, int],
+    source: str,
+    chat_xp: Optional[Dict[Tuple[int, int], int]] = None
+) -> Dict[int, int]:
+    """
+    Атомарно змінити XP кількох користувачів одним запитом, повертає {user_id: нове XP}.
+    chat_xp - розподіл дельт за чатами {(user_id, chat_id): XP} для журналу XP.
+    """
+    if not xp_deltas:
+        return {}
+
+    deltas = values(
+        column("user_id", BigInteger),
+        column("delta", Integer),
+        name="deltas"
+    ).data(list(xp_deltas.items()))
+
+    stmt = (
+        update(User)
+        .where(User.user_id == deltas.c.user_id)
+        .values(xp=User.xp + deltas.c.delta)
+        .returning(User.user_id, User.xp)
+    )
+    result = await session.execute(stmt)
+    new_values = {row.user_id: row.xp for row in result}
+    _invalidate_users(session, new_values)
+
+    # Події журналу: частина дельти, що припадає на чати, і решта без чату
+    events = []
+    remaining = {user_id: xp_deltas[user_id] for user_id in new_values}
+    for (user_id, chat_id), chat_delta in (chat_xp or {}).items():
+        if user_id in remaining:
+            events.append((user_id, chat_id, chat_delta))
+            remaining[user_id] -= chat_delta
+    events += [(user_id, None, delta) for user_id, delta in remaining.items()]
+
+    def after_commit():
+        for user_id in new_values:
+            leaderboard.add_xp(user_id, xp_deltas[user_id])
+        for user_id, chat_id, delta in events:
+            xp_ledger.record(user_id, delta, source, chat_id=chat_id)
+
+    on_commit(session, after_commit)
+    return new_values
+
+async def update_user_bonuses(
+    session: AsyncSession,
+    user_id: int,
+    bonus_delta: int
+) -> Optional[Tuple[int, str]]:
+    """Атомарно змінити бонуси користувача і повернути (нові бонуси, ім'я) (None, якщо користувача немає)"""
+    stmt = (
+        update(User)
+        .where(User.user_id == user_id)
+        .values(bonuses=User.bonuses + bonus_delta)
+        .returning(User.bonuses, User.first_name)
+    )
+    result = await session.execute(stmt)
+    row = result.one_or_none()
+    if row is None:
+        return None
+    _invalidate_users(session, [user_id])
+    return row.bonuses, row.first_name
+
+async def claim_daily_bonus(
+    session: AsyncSession,
+    user_id: int,
+    bonus: int,
+    now: datetime,
+    day_start: datetime
+) -> Optional[int]:
+    """
+    Атомарно отримати щоденний бонус одним запитом: XP нараховується, лише якщо
+    бонус ще не отримувався з day_start. Повертає нове XP або None, якщо бонус вже
+    отримано (або користувача немає), тому повторне натискання не нарахує бонус двічі.
+    """
+    stmt = (
+        update(User)
+        .where(
+            User.user_id == user_id,
+            or_(User.last_daily_bonus.is_(None), User.last_daily_bonus < day_start)
+        )
+        .values(xp=User.xp + bonus, last_daily_bonus=now)
+        .returning(User.xp)
+    )
+    result = await session.execute(stmt)
+    new_xp = result.scalar_one_or_none()
+    if new_xp is not None:
+        _invalidate_users(session, [user_id])
+
+        def after_commit():
+            leaderboard.add_xp(user_id, bonus)
+            xp_ledger.record(user_id, bonus, XpSource.DAILY_BONUS)
+
+        on_commit(session, after_commit)
+    return new_xp
+
+async def update_users_balances(
+    session: AsyncSession,
+    adjustments: Dict[int, Tuple[int, int]],
+    source: str
+) -> Dict[int, Tuple[int, int]]:
+    """
+    Змінити XP і бонуси кількох користувачів одним запитом.
+    adjustments - {user_id: (дельта XP, дельта бонусів)}, повертає {user_id: (нове XP, нові бонуси)}
+    лише для користувачів, які існують.
+    """
+    if not adjustments:
+        return {}
+
+    deltas = values(
+        column("user_id", BigInteger),
+        column("xp_delta", Integer),
+        column("bonus_delta", Integer),
+        name="deltas"
+    ).data([(user_id, xp_delta, bonus_delta) for user_id, (xp_delta, bonus_delta) in adjustments.items()])
+
+    stmt = (
+        update(User)
+        .where(User.user_id == deltas.c.user_id)
+        .values(xp=User.xp + deltas.c.xp_delta, bonuses=User.bonuses + deltas.c.bonus_delta)
+        .returning(User.user_id, User.xp, User.bonuses)
+    )
+    result = await session.execute(stmt)
+    new_values = {row.user_id: (row.xp, row.bonuses) for row in result}
+    _invalidate_users(session, new_values)
+
+    def after_commit():
+        for user_id in new_values:
+            leaderboard.add_xp(user_id, adjustments[user_id][0])
+            xp_ledger.record(user_id, adjustments[user_id][0], source)
+
+    on_commit(session, after_commit)
+    return new_values
+
+class _RankingSource(NamedTuple):
+    """Колонки, з яких будується рейтинг: таблиця users або представлення user_ranking"""
+    table: Any
+    user_id: Any
+    xp: Any
+    first_name: Any
+
+
+def _ranking_source() -> _RankingSource:
+    if ranking_config.materialized_view:
+        columns = user_ranking.c
+        return _RankingSource(user_ranking, columns.user_id, columns.xp, columns.first_name)
+    return _RankingSource(User.__table__, User.user_id, User.xp, User.first_name)
+
 
+async def _get_view_rank(session: AsyncSession, user_id: int, xp: Optional[int] = None) -> int:
+    """
+    Місце користувача з представлення user_ranking (dense_rank).
+    Користувача, якого ще немає в представленні, ставимо за тим самим правилом серед записів представлення.
+    """
+    result = await session.execute(select(user_ranking.c.rank).where(user_ranking.c.user_id == user_id))
+    rank = result.scalar()
+    if rank is not None:
+        return rank
 
+    if xp is None:
+        user = await get_user(session, user_id)
+        xp = user.xp if user is not None else 0
+    stmt = select(func.count(user_ranking.c.xp.distinct())).where(user_ranking.c.xp > xp)
+    result = await session.execute(stmt)
+    return result.scalar() + 1
+
+
+@read_only
 async def get_user_rank(session: AsyncSession, user_id: int) -> int:
     """Отримати позицію користувача в рейтингу"""
+    if ranking_config.materialized_view:
+        return await _get_view_rank(session, user_id)
+
+    if leaderboard.ready:
+        rank = leaderboard.rank(user_id)
+        if rank is not None:
+            return rank
+
     user_xp_subquery = select(User.xp).where(User.user_id == user_id).scalar_subquery()
 
     stmt = select(func.count()).where(User.xp > user_xp_subquery)
@@ -80,6 +404,164 @@ async def get_user_rank(session: AsyncSession, user_id: int) -> int:
 
     return result.scalar() + 1
 
+
+@read_only
+async def get_users_count(session: AsyncSession) -> int:
+    """Отримати загальну кількість користувачів"""
+    if ranking_config.materialized_view:
+        # Позиції в представленні йдуть підряд з 1, тому максимальна - кількість (за індексом)
+        result = await session.execute(select(func.max(user_ranking.c.position)))
+        return result.scalar() or 0
+
+    if leaderboard.ready:
+        return len(leaderboard)
+
+    stmt = select(func.count()).select_from(User)
+    result = await session.execute(stmt)
+    return result.scalar()
+
+
+@read_only
+async def get_top_page(
+    session: AsyncSession,
+    limit: int,
+    after: Optional[Tuple[int, int]] = None,
+    before: Optional[Tuple[int, int]] = None
+) -> List[LeaderboardEntry]:
+    """
+    Отримати сторінку загального рейтингу за курсором (xp, user_id) без OFFSET.
+    after - записи після курсора, before - записи перед ним, без курсора - початок рейтингу.
+    """
+    if leaderboard.ready and not ranking_config.materialized_view:
+        if after is not None:
+            return leaderboard.page_after(*after, limit)
+        if before is not None:
+            return leaderboard.page_before(*before, limit)
+        return leaderboard.top(limit)
+
+    if limit <= 0:
+        return []
+
+    source = _ranking_source()
+    stmt = select(source.user_id, source.xp, source.first_name)
+    if after is not None:
+        xp, user_id = after
+        stmt = stmt.where(
+            source.xp <= xp,
+            or_(source.xp < xp, and_(source.xp == xp, source.user_id > user_id))
+        ).order_by(desc(source.xp), source.user_id)
+    elif before is not None:
+        xp, user_id = before
+        stmt = stmt.where(
+            source.xp >= xp,
+            or_(source.xp > xp, and_(source.xp == xp, source.user_id < user_id))
+        ).order_by(source.xp, desc(source.user_id))
+    else:
+        stmt = stmt.order_by(desc(source.xp), source.user_id)
+
+    result = await session.execute(stmt.limit(limit))
+    entries = [LeaderboardEntry(row.user_id, row.xp or 0, row.first_name or "") for row in result]
+    if before is not None:
+        entries.reverse()
+    return entries
+
+
+@read_only
+async def get_user_top_page(
+    session: AsyncSession,
+    user_id: int,
+    limit: int
+) -> Optional[Tuple[int, List[LeaderboardEntry]]]:
+    """
+    Отримати сторінку рейтингу, на якій знаходиться користувач.
+    Повертає порядковий індекс (з 0) першого запису сторінки і записи, або None, якщо користувача немає.
+    """
+    if leaderboard.ready and not ranking_config.materialized_view:
+        position = leaderboard.position(user_id)
+        if position is not None:
+            start = position - position % limit
+            return start, leaderboard.page(start, limit)
+
+    user = await get_user(session, user_id)
+    if user is None:
+        return None
+
+    # У представленні XP користувача може бути застарілим, тому сторінка будується навколо поточного
+    source = _ranking_source()
+    stmt = select(func.count()).select_from(source.table).where(
+        or_(source.xp > user.xp, and_(source.xp == user.xp, source.user_id < user_id))
+    )
+    result = await session.execute(stmt)
+    position = result.scalar()
+
+    cursor = (user.xp, user_id)
+    before_count = position % limit
+    previous = [entry for entry in await get_top_page(session, before_count, before=cursor) if entry.user_id != user_id]
+    following = [
+        entry for entry in await get_top_page(session, limit - before_count - 1, after=cursor)
+        if entry.user_id != user_id
+    ]
+    entries = previous + [LeaderboardEntry(user_id, user.xp, user.first_name)] + following
+    return position - len(previous), entries
+
+
+@read_only
+async def get_profile_bundle(session: AsyncSession, user_id: int) -> Optional[ProfileBundle]:
+    """
+    Отримати все для профілю користувача (None, якщо користувача немає).
+    Ранг і кількість користувачів беруться з представлення user_ranking (якщо воно увімкнене)
+    або з рейтингу в пам'яті, якщо він завантажений, інакше все читається одним запитом разом з користувачем.
+    """
+    if ranking_config.materialized_view:
+        user = await get_user(session, user_id)
+        if user is None:
+            return None
+        rank = await _get_view_rank(session, user_id, user.xp)
+        return ProfileBundle(user, rank, user.referral_count, await get_users_count(session))
+
+    if leaderboard.ready:
+        user = await get_user(session, user_id)
+        if user is None:
+            return None
+        rank = leaderboard.rank(user_id)
+        if rank is not None:
+            return ProfileBundle(user, rank, user.referral_count, len(leaderboard))
+
+    other = aliased(User)
+    higher = (
+        select(func.count())
+        .select_from(other)
+        .where(other.xp > User.xp)
+        .correlate(User)
+        .scalar_subquery()
+    )
+    total = select(func.count()).select_from(other).scalar_subquery()
+    stmt = (
+        select(User, (higher + 1).label("rank"), total.label("total_users"))
+        .where(User.user_id == user_id)
+    )
+    result = await session.execute(stmt)
+    row = result.one_or_none()
+    if row is None:
+        return None
+    return ProfileBundle(row.User, row.rank, row.User.referral_count, row.total_users)
+
+
+async def refresh_user_ranking(session: AsyncSession) -> None:
+    """Оновити матеріалізоване представлення рейтингу, не блокуючи читання з нього"""
+    await session.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {user_ranking.name}"))
+
+
+async def get_leaderboard_rows(session: AsyncSession) -> List[Tuple[int, int, str]]:
+    """Отримати (user_id, xp, first_name) всіх користувачів у порядку рейтингу"""
+    stmt = (
+        select(User.user_id, User.xp, User.first_name)
+        .order_by(desc(User.xp), User.user_id)
+        .execution_options(yield_per=10000)
+    )
+    result = await session.stream(stmt)
+    return [tuple(row) async for row in result]
+
 # Чати
 
 async def register_chat_member(
@@ -89,27 +571,133 @@ async def register_chat_member(
     is_admin: bool = False
 ) -> ChatMembership:
     """Зареєструвати користувача як учасника чату"""
-    stmt = select(ChatMembership).where(
-        (ChatMembership.user_id == user_id) & 
-        (ChatMembership.chat_id == chat_id)
+    stmt = insert(ChatMembership).values(
+        user_id=user_id,
+        chat_id=chat_id,
+        is_admin=is_admin
     )
-    result = await session.execute(stmt)
-    membership = result.scalar_one_or_none()
-    
-    if membership:
-        membership.is_admin = is_admin
-    else:
-        membership = ChatMembership(
-            user_id=user_id,
-            chat_id=chat_id,
-            is_admin=is_admin
-        )
-        session.add(membership)
-    
-    await session.commit()
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ChatMembership.user_id, ChatMembership.chat_id],
+        set_={"is_admin": stmt.excluded.is_admin, "updated_at": func.now()}
+    ).returning(ChatMembership)
+
+    result = await session.execute(stmt, execution_options={"populate_existing": True})
+    membership = result.scalar_one()
     return membership
 
 
+async def register_chat_members(
+    session: AsyncSession,
+    memberships: Iterable[Tuple[int, int, bool]],
+    chat_xp: Optional[Dict[Tuple[int, int], int]] = None
+) -> None:
+    """
+    Зареєструвати кілька членств (user_id, chat_id, is_admin) одним запитом.
+    chat_xp - XP, який треба додати до рейтингу чату, за ключем (user_id, chat_id).
+    """
+    chat_xp = chat_xp or {}
+    # ON CONFLICT DO UPDATE не може змінити один рядок двічі, тому прибираємо дублікати
+    rows = {
+        (user_id, chat_id): {
+            "user_id": user_id,
+            "chat_id": chat_id,
+            "is_admin": is_admin,
+            "xp": chat_xp.get((user_id, chat_id), 0)
+        }
+        for user_id, chat_id, is_admin in memberships
+    }
+    if not rows:
+        return
+
+    stmt = insert(ChatMembership).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ChatMembership.user_id, ChatMembership.chat_id],
+        set_={
+            "is_admin": stmt.excluded.is_admin,
+            "xp": ChatMembership.xp + stmt.excluded.xp,
+            "updated_at": func.now()
+        }
+    )
+    await session.execute(stmt)
+
+
+async def award_group_xp(
+    session: AsyncSession,
+    user_id: int,
+    chat_id: int,
+    xp_delta: int,
+    source: str
+) -> Optional[int]:
+    """
+    Нарахувати XP за дію в групі: загальний XP і XP в рейтингу чату одним запитом.
+    Повертає новий загальний XP (None, якщо користувача немає).
+    """
+    user_update = (
+        update(User)
+        .where(User.user_id == user_id)
+        .values(xp=User.xp + xp_delta)
+        .returning(User.user_id, User.xp)
+        .cte("user_update")
+    )
+    membership_upsert = insert(ChatMembership).from_select(
+        ["user_id", "chat_id", "xp"],
+        select(user_update.c.user_id, literal(chat_id, BigInteger), literal(xp_delta, Integer))
+    )
+    membership_upsert = membership_upsert.on_conflict_do_update(
+        index_elements=[ChatMembership.user_id, ChatMembership.chat_id],
+        set_={"xp": ChatMembership.xp + membership_upsert.excluded.xp, "updated_at": func.now()}
+    )
+    stmt = select(user_update.c.xp).add_cte(membership_upsert.cte("membership_upsert"))
+
+    result = await session.execute(stmt)
+    new_xp = result.scalar_one_or_none()
+    if new_xp is not None:
+        _invalidate_users(session, [user_id])
+
+        def after_commit():
+            leaderboard.add_xp(user_id, xp_delta)
+            xp_ledger.record(user_id, xp_delta, source, chat_id=chat_id)
+
+        on_commit(session, after_commit)
+    return new_xp
+
+
+@read_only
+async def get_chat_top_users(session: AsyncSession, chat_id: int, limit: int = 3) -> List[Any]:
+    """Отримати топ учасників чату за XP, зароблений в цьому чаті"""
+    stmt = (
+        select(ChatMembership.user_id, ChatMembership.xp, User.first_name)
+        .join(User, User.user_id == ChatMembership.user_id)
+        .where(ChatMembership.chat_id == chat_id)
+        .order_by(desc(ChatMembership.xp), ChatMembership.user_id)
+        .limit(limit)
+    )
+    result = await session.execute(stmt)
+    return result.all()
+
+
+@read_only
+async def get_chat_user_rank(session: AsyncSession, chat_id: int, user_id: int) -> Optional[int]:
+    """Отримати позицію користувача в рейтингу чату (None, якщо він не учасник)"""
+    user_xp_subquery = (
+        select(ChatMembership.xp)
+        .where(ChatMembership.chat_id == chat_id, ChatMembership.user_id == user_id)
+        .scalar_subquery()
+    )
+    stmt = select(
+        user_xp_subquery,
+        select(func.count())
+        .where(ChatMembership.chat_id == chat_id, ChatMembership.xp > user_xp_subquery)
+        .scalar_subquery()
+    )
+    result = await session.execute(stmt)
+    user_xp, higher = result.one()
+    if user_xp is None:
+        return None
+    return higher + 1
+
+
+@read_only
 async def get_user_chats(session: AsyncSession, user_id: int) -> List[int]:
     """Отримати ідентифікатори всіх чатів, в яких бере участь користувач"""
     stmt = select(ChatMembership.chat_id).where(ChatMembership.user_id == user_id)
@@ -117,8 +705,9 @@ async def get_user_chats(session: AsyncSession, user_id: int) -> List[int]:
     return result.scalars().all()
 
 
+@read_only
 async def get_referral_count(session: AsyncSession, user_id: int) -> int:
     """Отримати кількість запрошених користувачів"""
-    stmt = select(func.count()).where(User.invited_by == user_id)
+    stmt = select(User.referral_count).where(User.user_id == user_id)
     result = await session.execute(stmt)
-    return result.scalar()
+    return result.scalar() or 0
@@ -0,0 +1,154 @@
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import structlog
+from sqlalchemy import select, func, update, text, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.connection import on_commit
+from db.models.user import User
+from db.models.xp_event import XpEvent, XpLedgerState, XpSource
+from utils.user_cache import user_cache
+
+logger = structlog.get_logger()
+
+# Порядок полів у записах для COPY
+XP_EVENT_COLUMNS = ("user_id", "chat_id", "source", "delta", "created_at")
+
+XpEventRecord = Tuple[int, Optional[int], str, int, datetime]
+
+
+def _add_months(month: date, count: int) -> date:
+    month_index = month.month - 1 + count
+    return date(month.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+async def ensure_xp_event_partitions(session: AsyncSession, start: date, months: int) -> None:
+    """
+    Створити місячні секції xp_events, починаючи з місяця start, і секцію за замовчуванням.
+    Секція, діапазон якої вже зайнятий рядками в секції за замовчуванням, пропускається з помилкою в лозі.
+    """
+    table = XpEvent.__tablename__
+    await session.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+
+    month = start.replace(day=1)
+    for _ in range(months + 1):
+        next_month = _add_months(month, 1)
+        partition = f"{table}_{month:%Y_%m}"
+        try:
+            async with session.begin_nested():
+                await session.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}')"
+                ))
+        except Exception as e:
+            logger.error(f"Error creating partition {partition}: {e}")
+        month = next_month
+
+
+async def copy_xp_events(session: AsyncSession, records: Sequence[XpEventRecord]) -> None:
+    """Записати події XP одним COPY в транзакції сесії"""
+    if not records:
+        return
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        XpEvent.__tablename__,
+        records=records,
+        columns=XP_EVENT_COLUMNS
+    )
+
+
+async def get_ledger_balances(session: AsyncSession, user_ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+    """Отримати суми XP за журналом подій {user_id: XP}"""
+    stmt = select(XpEvent.user_id, func.sum(XpEvent.delta)).group_by(XpEvent.user_id)
+    if user_ids is not None:
+        stmt = stmt.where(XpEvent.user_id.in_(list(user_ids)))
+    result = await session.execute(stmt)
+    return {user_id: total for user_id, total in result}
+
+
+def _ledger_xp():
+    """Сума подій журналу для рядка users (корельований підзапит)"""
+    return func.coalesce(
+        select(func.sum(XpEvent.delta))
+        .where(XpEvent.user_id == User.user_id)
+        .correlate(User)
+        .scalar_subquery(),
+        0
+    )
+
+
+async def start_xp_ledger_run(session: AsyncSession) -> bool:
+    """
+    Позначити, що процес почав писати журнал. Якщо попередній процес не зупинився штатно,
+    журнал позначається неповним. Повертає, чи журнал неповний.
+    """
+    stmt = insert(XpLedgerState).values(id=1, running=True, incomplete=False)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[XpLedgerState.id],
+        set_={"running": True, "incomplete": XpLedgerState.incomplete | XpLedgerState.running}
+    ).returning(XpLedgerState.incomplete)
+    result = await session.execute(stmt)
+    return result.scalar_one()
+
+
+async def finish_xp_ledger_run(session: AsyncSession) -> None:
+    """Позначити штатну зупинку: усі події процесу записані"""
+    await session.execute(update(XpLedgerState).where(XpLedgerState.id == 1).values(running=False))
+
+
+async def mark_xp_ledger_incomplete(session: AsyncSession) -> None:
+    """Позначити, що частину подій журналу втрачено"""
+    await session.execute(update(XpLedgerState).where(XpLedgerState.id == 1).values(incomplete=True))
+
+
+async def is_xp_ledger_incomplete(session: AsyncSession) -> bool:
+    """Чи можуть у журналі бракувати подій"""
+    result = await session.execute(select(XpLedgerState.incomplete).where(XpLedgerState.id == 1))
+    return bool(result.scalar())
+
+
+async def reconcile_xp_ledger(session: AsyncSession, dry_run: bool = False) -> int:
+    """
+    Вирівняти журнал за балансами: для кожного користувача, у якого users.xp розходиться з сумою подій,
+    додати подію reconcile на різницю, і зняти позначку неповного журналу.
+    Повертає кількість таких користувачів (з dry_run=True нічого не змінюється).
+    """
+    ledger_xp = _ledger_xp()
+    mismatch = User.xp.is_distinct_from(ledger_xp)
+
+    if dry_run:
+        result = await session.execute(select(func.count()).select_from(User).where(mismatch))
+        return result.scalar()
+
+    corrections = (
+        select(User.user_id, literal(str(XpSource.RECONCILE)), User.xp - ledger_xp)
+        .where(mismatch)
+    )
+    result = await session.execute(
+        insert(XpEvent).from_select(["user_id", "source", "delta"], corrections)
+    )
+    await session.execute(update(XpLedgerState).where(XpLedgerState.id == 1).values(incomplete=False))
+    return result.rowcount
+
+
+async def replay_xp_balances(session: AsyncSession, dry_run: bool = False) -> int:
+    """
+    Перерахувати users.xp як суму подій журналу.
+    Повертає кількість користувачів, у яких баланс розходиться з журналом
+    (з dry_run=True нічого не змінюється). Рейтинг в пам'яті після цього треба перезавантажити.
+    Перед перерахунком треба перевірити is_xp_ledger_incomplete: інакше XP з втрачених подій буде знято.
+    """
+    ledger_xp = _ledger_xp()
+    mismatch = User.xp.is_distinct_from(ledger_xp)
+
+    if dry_run:
+        result = await session.execute(select(func.count()).select_from(User).where(mismatch))
+        return result.scalar()
+
+    result = await session.execute(update(User).where(mismatch).values(xp=ledger_xp))
+    user_cache.clear()
+    on_commit(session, user_cache.clear)
+    return result.rowcount
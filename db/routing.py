@@ -0,0 +1,64 @@
+import time
+from functools import wraps
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import structlog
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from db.connection import db_config, replica_session_maker
+
+logger = structlog.get_logger()
+
+QueryFunc = TypeVar("QueryFunc", bound=Callable[..., Awaitable[Any]])
+
+
+class ReplicaRouter:
+    """
+    Маршрутизація запитів лише на читання на репліку.
+    Запит іде на основну БД, якщо репліка не налаштована, недоступна після збою
+    (retry_interval секунд) або сесія в цьому оновленні вже щось записала.
+    """
+
+    def __init__(self, session_maker: Optional[sessionmaker], retry_interval: float):
+        self.session_maker = session_maker
+        self.retry_interval = retry_interval
+        self._down_until = 0.0
+        self.replica_queries = 0
+        self.fallbacks = 0
+
+    @property
+    def available(self) -> bool:
+        return self.session_maker is not None and time.monotonic() >= self._down_until
+
+    def read_only(self, func: QueryFunc) -> QueryFunc:
+        """Декоратор для функції запиту з першим аргументом session"""
+
+        @wraps(func)
+        async def wrapper(session: AsyncSession, *args, **kwargs):
+            if (
+                session.info.get("replica")
+                or session.info.get("has_writes")
+                or not self.available
+            ):
+                return await func(session, *args, **kwargs)
+
+            try:
+                async with self.session_maker() as replica_session:
+                    result = await func(replica_session, *args, **kwargs)
+                self.replica_queries += 1
+                return result
+            except (DBAPIError, PoolTimeoutError, OSError, TimeoutError) as e:
+                self._down_until = time.monotonic() + self.retry_interval
+                self.fallbacks += 1
+                logger.warning(f"Replica query {func.__name__} failed, using primary: {e}")
+
+            return await func(session, *args, **kwargs)
+
+        return wrapper
+
+
+replica_router = ReplicaRouter(replica_session_maker, db_config.replica_retry_interval)
+
+read_only = replica_router.read_only
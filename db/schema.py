@@ -0,0 +1,46 @@
+import asyncio
+import os
+from typing import Set
+
+import structlog
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = structlog.get_logger()
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+
+def get_alembic_config() -> Config:
+    """
+    Конфігурація Alembic без alembic.ini: так міграції з бота не перезаписують налаштування логування.
+    URL бази env.py бере з config.toml.
+    """
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    return config
+
+
+def get_head_revisions() -> Set[str]:
+    """Отримати останні ревізії з файлів міграцій (без звернення до БД)"""
+    return set(ScriptDirectory.from_config(get_alembic_config()).get_heads())
+
+
+async def get_current_revisions(engine: AsyncEngine) -> Set[str]:
+    """Отримати ревізії, на яких стоїть база, одним запитом до alembic_version"""
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            return set(result.scalars())
+    except ProgrammingError:
+        # Таблиці alembic_version ще немає - база порожня або не позначена
+        return set()
+
+
+async def upgrade_schema() -> None:
+    """Виконати alembic upgrade head (env.py запускає власний цикл подій, тому в окремому потоці)"""
+    await asyncio.to_thread(command.upgrade, get_alembic_config(), "head")
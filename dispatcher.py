@@ -1,7 +1,8 @@
 from aiogram import Dispatcher
 
+from db.connection import async_session_maker
 from fluent_loader import get_fluent_localization
-from middlewares import L10nMiddleware, UserActivityMiddleware
+from middlewares import DbSessionMiddleware, L10nMiddleware, UserActivityMiddleware
 
 # init locale
 locale = get_fluent_localization()
@@ -10,11 +11,14 @@ locale = get_fluent_localization()
 dp = Dispatcher()
 
 # Apply middlewares
+# (DbSessionMiddleware goes first: the next middlewares and handlers use its session)
+dp.message.outer_middleware(DbSessionMiddleware(async_session_maker))
 dp.message.outer_middleware(L10nMiddleware(locale))
 dp.message.outer_middleware(UserActivityMiddleware())
 
 dp.pre_checkout_query.outer_middleware(L10nMiddleware(locale))
 
+dp.callback_query.outer_middleware(DbSessionMiddleware(async_session_maker))
 dp.callback_query.outer_middleware(L10nMiddleware(locale))
 dp.callback_query.outer_middleware(UserActivityMiddleware())
 
@@ -1,10 +1,14 @@
 from aiogram.filters import BaseFilter
 from aiogram.types import Message
 
+from utils.admin_cache import admin_cache
+
 class IsAdminFilter(BaseFilter):
     def __init__(self, is_admin: bool):
         self.is_admin = is_admin
 
     async def __call__(self, message: Message) -> bool:
-        member = await message.bot.get_chat_member(message.chat.id, message.from_user.id)
-        return member.is_chat_admin() == self.is_admin
+        if message.chat.type == "private":
+            return not self.is_admin
+        is_admin = await admin_cache.is_admin(message.bot, message.chat.id, message.from_user.id)
+        return is_admin == self.is_admin
@@ -1,11 +1,16 @@
 from aiogram.filters import BaseFilter
-from aiogram.types import Message
+from aiogram.types import ChatMemberOwner, Message
+
+from utils.admin_cache import admin_cache
 
 class MemberCanRestrictFilter(BaseFilter):
     def __init__(self, member_can_restrict: bool):
         self.member_can_restrict = member_can_restrict
 
     async def __call__(self, message: Message):
-        member = await message.bot.get_chat_member(message.chat.id, message.from_user.id)
+        if message.chat.type == "private":
+            return not self.member_can_restrict
+        member = await admin_cache.get_admin(message.bot, message.chat.id, message.from_user.id)
+        can_restrict = member is not None and (isinstance(member, ChatMemberOwner) or member.can_restrict_members)
 
-        return (member.is_chat_creator() or member.can_restrict_members) == self.member_can_restrict
+        return can_restrict == self.member_can_restrict
@@ -1,18 +1,40 @@
+import codecs
+import csv
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
 import structlog
 from aiogram import Router, F, Bot
 from aiogram.filters import Command, CommandObject
 from aiogram.types import Message
 from aiogram.exceptions import TelegramBadRequest
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from fluent.runtime import FluentLocalization
-from db.connection import get_async_session
-from db.queries import get_user, update_user_xp, update_user_bonuses
+from db.connection import engine, replica_engine
+from db.routing import replica_router
+from db.pool import get_pool_stats
+from filters.is_owner import IsOwnerFilter
+from utils.user_cache import user_cache
+from db.models import XpSource
+from db import init_leaderboard
+from db.queries import (
+    update_user_xp, update_user_bonuses, update_users_balances, replay_xp_balances,
+    is_xp_ledger_incomplete, reconcile_xp_ledger
+)
+from utils.xp_buffer import xp_accumulator
+from utils.xp_ledger import xp_ledger
 
 router = Router()
 
 logger = structlog.get_logger()
 
+# Кількість користувачів в одному UPDATE при масовому нарахуванні
+BULK_CHUNK_SIZE = 1000
+
+# Telegram Bot API не віддає ботам файли, більші за 20 МБ
+MAX_BULK_FILE_SIZE = 20 * 1024 * 1024
+
 
 @router.message(Command("ping"))
 async def cmd_ping(message: Message, l10n: FluentLocalization):
@@ -20,7 +42,7 @@ async def cmd_ping(message: Message, l10n: FluentLocalization):
 
 
 @router.message(Command("add_xp"))
-async def cmd_add_xp(message: Message, command: CommandObject, bot: Bot, l10n: FluentLocalization):
+async def cmd_add_xp(message: Message, command: CommandObject, bot: Bot, l10n: FluentLocalization, session: AsyncSession):
     try:
         bot_config = bot.config
         if message.from_user.id not in bot_config.owners:
@@ -43,15 +65,14 @@ async def cmd_add_xp(message: Message, command: CommandObject, bot: Bot, l10n: F
         user_id = int(args[0])
         amount = int(args[1])
         
-        async for session in get_async_session():
-            user = await get_user(session, user_id)
-            if not user:
-                await message.answer(f"Користувач з ID {user_id} не знайдений.")
-                return
+        updated = await update_user_xp(session, user_id, amount, XpSource.ADMIN)
+        if updated is None:
+            await message.answer(f"Користувач з ID {user_id} не знайдений.")
+            return
             
-            new_xp = await update_user_xp(session, user_id, amount)
-            await message.answer(f"Додано {amount} XP користувачу {user.first_name}. Новий баланс: {new_xp} XP")
-            logger.info(f"Admin {message.from_user.id} added {amount} XP to user {user_id}")
+        new_xp, first_name = updated
+        await message.answer(f"Додано {amount} XP користувачу {first_name}. Новий баланс: {new_xp} XP")
+        logger.info(f"Admin {message.from_user.id} added {amount} XP to user {user_id}")
     
     except ValueError:
         await message.answer("Помилка: ID користувача та кількість XP повинні бути числами.")
@@ -61,7 +82,7 @@ async def cmd_add_xp(message: Message, command: CommandObject, bot: Bot, l10n: F
 
 
 @router.message(Command("add_bonus"))
-async def cmd_add_bonus(message: Message, command: CommandObject, bot: Bot, l10n: FluentLocalization):
+async def cmd_add_bonus(message: Message, command: CommandObject, bot: Bot, l10n: FluentLocalization, session: AsyncSession):
     try:
         bot_config = bot.config
         if message.from_user.id not in bot_config.owners:
@@ -84,18 +105,219 @@ async def cmd_add_bonus(message: Message, command: CommandObject, bot: Bot, l10n
         user_id = int(args[0])
         amount = int(args[1])
         
-        async for session in get_async_session():
-            user = await get_user(session, user_id)
-            if not user:
-                await message.answer(f"Користувач з ID {user_id} не знайдений.")
-                return
+        updated = await update_user_bonuses(session, user_id, amount)
+        if updated is None:
+            await message.answer(f"Користувач з ID {user_id} не знайдений.")
+            return
             
-            new_bonuses = await update_user_bonuses(session, user_id, amount)
-            await message.answer(f"Додано {amount} бонусів користувачу {user.first_name}. Новий баланс: {new_bonuses} бонусів")
-            logger.info(f"Admin {message.from_user.id} added {amount} bonuses to user {user_id}")
+        new_bonuses, first_name = updated
+        await message.answer(f"Додано {amount} бонусів користувачу {first_name}. Новий баланс: {new_bonuses} бонусів")
+        logger.info(f"Admin {message.from_user.id} added {amount} bonuses to user {user_id}")
     
     except ValueError:
         await message.answer("Помилка: ID користувача та кількість бонусів повинні бути числами.")
     except Exception as e:
         logger.error(f"Error in add_bonus command: {e}")
         await message.answer(f"Виникла помилка: {e}")
+
+
+@router.message(Command("db_stats"), IsOwnerFilter(is_owner=True))
+async def cmd_db_stats(message: Message):
+    """Статистика пулу з'єднань з БД, кешу користувачів і репліки"""
+    stats = get_pool_stats(engine)
+    cache_stats = user_cache.stats()
+    text = (
+        "<b>📊 Пул з'єднань БД</b>\n\n"
+        f"Розмір пулу: {stats.size}\n"
+        f"Вільних: {stats.checked_in}\n"
+        f"Видано: {stats.checked_out}\n"
+        f"Понад пул (overflow): {stats.overflow}\n\n"
+        f"Всього видач: {stats.checkouts}\n"
+        f"Тайм-аутів: {stats.timeouts}\n"
+        f"Середнє очікування: {stats.avg_wait_ms:.2f} мс\n"
+        f"Максимальне очікування: {stats.max_wait_ms:.2f} мс\n\n"
+        "<b>👤 Кеш користувачів</b>\n\n"
+        f"Записів: {cache_stats.size} / {cache_stats.max_size}\n"
+        f"Влучань: {cache_stats.hits}\n"
+        f"Промахів: {cache_stats.misses}\n"
+        f"Частка влучань: {cache_stats.hit_rate:.1%}\n"
+        f"Витіснено: {cache_stats.evictions}\n"
+        f"Застаріло: {cache_stats.expirations}"
+    )
+
+    if replica_engine is not None:
+        replica_stats = get_pool_stats(replica_engine)
+        text += (
+            "\n\n<b>🪞 Репліка</b>\n\n"
+            f"Доступна: {'так' if replica_router.available else 'ні'}\n"
+            f"Запитів на репліку: {replica_router.replica_queries}\n"
+            f"Перемикань на основну БД: {replica_router.fallbacks}\n"
+            f"Видано з'єднань: {replica_stats.checked_out}"
+        )
+
+    await message.answer(text)
+
+
+@router.message(Command("replay_xp"), IsOwnerFilter(is_owner=True))
+async def cmd_replay_xp(message: Message, command: CommandObject, session: AsyncSession):
+    """
+    Звірка балансів XP з журналом подій.
+    apply - перерахунок балансів за журналом; можливий, лише поки журнал повний: після аварійної
+    зупинки або відкинутих подій XP з втрачених подій було б знято з користувачів.
+    reconcile - вирівняти журнал за балансами (події reconcile на різницю) і зняти позначку неповного журналу.
+    Обидві дії варто запускати, коли бот не обробляє ігри, бо зміни XP потрапляють у журнал з затримкою.
+    """
+    action = command.args
+
+    # Спочатку записуємо все, що ще чекає в буферах
+    await xp_accumulator.flush()
+    await xp_ledger.flush()
+
+    incomplete = await is_xp_ledger_incomplete(session)
+    if action == "reconcile":
+        count = await reconcile_xp_ledger(session)
+        await session.commit()
+        await message.answer(f"Журнал XP вирівняно за балансами, подій reconcile: {count}")
+        logger.info(f"Owner {message.from_user.id} reconciled the XP ledger: {count} corrections")
+        return
+
+    if action == "apply" and incomplete:
+        await message.answer(
+            "Журнал XP неповний: бот зупинявся аварійно або відкидав події.\n"
+            "Перерахунок за ним зняв би XP з втрачених подій, тому його не виконано.\n"
+            "Виконайте /replay_xp reconcile, щоб вирівняти журнал за поточними балансами."
+        )
+        return
+
+    count = await replay_xp_balances(session, dry_run=action != "apply")
+    if action != "apply":
+        status = "⚠️ Журнал неповний: перерахунок недоступний до /replay_xp reconcile" if incomplete else \
+            "Щоб перерахувати їх за журналом, виконайте /replay_xp apply"
+        await message.answer(
+            f"Балансів, що розходяться з журналом XP: {count}\n"
+            f"{status}\n\n"
+            "apply встановлює баланс рівним сумі подій журналу; reconcile натомість додає в журнал "
+            "події на різницю, не змінюючи балансів."
+        )
+        return
+
+    await session.commit()
+    await init_leaderboard()
+    await message.answer(f"Перераховано балансів XP: {count}")
+    logger.info(f"Owner {message.from_user.id} replayed XP balances from the ledger: {count} changed")
+
+
+def _parse_bulk_row(row: List[str]) -> Optional[Tuple[int, int, int]]:
+    """Розібрати рядок CSV (user_id, xp_delta, bonus_delta); None, якщо рядок некоректний"""
+    if len(row) not in (2, 3):
+        return None
+    try:
+        user_id = int(row[0])
+        xp_delta = int(row[1])
+        bonus_delta = int(row[2]) if len(row) == 3 and row[2].strip() else 0
+    except ValueError:
+        return None
+    if not xp_delta and not bonus_delta:
+        return None
+    return user_id, xp_delta, bonus_delta
+
+
+async def _read_csv_rows(bot: Bot, file_path: str) -> AsyncIterator[List[str]]:
+    """
+    Потоково завантажити CSV-файл з серверів Telegram і віддавати його рядки.
+    Файл читається частинами і декодується інкрементально, тому в пам'яті не тримається цілком.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    url = bot.session.api.file_url(bot.token, file_path)
+    async for chunk in bot.session.stream_content(url=url, raise_for_status=True):
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        # Останній шматок може бути незавершеним рядком - чекаємо на наступну частину
+        tail = lines.pop()
+        for row in csv.reader(line + "\n" for line in lines):
+            yield row
+
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        for row in csv.reader([tail]):
+            yield row
+
+
+@router.message(Command("bulk_xp"), IsOwnerFilter(is_owner=True), F.document)
+async def cmd_bulk_xp(message: Message, bot: Bot, session: AsyncSession):
+    """
+    Масове нарахування XP і бонусів з CSV-файлу, надісланого з підписом /bulk_xp.
+    Рядки файлу: user_id,xp_delta[,bonus_delta]; рядок заголовка допускається.
+    Файл застосовується порціями в одній транзакції: або весь, або жоден рядок.
+    """
+    if message.document.file_size and message.document.file_size > MAX_BULK_FILE_SIZE:
+        await message.answer("Файл завеликий: максимальний розмір - 20 МБ.")
+        return
+
+    applied = skipped = unknown = 0
+    chunk: Dict[int, Tuple[int, int]] = {}
+
+    async def apply_chunk():
+        nonlocal applied, unknown
+        updated = await update_users_balances(session, chunk, XpSource.ADMIN)
+        applied += len(updated)
+        unknown += len(chunk) - len(updated)
+        chunk.clear()
+
+    try:
+        file = await bot.get_file(message.document.file_id)
+        line_number = 0
+        async for row in _read_csv_rows(bot, file.file_path):
+            line_number += 1
+            if not any(cell.strip() for cell in row):
+                continue
+            parsed = _parse_bulk_row(row)
+            if parsed is None:
+                # Перший рядок, що не розбирається, вважаємо заголовком
+                if line_number > 1:
+                    skipped += 1
+                continue
+
+            user_id, xp_delta, bonus_delta = parsed
+            # Кілька рядків одного користувача зливаються: UPDATE не змінює рядок двічі
+            previous_xp, previous_bonuses = chunk.get(user_id, (0, 0))
+            chunk[user_id] = (previous_xp + xp_delta, previous_bonuses + bonus_delta)
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                await apply_chunk()
+
+        if chunk:
+            await apply_chunk()
+    except (UnicodeDecodeError, csv.Error) as e:
+        await session.rollback()
+        await message.answer(f"Не вдалося прочитати CSV-файл: {e}")
+        return
+    except SQLAlchemyError as e:
+        await session.rollback()
+        logger.error(f"Error applying bulk XP file: {e}")
+        await message.answer("Не вдалося застосувати файл: жоден рядок не змінено.")
+        return
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Error in bulk_xp command: {e}")
+        await message.answer(f"Виникла помилка: {e}")
+        return
+
+    await session.commit()
+    await message.answer(
+        "<b>📥 Масове нарахування</b>\n\n"
+        f"Застосовано: {applied}\n"
+        f"Пропущено некоректних рядків: {skipped}\n"
+        f"Невідомих користувачів: {unknown}"
+    )
+    logger.info(
+        f"Owner {message.from_user.id} applied bulk XP file: "
+        f"{applied} applied, {skipped} skipped, {unknown} unknown"
+    )
+
+
+@router.message(Command("bulk_xp"), IsOwnerFilter(is_owner=True))
+async def cmd_bulk_xp_usage(message: Message):
+    await message.answer(
+        "Надішліть CSV-файл з підписом /bulk_xp.\n"
+        "Формат рядків: user_id,xp_delta,bonus_delta"
+    )
@@ -5,14 +5,15 @@ from aiogram.enums import ChatType
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery, WebAppInfo, WebAppData, ReplyKeyboardRemove
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fluent.runtime import FluentLocalization
 from games.dice_game import DiceGame
 from games.rps_game import RockPaperScissorsGame
 from keyboards import get_dice_game_kb, get_main_menu_kb, get_rps_game_kb
 from keyboards.games import get_rps_webapp_kb, get_ttt_webapp_kb
-from db.connection import get_async_session
-from db.queries import get_user, update_user_xp, register_chat_member
+from db.models import XpSource
+from db.queries import update_user_xp
 
 router = Router()
 
@@ -29,7 +30,7 @@ async def cmd_dice_game(message: Message, l10n: FluentLocalization):
 
 
 @router.callback_query(F.data == "dice:roll")
-async def callback_dice_roll(query: CallbackQuery, l10n: FluentLocalization):
+async def callback_dice_roll(query: CallbackQuery, l10n: FluentLocalization, session: AsyncSession):
     """Обробник натискання кнопки для кидання кості"""
     player_roll, bot_roll, result = DiceGame.play_game()
 
@@ -42,8 +43,9 @@ async def callback_dice_roll(query: CallbackQuery, l10n: FluentLocalization):
     else:
         result_text = l10n.format_value("dice-game-draw")
 
-    async for session in get_async_session():
-        await update_user_xp(session, query.from_user.id, xp_reward)
+    await update_user_xp(session, query.from_user.id, xp_reward, XpSource.GAME)
+    # Записи комітяться до надсилання, щоб не тримати з'єднання на час очікування ліміту
+    await session.commit()
 
     await query.message.edit_text(
         l10n.format_value("dice-game-result", {
@@ -68,7 +70,7 @@ async def cmd_rps_game(message: Message, l10n: FluentLocalization):
 
 
 @router.callback_query(F.data.startswith("rps:"))
-async def callback_rps_choice(query: CallbackQuery, l10n: FluentLocalization):
+async def callback_rps_choice(query: CallbackQuery, l10n: FluentLocalization, session: AsyncSession):
     choice = query.data.split(":")[1]
 
     player_choice, bot_choice, result = RockPaperScissorsGame.play_game(choice)
@@ -85,8 +87,9 @@ async def callback_rps_choice(query: CallbackQuery, l10n: FluentLocalization):
 
     xp_reward = RockPaperScissorsGame.calculate_reward(result)
 
-    async for session in get_async_session():
-        await update_user_xp(session, query.from_user.id, xp_reward)
+    await update_user_xp(session, query.from_user.id, xp_reward, XpSource.GAME)
+    # Записи комітяться до надсилання, щоб не тримати з'єднання на час очікування ліміту
+    await session.commit()
 
     await query.message.edit_text(
         l10n.format_value("rps-game-result", {
@@ -140,7 +143,7 @@ async def cmd_rps_webapp_private(message: Message, l10n: FluentLocalization):
 
 
 @router.message(F.web_app_data)
-async def process_webapp_data(message: Message, l10n: FluentLocalization):
+async def process_webapp_data(message: Message, l10n: FluentLocalization, session: AsyncSession):
     """Обробник для отримання данних з webapp"""
     web_app_data = message.web_app_data.data
 
@@ -162,8 +165,8 @@ async def process_webapp_data(message: Message, l10n: FluentLocalization):
             if xp_reward == 0:
                 xp_reward = 2
 
-        async for session in get_async_session():
-            await update_user_xp(session, message.from_user.id, xp_reward)
+        await update_user_xp(session, message.from_user.id, xp_reward, XpSource.GAME)
+        await session.commit()
 
         await message.answer(
             l10n.format_value("rps-webapp-result", {
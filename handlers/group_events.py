@@ -1,26 +1,83 @@
 import structlog
-import asyncio
 from aiogram import Router, F, Bot
 from aiogram.filters import Command, CommandStart
-from aiogram.types import Message, ChatMemberUpdated
+from aiogram.types import Message, ChatMemberUpdated, ReplyParameters
 from sqlalchemy.ext.asyncio import AsyncSession
 from aiogram.exceptions import TelegramBadRequest
 
 from fluent.runtime import FluentLocalization
-from db.connection import get_async_session
-from db.queries import register_chat_member, get_user, update_user_xp, get_top_users, create_user, get_user_rank
+from db.models import XpSource
+from db.queries import (
+    create_user, update_users_xp, award_group_xp,
+    register_chat_members, get_chat_top_users, get_chat_user_rank, get_profile_bundle
+)
 from games.dice_game import DiceGame
 from games.rps_game import RockPaperScissorsGame
+from utils.admin_cache import admin_cache
 from utils.game_tracker import GameTracker
+from utils.message_cleanup import message_cleanup
+from utils.photo_cache import profile_photo_cache
+from utils.scheduler import scheduler
+from utils.xp_buffer import xp_accumulator
 
 router = Router()
 router.message.filter(F.chat.type.in_({"group", "supergroup"}))
 
 logger = structlog.get_logger()
 
+# Затримки групових ігор (в секундах)
+GAME_TIMEOUT = 30
+DICE_RESULT_DELAY = 4  # анімація кубика
+RPS_RESULT_DELAY = 1
+GAME_CLEANUP_DELAY = 20
+
+
+def game_job_key(chat_id: int, message_id: int) -> str:
+    """Ключ завдання завершення гри за часом (за повідомленням-запрошенням до гри)"""
+    return f"game:{chat_id}:{message_id}"
+
+
+@scheduler.job("expire_game")
+async def expire_game(bot: Bot, session: AsyncSession, payload: dict):
+    """Гра не завершилась вчасно: прибрати запрошення до гри"""
+    GameTracker.end_game(payload["chat_id"], payload["game_type"], payload["user_id"])
+    await message_cleanup.delete(payload["chat_id"], [payload["message_id"]])
+
+
+@scheduler.job("game_result")
+async def send_game_result(bot: Bot, session: AsyncSession, payload: dict):
+    """Відповісти результатом гри після анімації і запланувати прибирання повідомлень гри"""
+    message_ids = list(payload["cleanup"])
+    try:
+        result_message = await bot.send_message(
+            payload["chat_id"],
+            payload["text"],
+            reply_parameters=ReplyParameters(message_id=payload["reply_to"], allow_sending_without_reply=True)
+        )
+        message_ids.append(result_message.message_id)
+    except Exception as e:
+        # Повідомлення гри прибираються, навіть якщо результат не вдалося надіслати
+        logger.error(f"Error sending game result in chat {payload['chat_id']}: {e}")
+
+    await scheduler.schedule(session, "delete_messages", GAME_CLEANUP_DELAY, {
+        "chat_id": payload["chat_id"],
+        "message_ids": message_ids
+    })
+
+
+@scheduler.job("delete_messages")
+async def delete_messages(bot: Bot, session: AsyncSession, payload: dict):
+    """Прибрати повідомлення гри (пакетом разом з іншими іграми чату)"""
+    await message_cleanup.delete(payload["chat_id"], payload["message_ids"])
+
 
 @router.my_chat_member()
 async def bot_added_to_group(event: ChatMemberUpdated, l10n: FluentLocalization = None):
+    if event.new_chat_member.status in ["left", "kicked"]:
+        admin_cache.invalidate(event.chat.id)
+    else:
+        admin_cache.update_member(event.chat.id, event.new_chat_member)
+
     if l10n is None:
         logger.error("FluentLocalization object is missing in bot_added_to_group")
         welcome_text = "Привіт! Я ігровий бот. Використовуйте /help для детальної інформації."
@@ -44,6 +101,12 @@ async def bot_added_to_group(event: ChatMemberUpdated, l10n: FluentLocalization
         logger.info(f"Bot added to chat {event.chat.id}")
 
 
+@router.chat_member()
+async def chat_member_updated(event: ChatMemberUpdated):
+    """Оновити кеш адміністраторів при зміні статусу учасника чату"""
+    admin_cache.update_member(event.chat.id, event.new_chat_member)
+
+
 @router.message(Command("help"))
 async def cmd_help_in_group(message: Message, l10n: FluentLocalization):
     help_text = f"""📚 <b>Доступні команди в чаті:</b>
@@ -69,60 +132,64 @@ async def cmd_stats_in_group(message: Message, l10n: FluentLocalization):
 
 
 @router.message(Command("top"))
-async def cmd_top_in_group(message: Message, l10n: FluentLocalization):
-    async for session in get_async_session():
-        top_users = await get_top_users(session, limit=3)
+async def cmd_top_in_group(message: Message, l10n: FluentLocalization, session: AsyncSession):
+    top_users = await get_chat_top_users(session, message.chat.id, limit=3)
+    user_rank = await get_chat_user_rank(session, message.chat.id, message.from_user.id)
 
-        text = f"🏆 <b>Топ гравців за XP:</b>\n\n"
+    text = f"🏆 <b>Топ гравців чату за XP:</b>\n\n"
         
-        for i, user in enumerate(top_users, 1):
-            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉"
-            text += f"{medal} {i}. {user.first_name} - {user.xp} XP\n"
-        await message.reply(text)
+    for i, user in enumerate(top_users, 1):
+        medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉"
+        text += f"{medal} {i}. {user.first_name} - {user.xp} XP\n"
+
+    if user_rank is not None:
+        text += f"\nВаше місце в чаті: {user_rank}"
+    await message.reply(text)
 
 
 @router.message(Command("profile"))
-async def cmd_profile_in_group(message: Message, l10n: FluentLocalization, bot: Bot):
+async def cmd_profile_in_group(message: Message, l10n: FluentLocalization, bot: Bot, session: AsyncSession):
     user_id = message.from_user.id
     
-    async for session in get_async_session():
-        user = await get_user(session, user_id)
-        if not user:
-            user = await create_user(
-                session,
-                user_id=user_id,
-                username=message.from_user.username,
-                first_name=message.from_user.first_name,
-                last_name=message.from_user.last_name,
-                language_code=message.from_user.language_code
-            )
-
-        rank = await get_user_rank(session, user_id)
-
-        profile_text = f"""👤 <b>Профіль користувача</b>
+    profile = await get_profile_bundle(session, user_id)
+    if not profile:
+        await create_user(
+            session,
+            user_id=user_id,
+            username=message.from_user.username,
+            first_name=message.from_user.first_name,
+            last_name=message.from_user.last_name,
+            language_code=message.from_user.language_code
+        )
+        profile = await get_profile_bundle(session, user_id)
+    user = profile.user
+    # Записи комітяться до надсилання, щоб не тримати з'єднання на час очікування ліміту
+    await session.commit()
+
+    profile_text = f"""👤 <b>Профіль користувача</b>
 
 📛 Ім'я: {message.from_user.first_name}{f" {message.from_user.last_name}" if message.from_user.last_name else ""}
 🆔 ID: {user_id}
 💰 XP: {user.xp}
 🎁 Бонуси: {user.bonuses}
-🏆 Ваше місце в рейтингу: {rank}
+🏆 Ваше місце в рейтингу: {profile.rank} з {profile.total_users}
 ⏳ Остання активність: {user.last_activity.strftime("%d.%m.%Y %H:%M")}
 📅 Дата реєстрації: {user.created_at.strftime("%d.%m.%Y %H:%M")}"""
 
     try:
-        user_photos = await bot.get_user_profile_photos(user_id, limit=1)
-        if user_photos.total_count > 0:
-            photo = user_photos.photos[0][-1]
-            await message.reply_photo(photo.file_id, caption=profile_text)
-        else:
-            await message.reply(profile_text)
+        photo_file_id = await profile_photo_cache.get_file_id(bot, user_id)
     except Exception as e:
         logger.error(f"Error getting profile photo: {e}")
+        photo_file_id = None
+
+    if photo_file_id:
+        await message.reply_photo(photo_file_id, caption=profile_text)
+    else:
         await message.reply(profile_text)
 
 
 @router.message(Command("dice"))
-async def cmd_dice_in_group(message: Message, l10n: FluentLocalization, bot: Bot):
+async def cmd_dice_in_group(message: Message, l10n: FluentLocalization, bot: Bot, session: AsyncSession):
     """Game of dice in group chat"""
     chat_id = message.chat.id
     user_id = message.from_user.id
@@ -138,17 +205,16 @@ async def cmd_dice_in_group(message: Message, l10n: FluentLocalization, bot: Bot
 {message.from_user.first_name}, відправте емоджі кубика 🎲 у відповідь на це повідомлення, щоб кинути кубик."""
     )
 
-    try:
-        await asyncio.sleep(30)
-        if GameTracker.is_playing(chat_id, "dice", user_id):
-            GameTracker.end_game(chat_id, "dice", user_id)
-            await prompt_message.delete()
-    except Exception as e:
-        logger.error(f"Error in dice game timeout: {e}")
+    await scheduler.schedule(session, "expire_game", GAME_TIMEOUT, {
+        "chat_id": chat_id,
+        "game_type": "dice",
+        "user_id": user_id,
+        "message_id": prompt_message.message_id
+    }, key=game_job_key(chat_id, prompt_message.message_id))
 
 
 @router.message(F.dice, F.reply_to_message)
-async def handle_dice_game(message: Message, bot: Bot):
+async def handle_dice_game(message: Message, bot: Bot, session: AsyncSession):
     """Handle dice emoji reply"""
     chat_id = message.chat.id
     user_id = message.from_user.id
@@ -161,8 +227,6 @@ async def handle_dice_game(message: Message, bot: Bot):
     bot_dice_message = await message.answer_dice(emoji="🎲")
     bot_roll = bot_dice_message.dice.value
 
-    await asyncio.sleep(4)
-
     if player_roll > bot_roll:
         result = "win"
         result_text = "🎉 Ви перемогли!"
@@ -176,22 +240,27 @@ async def handle_dice_game(message: Message, bot: Bot):
         result_text = "🤷 Нічия! Можете спробувати ще раз."
         xp_reward = 3
 
-    async for session in get_async_session():
-        new_xp = await update_user_xp(session, message.from_user.id, xp_reward)
-        user = await get_user(session, message.from_user.id)
-        if not user:
-            await create_user(
-                session,
-                user_id=message.from_user.id,
-                username=message.from_user.username,
-                first_name=message.from_user.first_name,
-                last_name=message.from_user.last_name,
-                language_code=message.from_user.language_code
-            )
-            new_xp = xp_reward
-
-    result_message = await message.reply(
-        f"""🎲 <b>Результат гри в кубик:</b>
+    new_xp = await award_group_xp(session, message.from_user.id, chat_id, xp_reward, XpSource.GROUP_GAME)
+    if new_xp is None:
+        await create_user(
+            session,
+            user_id=message.from_user.id,
+            username=message.from_user.username,
+            first_name=message.from_user.first_name,
+            last_name=message.from_user.last_name,
+            language_code=message.from_user.language_code
+        )
+        new_xp = await award_group_xp(session, message.from_user.id, chat_id, xp_reward, XpSource.GROUP_GAME)
+
+    GameTracker.end_game(chat_id, "dice", user_id)
+    await scheduler.cancel(session, game_job_key(chat_id, message.reply_to_message.message_id))
+
+    # Результат надсилається після анімації кубика бота
+    await scheduler.schedule(session, "game_result", DICE_RESULT_DELAY, {
+        "chat_id": chat_id,
+        "reply_to": message.message_id,
+        "cleanup": [message.reply_to_message.message_id, message.message_id, bot_dice_message.message_id],
+        "text": f"""🎲 <b>Результат гри в кубик:</b>
 
 Ваш результат: {player_roll}
 Результат бота: {bot_roll}
@@ -200,22 +269,11 @@ async def handle_dice_game(message: Message, bot: Bot):
 
 Ви отримуєте {xp_reward} XP! 🌟
 Ваш загальний рахунок: {new_xp} XP"""
-    )
-
-    GameTracker.end_game(chat_id, "dice", user_id)
-
-    await asyncio.sleep(20)
-    try:
-        await message.reply_to_message.delete()
-        await message.delete()
-        await bot_dice_message.delete()
-        await result_message.delete()
-    except Exception as e:
-        logger.error(f"Error deleting dice game messages: {e}")
+    })
 
 
 @router.message(Command("rps"))
-async def cmd_rps_in_group(message: Message, l10n: FluentLocalization, bot: Bot):
+async def cmd_rps_in_group(message: Message, l10n: FluentLocalization, bot: Bot, session: AsyncSession):
     """Game Rock-Paper-Scissors in group chat"""
     chat_id = message.chat.id
     user_id = message.from_user.id
@@ -234,17 +292,16 @@ async def cmd_rps_in_group(message: Message, l10n: FluentLocalization, bot: Bot)
 ✂️ - Ножиці"""
     )
 
-    try:
-        await asyncio.sleep(30)
-        if GameTracker.is_playing(chat_id, "rps", user_id):
-            GameTracker.end_game(chat_id, "rps", user_id)
-            await prompt_message.delete()
-    except Exception as e:
-        logger.error(f"Error in RPS game timeout: {e}")
+    await scheduler.schedule(session, "expire_game", GAME_TIMEOUT, {
+        "chat_id": chat_id,
+        "game_type": "rps",
+        "user_id": user_id,
+        "message_id": prompt_message.message_id
+    }, key=game_job_key(chat_id, prompt_message.message_id))
 
 
 @router.message(F.text.in_(["🤜", "✂️", "🧳"]), F.reply_to_message)
-async def handle_rps_game(message: Message, bot: Bot):
+async def handle_rps_game(message: Message, bot: Bot, session: AsyncSession):
     """Handle rock-paper-scissors emoji reply"""
     chat_id = message.chat.id
     user_id = message.from_user.id
@@ -281,8 +338,6 @@ async def handle_rps_game(message: Message, bot: Bot):
 
     bot_choice_message = await message.answer(bot_emoji)
 
-    await asyncio.sleep(1)
-
     if player_choice == bot_choice:
         result_text = "🤷 Нічия! Можете спробувати ще раз."
         xp_reward = 5
@@ -297,22 +352,26 @@ async def handle_rps_game(message: Message, bot: Bot):
         result_text = "😢 Ви програли, але все одно отримуєте невеликий бонус."
         xp_reward = 2
 
-    async for session in get_async_session():
-        new_xp = await update_user_xp(session, message.from_user.id, xp_reward)
-        user = await get_user(session, message.from_user.id)
-        if not user:
-            await create_user(
-                session,
-                user_id=message.from_user.id,
-                username=message.from_user.username,
-                first_name=message.from_user.first_name,
-                last_name=message.from_user.last_name,
-                language_code=message.from_user.language_code
-            )
-            new_xp = xp_reward
-
-    result_message = await message.reply(
-        f"""🖐️ <b>Результат гри Камінь-Ножиці-Папір:</b>
+    new_xp = await award_group_xp(session, message.from_user.id, chat_id, xp_reward, XpSource.GROUP_GAME)
+    if new_xp is None:
+        await create_user(
+            session,
+            user_id=message.from_user.id,
+            username=message.from_user.username,
+            first_name=message.from_user.first_name,
+            last_name=message.from_user.last_name,
+            language_code=message.from_user.language_code
+        )
+        new_xp = await award_group_xp(session, message.from_user.id, chat_id, xp_reward, XpSource.GROUP_GAME)
+
+    GameTracker.end_game(chat_id, "rps", user_id)
+    await scheduler.cancel(session, game_job_key(chat_id, message.reply_to_message.message_id))
+
+    await scheduler.schedule(session, "game_result", RPS_RESULT_DELAY, {
+        "chat_id": chat_id,
+        "reply_to": message.message_id,
+        "cleanup": [message.reply_to_message.message_id, message.message_id, bot_choice_message.message_id],
+        "text": f"""🖐️ <b>Результат гри Камінь-Ножиці-Папір:</b>
 
 Ваш вибір: {player_choice_text}
 Вибір бота: {bot_choice_text}
@@ -321,51 +380,40 @@ async def handle_rps_game(message: Message, bot: Bot):
 
 Ви отримуєте {xp_reward} XP! 🌟
 Ваш загальний рахунок: {new_xp} XP"""
-    )
-
-    GameTracker.end_game(chat_id, "rps", user_id)
-
-    await asyncio.sleep(20)
-    try:
-        await message.reply_to_message.delete()
-        await message.delete()
-        await bot_choice_message.delete()
-        await result_message.delete()
-    except Exception as e:
-        logger.error(f"Error deleting RPS game messages: {e}")
+    })
 
 
 @router.message(F.new_chat_members)
-async def new_members_handler(message: Message, l10n: FluentLocalization):
-    for member in message.new_chat_members:
-        if not member.is_bot:
-            async for session in get_async_session():
-                user = await get_user(session, member.id)
-                if user:
-                    await register_chat_member(session, member.id, message.chat.id)
-                    await update_user_xp(session, member.id, 10)
+async def new_members_handler(message: Message, l10n: FluentLocalization, session: AsyncSession):
+    member_ids = [member.id for member in message.new_chat_members if not member.is_bot]
+    if not member_ids:
+        return
+
+    # XP за вступ отримують лише вже зареєстровані користувачі
+    chat_xp = {(member_id, message.chat.id): 10 for member_id in member_ids}
+    awarded = await update_users_xp(
+        session,
+        {member_id: 10 for member_id in member_ids},
+        XpSource.GROUP_JOIN,
+        chat_xp=chat_xp
+    )
+    await register_chat_members(
+        session,
+        [(member_id, message.chat.id, False) for member_id in awarded],
+        chat_xp=chat_xp
+    )
 
 
 @router.message(F.text)
 async def process_group_message(message: Message):
     """
     Обробляє текстові повідомлення в групі.
-    Можна додати логіку нарахування XP за активність.
+    XP за активність накопичується в пам'яті і записується в БД пакетами.
     """
-    async for session in get_async_session():
-        user = await get_user(session, message.from_user.id)
-        if user:
-            await update_user_xp(session, message.from_user.id, 1)
-            is_admin = False
-            try:
-                chat_member = await message.chat.get_member(message.from_user.id)
-                is_admin = chat_member.status in ["administrator", "creator"]
-            except Exception as e:
-                logger.error(f"Error checking admin status: {e}")
-
-            await register_chat_member(
-                session, 
-                message.from_user.id, 
-                message.chat.id,
-                is_admin=is_admin
-            )
+    is_admin = False
+    try:
+        is_admin = await admin_cache.is_admin(message.bot, message.chat.id, message.from_user.id)
+    except Exception as e:
+        logger.error(f"Error checking admin status: {e}")
+
+    xp_accumulator.add(message.from_user.id, 1, chat_id=message.chat.id, is_admin=is_admin)
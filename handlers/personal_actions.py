@@ -1,10 +1,12 @@
+import math
 import structlog
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
 
 from aiogram import Router, F, Bot
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command, CommandStart, CommandObject
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import Message, CallbackQuery, User
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from fluent.runtime import FluentLocalization
@@ -13,11 +15,12 @@ from keyboards import (
     get_notification_settings_kb, get_privacy_settings_kb,
     get_games_menu_kb, get_webapp_games_kb
 )
-from db.connection import get_async_session
 from db.queries import (
-    get_user, create_user, update_user_activity, 
-    get_top_users, get_user_rank, get_referral_count
+    get_user, upsert_user, claim_daily_bonus,
+    get_top_page, get_user_top_page, get_user_rank, get_users_count, get_referral_count, get_profile_bundle
 )
+from utils.leaderboard import leaderboard_config
+from utils.photo_cache import profile_photo_cache
 
 
 router = Router()
@@ -32,45 +35,43 @@ def format_datetime(dt: datetime) -> str:
 
 
 @router.message(CommandStart())
-async def cmd_start(message: Message, l10n: FluentLocalization, command: CommandObject = None):
-    async for session in get_async_session():
-        user = await get_user(session, message.from_user.id)
-        
-        # Handle referral links
-        referrer_id = None
-        if command and command.args and command.args.startswith("ref_"):
-            try:
-                referrer_id = int(command.args.split("_")[1])
-                referrer = await get_user(session, referrer_id)
-                if referrer and referrer_id != message.from_user.id:
-                    # Give bonus to referrer
-                    await update_user_xp(session, referrer_id, 50)
-                    logger.info(f"Referrer {referrer_id} got 50 XP for inviting {message.from_user.id}")
-            except (ValueError, IndexError):
-                referrer_id = None
-
-        if not user:
-            user = await create_user(
-                session,
-                user_id=message.from_user.id,
-                username=message.from_user.username,
-                first_name=message.from_user.first_name,
-                last_name=message.from_user.last_name,
-                language_code=message.from_user.language_code,
-                referred_by=referrer_id
-            )
-            logger.info(f"Created new user: {user.user_id}")
-            
-            if referrer_id:
-                welcome_text = l10n.format_value("hello-referral-msg", {
-                    "name": message.from_user.first_name,
-                    "referrer_bonus": 50
-                })
-            else:
-                welcome_text = l10n.format_value("hello-new-user-msg", {"name": message.from_user.first_name})
+async def cmd_start(message: Message, l10n: FluentLocalization, session: AsyncSession, command: CommandObject = None):
+    # Handle referral links
+    referrer_id = None
+    if command and command.args and command.args.startswith("ref_"):
+        try:
+            referrer_id = int(command.args.split("_")[1])
+        except (ValueError, IndexError):
+            referrer_id = None
+        if referrer_id == message.from_user.id:
+            referrer_id = None
+
+    user, created = await upsert_user(
+        session,
+        user_id=message.from_user.id,
+        username=message.from_user.username,
+        first_name=message.from_user.first_name,
+        last_name=message.from_user.last_name,
+        language_code=message.from_user.language_code,
+        invited_by=referrer_id,
+        referral_bonus=50
+    )
+
+    if created:
+        logger.info(f"Created new user: {user.user_id}")
+
+        # Реферер записується (і отримує бонус), лише якщо він існує
+        if user.invited_by is not None:
+            logger.info(f"Referrer {user.invited_by} got 50 XP for inviting {message.from_user.id}")
+
+            welcome_text = l10n.format_value("hello-referral-msg", {
+                "name": message.from_user.first_name,
+                "referrer_bonus": 50
+            })
         else:
-            await update_user_activity(session, message.from_user.id)
-            welcome_text = l10n.format_value("hello-msg", {"name": message.from_user.first_name})
+            welcome_text = l10n.format_value("hello-new-user-msg", {"name": message.from_user.first_name})
+    else:
+        welcome_text = l10n.format_value("hello-msg", {"name": message.from_user.first_name})
 
     await message.answer(
         welcome_text,
@@ -79,13 +80,13 @@ async def cmd_start(message: Message, l10n: FluentLocalization, command: Command
 
 
 @router.message(Command("profile"))
-async def cmd_profile(message: Message, l10n: FluentLocalization, bot: Bot):
-    await show_profile(message.from_user.id, message, l10n, bot)
+async def cmd_profile(message: Message, l10n: FluentLocalization, bot: Bot, session: AsyncSession):
+    await show_profile(session, message.from_user.id, message, l10n, bot)
 
 
 @router.message(Command("top"))
-async def cmd_top(message: Message, l10n: FluentLocalization):
-    await show_top(message.from_user.id, message, l10n, position=1)
+async def cmd_top(message: Message, l10n: FluentLocalization, session: AsyncSession):
+    await show_top(session, message.from_user.id, message, l10n)
 
 
 @router.message(Command("about"))
@@ -105,8 +106,8 @@ async def callback_main_menu(query: CallbackQuery, l10n: FluentLocalization):
     await query.answer()
 
 @router.callback_query(F.data == "profile")
-async def callback_profile(query: CallbackQuery, l10n: FluentLocalization, bot: Bot):
-    await show_profile(query.from_user.id, query.message, l10n, bot, is_edit=True)
+async def callback_profile(query: CallbackQuery, l10n: FluentLocalization, bot: Bot, session: AsyncSession):
+    await show_profile(session, query.from_user.id, query.message, l10n, bot, is_edit=True)
     await query.answer()
 
 
@@ -120,24 +121,31 @@ async def callback_about(query: CallbackQuery, l10n: FluentLocalization):
 
 
 @router.callback_query(F.data.startswith("top:"))
-async def callback_top(query: CallbackQuery, l10n: FluentLocalization):
-    position = query.data.split(":")[1]
-    if position == "me":
-        position = 0
-    else:
-        position = int(position)
-    
-    await show_top(query.from_user.id, query.message, l10n, position=position, is_edit=True)
+async def callback_top(query: CallbackQuery, l10n: FluentLocalization, session: AsyncSession):
+    # top:1 - початок рейтингу, top:me - сторінка користувача,
+    # top:next:<позиція>:<xp>:<user_id> і top:prev:... - сусідні сторінки відносно курсора
+    parts = query.data.split(":")
+    direction = parts[1]
+    cursor = None
+    if direction in ("next", "prev"):
+        try:
+            cursor = tuple(int(part) for part in parts[2:5])
+        except ValueError:
+            cursor = None
+        if len(cursor or ()) != 3:
+            direction = None
+    elif direction != "me":
+        direction = None
+
+    await show_top(session, query.from_user.id, query.message, l10n, direction=direction, cursor=cursor, is_edit=True)
     await query.answer()
 
 
 @router.callback_query(F.data == "referral")
-async def callback_referral(query: CallbackQuery, l10n: FluentLocalization, bot: Bot):
-    bot_info = await bot.get_me()
+async def callback_referral(query: CallbackQuery, l10n: FluentLocalization, bot_info: User, session: AsyncSession):
     ref_link = f"https://t.me/{bot_info.username}?start=ref_{query.from_user.id}"
 
-    async for session in get_async_session():
-        ref_count = await get_referral_count(session, query.from_user.id)
+    ref_count = await get_referral_count(session, query.from_user.id)
     
     await query.message.edit_text(
         l10n.format_value("referral-info", {
@@ -149,99 +157,119 @@ async def callback_referral(query: CallbackQuery, l10n: FluentLocalization, bot:
     await query.answer()
 
 
-async def show_profile(user_id: int, message_or_query, l10n: FluentLocalization, bot: Bot, is_edit=False):
+async def show_profile(session: AsyncSession, user_id: int, message_or_query, l10n: FluentLocalization, bot: Bot, is_edit=False):
     """Відображення профілю користувача"""
-    async for session in get_async_session():
-        user = await get_user(session, user_id)
-        if not user:
-            logger.error(f"User {user_id} not found")
-            return
-
-        rank = await get_user_rank(session, user_id)
-
-        referrals = await get_referral_count(session, user_id)
+    profile = await get_profile_bundle(session, user_id)
+    if not profile:
+        logger.error(f"User {user_id} not found")
+        return
+    user = profile.user
+    # Звільняємо з'єднання до надсилання, яке може чекати на ліміт
+    await session.commit()
 
     profile_text = l10n.format_value("profile-info", {
         "name": user.first_name + (f" {user.last_name}" if user.last_name else ""),
         "user_id": user.user_id,
         "xp": user.xp,
         "bonuses": user.bonuses,
-        "referrals": referrals,
+        "referrals": profile.referral_count,
         "last_activity": format_datetime(user.last_activity),
         "registered_at": format_datetime(user.created_at),
-        "rank": rank
+        "rank": profile.rank
     })
 
+    if is_edit:
+        await message_or_query.edit_text(
+            profile_text,
+            reply_markup=get_profile_kb(l10n)
+        )
+        return
+
     try:
-        user_photos = await bot.get_user_profile_photos(user_id, limit=1)
-        has_photo = user_photos.total_count > 0
+        photo_file_id = await profile_photo_cache.get_file_id(bot, user_id)
     except Exception as e:
         logger.error(f"Error getting profile photo: {e}")
-        has_photo = False
+        photo_file_id = None
 
-    if is_edit:
-        await message_or_query.edit_text(
-            profile_text,
+    if photo_file_id:
+        await message_or_query.answer_photo(
+            photo_file_id,
+            caption=profile_text,
             reply_markup=get_profile_kb(l10n)
         )
     else:
-        if has_photo:
-            photo = user_photos.photos[0][-1]
-            await message_or_query.answer_photo(
-                photo.file_id,
-                caption=profile_text,
-                reply_markup=get_profile_kb(l10n)
-            )
-        else:
-            await message_or_query.answer(
-                profile_text,
-                reply_markup=get_profile_kb(l10n)
-            )
+        await message_or_query.answer(
+            profile_text,
+            reply_markup=get_profile_kb(l10n)
+        )
 
 
-async def show_top(user_id: int, message_or_query, l10n: FluentLocalization, position=1, is_edit=False):
-    """Відображення топу гравців"""
-    from sqlalchemy import text
-    
-    async for session in get_async_session():
-        top_users = await get_top_users(session, limit=10)
-        user_rank = await get_user_rank(session, user_id)
-        total_users = await session.execute(text("SELECT COUNT(*) FROM users"))
-        total_users = total_users.scalar()
-    
-    if position == 0:
-        user = await get_user(session, user_id)
-        top_text = f"{l10n.format_value('top-players-title')}\n\n"
-        top_text += l10n.format_value('top-player-item', {
-            "position": user_rank,
-            "name": user.first_name,
-            "xp": user.xp
-        })
-        top_text += "\n\n" + l10n.format_value('top-your-position', {
-            "position": user_rank,
-            "total": total_users
-        })
-    else:
-        top_text = f"{l10n.format_value('top-players-title')}\n\n"
-        for i, user in enumerate(top_users[:10], 1):
-            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "🏅"
-            top_text += f"{medal} {i}. {user.first_name} - {user.xp} XP\n"
-        
-        top_text += "\n" + l10n.format_value('top-your-position', {
-            "position": user_rank,
-            "total": total_users
-        })
+async def show_top(
+    session: AsyncSession,
+    user_id: int,
+    message_or_query,
+    l10n: FluentLocalization,
+    direction: Optional[str] = None,
+    cursor: Optional[Tuple[int, int, int]] = None,
+    is_edit=False
+):
+    """
+    Відображення сторінки топу гравців.
+    direction: "next"/"prev" - сторінка після/перед cursor (позиція, xp, user_id),
+    "me" - сторінка з користувачем, None - початок рейтингу.
+    """
+    page_size = leaderboard_config.page_size
+    start, entries = 0, []
+
+    if direction == "me":
+        own_page = await get_user_top_page(session, user_id, page_size)
+        if own_page is not None:
+            start, entries = own_page
+    elif direction == "next":
+        position, xp, cursor_user_id = cursor
+        entries = await get_top_page(session, page_size, after=(xp, cursor_user_id))
+        start = position + 1
+    elif direction == "prev":
+        position, xp, cursor_user_id = cursor
+        entries = await get_top_page(session, page_size, before=(xp, cursor_user_id))
+        start = max(position - len(entries), 0)
+
+    if not entries:
+        start, entries = 0, await get_top_page(session, page_size)
+
+    user_rank = await get_user_rank(session, user_id)
+    total_users = await get_users_count(session)
+
+    top_text = f"{l10n.format_value('top-players-title')}\n\n"
+    for i, entry in enumerate(entries, start + 1):
+        medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "🏅"
+        line = f"{medal} {i}. {entry.first_name} - {entry.xp} XP"
+        top_text += (f"<b>{line}</b>" if entry.user_id == user_id else line) + "\n"
+
+    top_text += "\n" + l10n.format_value('top-your-position', {
+        "position": user_rank,
+        "total": total_users
+    })
+
+    prev_cursor = next_cursor = None
+    if entries:
+        first, last = entries[0], entries[-1]
+        end = start + len(entries)
+        if start > 0:
+            prev_cursor = f"{start}:{first.xp}:{first.user_id}"
+        if len(entries) == page_size and end < total_users:
+            next_cursor = f"{end - 1}:{last.xp}:{last.user_id}"
+    reply_markup = get_top_kb(l10n, prev_cursor=prev_cursor, next_cursor=next_cursor)
 
     if is_edit:
-        await message_or_query.edit_text(
-            top_text,
-            reply_markup=get_top_kb(l10n)
-        )
+        try:
+            await message_or_query.edit_text(top_text, reply_markup=reply_markup)
+        except TelegramBadRequest as e:
+            # Повторне відкриття тієї ж сторінки
+            if "message is not modified" not in str(e):
+                raise
     else:
-        await message_or_query.answer(
-            top_text,
-            reply_markup=get_top_kb(l10n)
-        )
+        await message_or_query.answer(top_text, reply_markup=reply_markup)
 
 
 @router.message(Command("settings"))
@@ -264,46 +292,45 @@ async def callback_settings(query: CallbackQuery, l10n: FluentLocalization):
 
 
 @router.callback_query(F.data == "achievements")
-async def callback_achievements(query: CallbackQuery, l10n: FluentLocalization):
+async def callback_achievements(query: CallbackQuery, l10n: FluentLocalization, session: AsyncSession):
     """Відображення досягнень користувача"""
-    async for session in get_async_session():
-        user = await get_user(session, query.from_user.id)
-        if not user:
-            await query.answer("Помилка: користувач не знайдений")
-            return
+    user = await get_user(session, query.from_user.id)
+    if not user:
+        await query.answer("Помилка: користувач не знайдений")
+        return
         
-        # Простий список досягнень на основі XP
-        achievements = []
+    # Простий список досягнень на основі XP
+    achievements = []
         
-        if user.xp >= 10:
-            achievements.append("🎯 Новачок (10+ XP)")
-        if user.xp >= 50:
-            achievements.append("⭐ Активний гравець (50+ XP)")
-        if user.xp >= 100:
-            achievements.append("🔥 Досвідчений (100+ XP)")
-        if user.xp >= 250:
-            achievements.append("💎 Експерт (250+ XP)")
-        if user.xp >= 500:
-            achievements.append("👑 Майстер (500+ XP)")
-        if user.xp >= 1000:
-            achievements.append("🏆 Легенда (1000+ XP)")
+    if user.xp >= 10:
+        achievements.append("🎯 Новачок (10+ XP)")
+    if user.xp >= 50:
+        achievements.append("⭐ Активний гравець (50+ XP)")
+    if user.xp >= 100:
+        achievements.append("🔥 Досвідчений (100+ XP)")
+    if user.xp >= 250:
+        achievements.append("💎 Експерт (250+ XP)")
+    if user.xp >= 500:
+        achievements.append("👑 Майстер (500+ XP)")
+    if user.xp >= 1000:
+        achievements.append("🏆 Легенда (1000+ XP)")
         
-        # Досягнення по рефералам
-        ref_count = await get_referral_count(session, query.from_user.id)
-        if ref_count >= 1:
-            achievements.append("🤝 Запрошував друзів (1+ реферал)")
-        if ref_count >= 5:
-            achievements.append("👥 Популярний (5+ рефералів)")
-        if ref_count >= 10:
-            achievements.append("🌟 Лідер спільноти (10+ рефералів)")
+    # Досягнення по рефералам
+    ref_count = user.referral_count
+    if ref_count >= 1:
+        achievements.append("🤝 Запрошував друзів (1+ реферал)")
+    if ref_count >= 5:
+        achievements.append("👥 Популярний (5+ рефералів)")
+    if ref_count >= 10:
+        achievements.append("🌟 Лідер спільноти (10+ рефералів)")
         
-        achievements_text = l10n.format_value("achievements-title") + "\n\n"
-        if achievements:
-            achievements_text += "\n".join(achievements)
-        else:
-            achievements_text += l10n.format_value("achievements-none")
+    achievements_text = l10n.format_value("achievements-title") + "\n\n"
+    if achievements:
+        achievements_text += "\n".join(achievements)
+    else:
+        achievements_text += l10n.format_value("achievements-none")
         
-        achievements_text += f"\n\n{l10n.format_value('achievements-stats-title')}\n💰 XP: {user.xp}\n🎁 Бонуси: {user.bonuses}\n👥 Запрошено друзів: {ref_count}"
+    achievements_text += f"\n\n{l10n.format_value('achievements-stats-title')}\n💰 XP: {user.xp}\n🎁 Бонуси: {user.bonuses}\n👥 Запрошено друзів: {ref_count}"
     
     await query.message.edit_text(
         achievements_text,
@@ -376,54 +403,56 @@ async def callback_help(query: CallbackQuery, l10n: FluentLocalization):
     await query.answer()
 
 
+DAILY_BONUS_XP = 25
+
+
+async def give_daily_bonus(session: AsyncSession, user_id: int, message: Message, l10n: FluentLocalization):
+    """Видати щоденний бонус користувачу і відповісти в чат message"""
+    now = datetime.now()
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    new_xp = await claim_daily_bonus(session, user_id, DAILY_BONUS_XP, now=now, day_start=day_start)
+    if new_xp is not None:
+        await message.answer(
+            l10n.format_value("daily-bonus-received", {
+                "bonus": DAILY_BONUS_XP,
+                "total": new_xp
+            }),
+            reply_markup=get_main_menu_kb(l10n)
+        )
+        return
+
+    # Бонус не нараховано: або він вже отриманий сьогодні, або користувача немає
+    if not await get_user(session, user_id):
+        await message.answer(l10n.format_value("daily-bonus-register-first"))
+        return
+
+    hours_left = math.ceil((day_start + timedelta(days=1) - now).total_seconds() / 3600)
+    await message.answer(
+        l10n.format_value("daily-bonus-already-claimed", {
+            "hours": hours_left
+        }),
+        reply_markup=get_main_menu_kb(l10n)
+    )
+
+
 @router.message(Command("daily"))
-async def cmd_daily_bonus(message: Message, l10n: FluentLocalization):
+async def cmd_daily_bonus(message: Message, l10n: FluentLocalization, session: AsyncSession):
     """Щоденний бонус"""
-    async for session in get_async_session():
-        user = await get_user(session, message.from_user.id)
-        if not user:
-            await message.answer(l10n.format_value("daily-bonus-register-first"))
-            return
-        
-        # Перевіряємо, чи можна отримати щоденний бонус
-        from datetime import datetime, timedelta
-        now = datetime.now()
-        
-        # Якщо користувач ще не отримував бонус сьогодні
-        if user.last_daily_bonus is None or (now - user.last_daily_bonus).days >= 1:
-            daily_bonus = 25
-            await update_user_xp(session, message.from_user.id, daily_bonus)
-            
-            # Оновлюємо час останнього отримання бонусу (тут потрібно додати це поле в модель)
-            # await update_user_daily_bonus(session, message.from_user.id, now)
-            
-            await message.answer(
-                l10n.format_value("daily-bonus-received", {
-                    "bonus": daily_bonus,
-                    "total": user.xp + daily_bonus
-                }),
-                reply_markup=get_main_menu_kb(l10n)
-            )
-        else:
-            hours_left = 24 - (now - user.last_daily_bonus).seconds // 3600
-            await message.answer(
-                l10n.format_value("daily-bonus-already-claimed", {
-                    "hours": hours_left
-                }),
-                reply_markup=get_main_menu_kb(l10n)
-            )
+    await give_daily_bonus(session, message.from_user.id, message, l10n)
 
 
 @router.callback_query(F.data == "daily")
-async def callback_daily_bonus(query: CallbackQuery, l10n: FluentLocalization):
+async def callback_daily_bonus(query: CallbackQuery, l10n: FluentLocalization, session: AsyncSession):
     """Щоденний бонус через callback"""
-    await cmd_daily_bonus(query.message, l10n)
+    # query.message надіслане ботом, тому користувача беремо з query
+    await give_daily_bonus(session, query.from_user.id, query.message, l10n)
     await query.answer()
 
 
 # Хендлери для налаштувань
 @router.callback_query(F.data.startswith("settings:"))
-async def callback_settings_menu(query: CallbackQuery, l10n: FluentLocalization):
+async def callback_settings_menu(query: CallbackQuery, l10n: FluentLocalization, session: AsyncSession):
     """Обробка різних розділів налаштувань"""
     setting_type = query.data.split(":")[1]
     
@@ -455,13 +484,13 @@ async def callback_settings_menu(query: CallbackQuery, l10n: FluentLocalization)
             reply_markup=get_settings_kb(l10n)
         )
     elif setting_type == "stats":
-        async for session in get_async_session():
-            user = await get_user(session, query.from_user.id)
-            if user:
-                days_registered = (datetime.now() - user.created_at).days
-                avg_xp_per_day = user.xp / max(days_registered, 1)
+        profile = await get_profile_bundle(session, query.from_user.id)
+        if profile:
+            user = profile.user
+            days_registered = (datetime.now() - user.created_at).days
+            avg_xp_per_day = user.xp / max(days_registered, 1)
                 
-                stats_text = f"""<b>📈 Детальна статистика</b>
+            stats_text = f"""<b>📈 Детальна статистика</b>
 
 <b>👤 Профіль:</b>
 • ID: {user.user_id}
@@ -475,18 +504,18 @@ async def callback_settings_menu(query: CallbackQuery, l10n: FluentLocalization)
 • Остання активність: {format_datetime(user.last_activity)}
 
 <b>👥 Соціальна активність:</b>
-• Запрошено друзів: {await get_referral_count(session, query.from_user.id)}
-• Позиція в рейтингу: {await get_user_rank(session, query.from_user.id)}
+• Запрошено друзів: {profile.referral_count}
+• Позиція в рейтингу: {profile.rank} з {profile.total_users}
 
 <b>🎮 Ігрова статистика:</b>
 • Загальні ігри: скоро...
 • Перемоги: скоро...
 • Поразки: скоро..."""
                 
-                await query.message.edit_text(
-                    stats_text,
-                    reply_markup=get_settings_kb(l10n)
-                )
+            await query.message.edit_text(
+                stats_text,
+                reply_markup=get_settings_kb(l10n)
+            )
     
     await query.answer()
 
@@ -624,18 +653,17 @@ async def callback_webapp_launch(query: CallbackQuery, l10n: FluentLocalization)
 
 
 @router.callback_query(F.data == "my_bonuses")
-async def callback_my_bonuses(query: CallbackQuery, l10n: FluentLocalization):
+async def callback_my_bonuses(query: CallbackQuery, l10n: FluentLocalization, session: AsyncSession):
     """Відображення бонусів користувача"""
-    async for session in get_async_session():
-        user = await get_user(session, query.from_user.id)
-        if not user:
-            await query.answer("Помилка: користувач не знайдений")
-            return
+    user = await get_user(session, query.from_user.id)
+    if not user:
+        await query.answer("Помилка: користувач не знайдений")
+        return
         
-        bonuses_text = l10n.format_value("my-bonuses-info", {
-            "bonuses": user.bonuses,
-            "xp": user.xp
-        })
+    bonuses_text = l10n.format_value("my-bonuses-info", {
+        "bonuses": user.bonuses,
+        "xp": user.xp
+    })
     
     await query.message.edit_text(
         bonuses_text,
@@ -645,8 +673,8 @@ async def callback_my_bonuses(query: CallbackQuery, l10n: FluentLocalization):
 
 
 @router.callback_query(F.data == "top")
-async def callback_top_menu(query: CallbackQuery, l10n: FluentLocalization):
+async def callback_top_menu(query: CallbackQuery, l10n: FluentLocalization, session: AsyncSession):
     """Відображення топу через callback"""
-    await show_top(query.from_user.id, query.message, l10n, position=1, is_edit=True)
+    await show_top(session, query.from_user.id, query.message, l10n, is_edit=True)
     await query.answer()
 
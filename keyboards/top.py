@@ -1,25 +1,39 @@
+from typing import Optional
+
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from fluent.runtime import FluentLocalization
 
 
-def get_top_kb(l10n: FluentLocalization) -> InlineKeyboardMarkup:
-    """Клавіатура для відображення топу гравців"""
+def get_top_kb(
+    l10n: FluentLocalization,
+    prev_cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None
+) -> InlineKeyboardMarkup:
+    """
+    Клавіатура для відображення топу гравців.
+    prev_cursor і next_cursor - курсори сусідніх сторінок, кнопка не показується, якщо курсора немає.
+    """
     kb = InlineKeyboardBuilder()
+    nav_buttons = 1
 
+    if prev_cursor is not None:
+        kb.button(
+            text=l10n.format_value("button-top-prev"),
+            callback_data=f"top:prev:{prev_cursor}"
+        )
+        nav_buttons += 1
     kb.button(
         text=l10n.format_value("button-top-1"),
         callback_data="top:1"
     )
-    kb.button(
-        text=l10n.format_value("button-top-2"),
-        callback_data="top:2"
-    )
-    kb.button(
-        text=l10n.format_value("button-top-3"),
-        callback_data="top:3"
-    )
+    if next_cursor is not None:
+        kb.button(
+            text=l10n.format_value("button-top-next"),
+            callback_data=f"top:next:{next_cursor}"
+        )
+        nav_buttons += 1
 
     kb.button(
         text=l10n.format_value("button-top-me"),
@@ -31,6 +45,6 @@ def get_top_kb(l10n: FluentLocalization) -> InlineKeyboardMarkup:
         callback_data="main_menu"
     )
 
-    kb.adjust(3, 1, 1)
+    kb.adjust(nav_buttons, 1, 1)
     
     return kb.as_markup()
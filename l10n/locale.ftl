@@ -77,8 +77,8 @@ button-settings = ⚙️ Налаштування
 button-bonuses = 🎁 Мої бонуси
 button-referral = 🔗 Реферальна система
 button-top-1 = 🥇
-button-top-2 = 🥈
-button-top-3 = 🥉
+button-top-prev = ◀️
+button-top-next = ▶️
 button-top-me = На якому я?
 
 # Реферальна система
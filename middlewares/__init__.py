@@ -1,7 +1,11 @@
+from .db_session import DbSessionMiddleware
 from .localization import L10nMiddleware
+from .send_limit import SendLimitMiddleware
 from .user_activity import UserActivityMiddleware
 
 __all__ = [
+    "DbSessionMiddleware",
     "L10nMiddleware",
+    "SendLimitMiddleware",
     "UserActivityMiddleware"
 ]
\ No newline at end of file
@@ -0,0 +1,46 @@
+from contextvars import ContextVar
+from typing import Callable, Dict, Any, Awaitable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+# Сесія оновлення, що зараз обробляється (для middleware запитів до Bot API)
+current_session: ContextVar[Optional[AsyncSession]] = ContextVar("current_session", default=None)
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """
+    Одна сесія БД на оновлення.
+    Сесія передається в хендлери як `session`; з'єднання береться з пулу лише при першому запиті.
+    Наприкінці обробки транзакція один раз комітиться, або відкочується при помилці.
+    Надсилання може чекати на ліміт секундами, тому хендлер, що пише в БД,
+    має завершити записи і викликати `session.commit()` до першого надсилання;
+    тоді з'єднання повертається в пул, а фінальний коміт тут пропускається.
+    """
+
+    def __init__(self, session_pool: sessionmaker):
+        self.session_pool = session_pool
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        async with self.session_pool() as session:
+            session: AsyncSession
+            data["session"] = session
+            token = current_session.set(session)
+            try:
+                result = await handler(event, data)
+            except Exception:
+                await session.rollback()
+                raise
+            finally:
+                current_session.reset(token)
+
+            if session.in_transaction():
+                await session.commit()
+            return result
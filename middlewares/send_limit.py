@@ -0,0 +1,66 @@
+import asyncio
+
+import structlog
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from middlewares.db_session import current_session
+from utils.send_limiter import SendLimiter, SendPriority, get_send_priority
+
+logger = structlog.get_logger()
+
+
+class SendLimitMiddleware(BaseRequestMiddleware):
+    """
+    Middleware сесії бота: надсилання і редагування повідомлень проходять через загальне відро
+    і відро свого чату, відповіді на callback і видалення - лише через загальне.
+    Решта методів (getChatAdministrators, getUpdates тощо) не обмежуються.
+    Після 429 запит стає в чергу знову (до max_retries разів).
+    Транзакція хендлера не комітиться за його спиною: хендлер має закомітити свої записи
+    до надсилання, інакше на час очікування ліміту він тримає з'єднання з пулу.
+    """
+
+    def __init__(self, limiter: SendLimiter, max_retries: int = 3):
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    async def _acquire(self, chat_id, priority: SendPriority) -> None:
+        if self.limiter.try_acquire(chat_id):
+            return
+        session = current_session.get()
+        if session is not None and session.in_transaction():
+            # Чекати на ліміт можна секундами - хендлер надсилає до коміту своїх записів
+            logger.warning(f"Send to chat {chat_id} waits for the rate limit inside an open transaction")
+        await self.limiter.acquire(chat_id, priority)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        priority = get_send_priority(method)
+        if priority is None:
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, "chat_id", None) if priority is SendPriority.MESSAGE else None
+        attempt = 0
+        while True:
+            await self._acquire(chat_id, priority)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                logger.warning(f"Flood control on {type(method).__name__} in chat {chat_id}, retry in {e.retry_after}s")
+                if priority is SendPriority.CLEANUP:
+                    # Ліміт видалення не стосується надсилання - чекає лише цей запит
+                    await asyncio.sleep(e.retry_after)
+                    continue
+                self.limiter.retry_after(chat_id, e.retry_after)
+                if not self.limiter.running:
+                    await asyncio.sleep(e.retry_after)
@@ -2,18 +2,24 @@ from typing import Callable, Dict, Any, Awaitable
 
 import structlog
 from aiogram import BaseMiddleware
+from aiogram.enums import ChatType
+from aiogram.filters import CommandStart
 from aiogram.types import Message, CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.connection import get_async_session
-from db.queries import get_user, update_user_activity, create_user
+from db.connection import on_commit
+from db.queries import upsert_user
+from utils.activity_tracker import activity_tracker
+
+# Той самий фільтр, що й у хендлера /start: /startgame чи /start@інший_бот під нього не підпадають
+_start_command = CommandStart()
 
 
 class UserActivityMiddleware(BaseMiddleware):
     """
     Middleware для відстеження активності користувачів.
-    Оновлює час останньої активності користувача при кожній взаємодії з ботом.
-    Також створює запис про користувача, якщо його ще немає в базі даних.
+    При першій взаємодії користувача створює запис про нього, якщо його ще немає в базі даних.
+    Далі час останньої активності записується з дебаунсом через ActivityTracker.
     """
     
     async def __call__(
@@ -31,31 +37,40 @@ class UserActivityMiddleware(BaseMiddleware):
             # Якщо тип події не підтримується, просто пропускаємо
             return await handler(event, data)
         
+        # /start в особистому чаті сам створює користувача з урахуванням реферального посилання
+        if (
+            isinstance(event, Message)
+            and event.chat.type == ChatType.PRIVATE
+            and await _start_command(event, data["bot"])
+        ):
+            return await handler(event, data)
+
+        # Користувач вже перевірений в цьому вікні: лише ставимо оновлення в чергу
+        if activity_tracker.is_known(user.id):
+            activity_tracker.touch(user.id)
+            return await handler(event, data)
+
         # Отримуємо логер
         logger = structlog.get_logger()
         
-        # Оновлюємо активність у БД
-        async for session in get_async_session():
-            try:
-                # Перевіряємо, чи існує користувач
-                existing_user = await get_user(session, user.id)
-                
-                if existing_user:
-                    # Оновлюємо час активності користувача
-                    await update_user_activity(session, user.id)
-                else:
-                    # Створюємо нового користувача, якщо його ще немає
-                    await create_user(
-                        session,
-                        user_id=user.id,
-                        username=user.username,
-                        first_name=user.first_name,
-                        last_name=user.last_name,
-                        language_code=user.language_code
-                    )
-                    logger.info(f"Created new user from middleware: {user.id}")
-            except Exception as e:
-                logger.error(f"Error updating user activity: {e}")
+        # Оновлюємо активність у БД в сесії поточного оновлення
+        session: AsyncSession = data["session"]
+        try:
+            # Створюємо користувача або оновлюємо його дані і час активності одним запитом
+            _, created = await upsert_user(
+                session,
+                user_id=user.id,
+                username=user.username,
+                first_name=user.first_name,
+                last_name=user.last_name,
+                language_code=user.language_code
+            )
+            if created:
+                logger.info(f"Created new user from middleware: {user.id}")
+            on_commit(session, lambda: activity_tracker.mark_written(user.id))
+        except Exception as e:
+            logger.error(f"Error updating user activity: {e}")
+            await session.rollback()
         
         # Продовжуємо обробку події
         return await handler(event, data)
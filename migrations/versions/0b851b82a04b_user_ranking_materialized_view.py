@@ -0,0 +1,39 @@
+"""user ranking materialized view
+
+Revision ID: 0b851b82a04b
+Revises: 4af4fdd6a938
+Create Date: 2026-10-17 20:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b851b82a04b'
+down_revision: Union[str, None] = '4af4fdd6a938'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE MATERIALIZED VIEW user_ranking AS
+        SELECT
+            user_id,
+            xp,
+            first_name,
+            dense_rank() OVER (ORDER BY xp DESC) AS rank,
+            row_number() OVER (ORDER BY xp DESC, user_id) AS position
+        FROM users
+    """)
+    # Унікальний індекс потрібен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.create_index('ix_user_ranking_user_id', 'user_ranking', ['user_id'], unique=True)
+    op.create_index('ix_user_ranking_position', 'user_ranking', ['position'], unique=True)
+    op.create_index('ix_user_ranking_xp_user_id', 'user_ranking', ['xp', 'user_id'])
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW user_ranking")
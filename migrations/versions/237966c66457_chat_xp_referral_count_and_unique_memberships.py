@@ -0,0 +1,96 @@
+"""chat xp, referral count and unique memberships
+
+Ця ревізія має бути застосована до розгортання коду з upsert членств
+ON CONFLICT (user_id, chat_id): без унікального обмеження такий INSERT падає з помилкою.
+
+Revision ID: 237966c66457
+Revises: 75b67e860070
+Create Date: 2026-10-17 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '237966c66457'
+down_revision: Union[str, None] = '75b67e860070'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Міграція ідемпотентна: бази, створені через create_all з моделями, де ці зміни вже були,
+    # позначаються початковою ревізією і проходять її без помилок
+
+    # Дублікати членств, що могли з'явитися до унікального обмеження: залишаємо найновіший запис
+    op.execute("""
+        DELETE FROM chat_memberships a
+        USING chat_memberships b
+        WHERE a.user_id = b.user_id AND a.chat_id = b.chat_id AND a.id < b.id
+    """)
+
+    # Константний DEFAULT не переписує таблицю (PostgreSQL 11+)
+    op.execute("ALTER TABLE chat_memberships ADD COLUMN IF NOT EXISTS xp INTEGER NOT NULL DEFAULT 0")
+    op.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS referral_count INTEGER NOT NULL DEFAULT 0")
+
+    op.execute("""
+        UPDATE users
+        SET referral_count = referrals.count
+        FROM (
+            SELECT invited_by, COUNT(*) AS count
+            FROM users
+            WHERE invited_by IS NOT NULL
+            GROUP BY invited_by
+        ) AS referrals
+        WHERE users.user_id = referrals.invited_by
+    """)
+
+    with op.get_context().autocommit_block():
+        # Невдала побудова CONCURRENTLY (напр. через дублікат, вставлений під час побудови) залишає
+        # індекс INVALID; IF NOT EXISTS його пропустив би, і UNIQUE USING INDEX нижче впав би
+        for index_name in ('uq_chat_memberships_user_id_chat_id', 'ix_chat_memberships_chat_id_xp'):
+            op.execute(f"""
+                DO $$
+                BEGIN
+                    IF EXISTS (
+                        SELECT 1 FROM pg_index
+                        WHERE indexrelid = to_regclass('{index_name}') AND NOT indisvalid
+                    ) THEN
+                        EXECUTE 'DROP INDEX {index_name}';
+                    END IF;
+                END $$
+            """)
+        op.create_index(
+            'uq_chat_memberships_user_id_chat_id', 'chat_memberships', ['user_id', 'chat_id'],
+            unique=True, postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_chat_memberships_chat_id_xp', 'chat_memberships',
+            ['chat_id', sa.text('xp DESC'), 'user_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+    # Обмеження на основі вже побудованого індексу - лише зміна каталогу
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'uq_chat_memberships_user_id_chat_id'
+            ) THEN
+                ALTER TABLE chat_memberships
+                ADD CONSTRAINT uq_chat_memberships_user_id_chat_id
+                UNIQUE USING INDEX uq_chat_memberships_user_id_chat_id;
+            END IF;
+        END $$
+    """)
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_chat_memberships_user_id_chat_id', 'chat_memberships', type_='unique')
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_chat_memberships_chat_id_xp', table_name='chat_memberships', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('users', 'referral_count')
+    op.drop_column('chat_memberships', 'xp')
@@ -0,0 +1,70 @@
+"""xp events ledger
+
+Revision ID: 4af4fdd6a938
+Revises: 237966c66457
+Create Date: 2026-10-17 18:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4af4fdd6a938'
+down_revision: Union[str, None] = '237966c66457'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'xp_events',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        # Час UTC без часового поясу, як у подіях, які пише бот
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text("timezone('utc', now())"), nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('chat_id', sa.BigInteger(), nullable=True),
+        sa.Column('source', sa.String(length=32), nullable=False),
+        sa.Column('delta', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)'
+    )
+    # Місячні секції бот створює сам (db.queries.xp_events.ensure_xp_event_partitions),
+    # секція за замовчуванням приймає все, для чого місячної секції ще немає
+    op.execute("CREATE TABLE xp_events_default PARTITION OF xp_events DEFAULT")
+    # Секція поточного місяця до запису початкових балансів, щоб вони не потрапили в секцію за замовчуванням
+    op.execute("""
+        DO $$
+        DECLARE month date := date_trunc('month', timezone('utc', now()));
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE xp_events_%s PARTITION OF xp_events FOR VALUES FROM (%L) TO (%L)',
+                to_char(month, 'YYYY_MM'), month, month + interval '1 month'
+            );
+        END
+        $$
+    """)
+    op.create_index('ix_xp_events_user_id_created_at', 'xp_events', ['user_id', 'created_at'])
+
+    op.create_table(
+        'xp_ledger_state',
+        sa.Column('id', sa.SmallInteger(), nullable=False),
+        sa.Column('running', sa.Boolean(), nullable=False),
+        sa.Column('incomplete', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # Початкові баланси, щоб сума журналу збігалась з users.xp
+    op.execute("""
+        INSERT INTO xp_events (user_id, source, delta)
+        SELECT user_id, 'opening_balance', xp
+        FROM users
+        WHERE xp <> 0
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('xp_ledger_state')
+    op.drop_table('xp_events')
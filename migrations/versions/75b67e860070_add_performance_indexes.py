@@ -0,0 +1,49 @@
+"""add performance indexes
+
+Revision ID: 75b67e860070
+Revises: fdec5e841fba
+Create Date: 2026-10-17 12:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '75b67e860070'
+down_revision: Union[str, None] = 'fdec5e841fba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY не можна виконувати в транзакції,
+    # зате він не блокує запис у таблицю на живій базі
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_xp_desc_user_id', 'users',
+            [sa.text('xp DESC'), 'user_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_users_last_activity', 'users', ['last_activity'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_users_invited_by', 'users', ['invited_by'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_chat_memberships_chat_id_user_id', 'chat_memberships', ['chat_id', 'user_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_chat_memberships_chat_id_user_id', table_name='chat_memberships', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_invited_by', table_name='users', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_last_activity', table_name='users', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_xp_desc_user_id', table_name='users', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,27 @@
+"""users last daily bonus
+
+Revision ID: 84a8807ece5f
+Revises: 0b851b82a04b
+Create Date: 2026-10-17 21:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '84a8807ece5f'
+down_revision: Union[str, None] = '0b851b82a04b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Стовпець без DEFAULT додається без перезапису таблиці
+    op.add_column('users', sa.Column('last_daily_bonus', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'last_daily_bonus')
@@ -0,0 +1,36 @@
+"""scheduled jobs
+
+Revision ID: c3e9a7f21d54
+Revises: 84a8807ece5f
+Create Date: 2026-10-17 22:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e9a7f21d54'
+down_revision: Union[str, None] = '84a8807ece5f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scheduled_jobs',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('key', sa.String(length=128), nullable=True),
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('run_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scheduled_jobs')
@@ -0,0 +1,57 @@
+"""initial schema
+
+Revision ID: fdec5e841fba
+Revises: 
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fdec5e841fba'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Схема, яку раніше створював Base.metadata.create_all.
+    # Для таких баз: alembic stamp fdec5e841fba && alembic upgrade head
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('username', sa.String(length=32), nullable=True),
+        sa.Column('first_name', sa.String(length=64), nullable=False),
+        sa.Column('last_name', sa.String(length=64), nullable=True),
+        sa.Column('language_code', sa.String(length=2), nullable=True),
+        sa.Column('xp', sa.Integer(), nullable=False),
+        sa.Column('bonuses', sa.Integer(), nullable=False),
+        sa.Column('invited_by', sa.BigInteger(), nullable=True),
+        sa.Column('last_activity', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['invited_by'], ['users.user_id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id')
+    )
+    op.create_table(
+        'chat_memberships',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('chat_id', sa.BigInteger(), nullable=False),
+        sa.Column('is_admin', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('chat_memberships')
+    op.drop_table('users')
@@ -0,0 +1,79 @@
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram.types import Chat, Message, User
+
+from middlewares.user_activity import UserActivityMiddleware
+from utils.activity_tracker import ActivityTracker
+
+
+class TestActivityTracker(unittest.TestCase):
+    def test_touch_debounces_within_window(self):
+        tracker = ActivityTracker(window=60, flush_interval=10)
+        with patch("time.monotonic", return_value=1000.0):
+            tracker.mark_written(1)
+        with patch("time.monotonic", return_value=1030.0):
+            tracker.touch(1)
+        self.assertEqual(tracker._pending, set())
+
+        with patch("time.monotonic", return_value=1061.0):
+            tracker.touch(1)
+        self.assertEqual(tracker._pending, {1})
+
+    def test_stale_users_are_forgotten(self):
+        tracker = ActivityTracker(window=60, flush_interval=10)
+        with patch("time.monotonic", return_value=1000.0):
+            tracker.mark_written(1)
+            tracker.mark_written(2)
+        with patch("time.monotonic", return_value=1050.0):
+            tracker.mark_written(2)
+        with patch("time.monotonic", return_value=1070.0):
+            tracker._forget_stale()
+
+        self.assertFalse(tracker.is_known(1))
+        self.assertTrue(tracker.is_known(2))
+
+
+class TestUserActivityMiddleware(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.upsert = patch("middlewares.user_activity.upsert_user", AsyncMock(return_value=(MagicMock(), False))).start()
+        patch("middlewares.user_activity.on_commit").start()
+        self.addCleanup(patch.stopall)
+        self.bot = MagicMock()
+        self.bot.me = AsyncMock(return_value=User(id=42, is_bot=True, first_name="bot", username="kpibet_bot"))
+
+    async def creates_user(self, text, chat_type="private"):
+        message = Message(
+            message_id=1,
+            date=datetime(2026, 10, 17),
+            chat=Chat(id=1 if chat_type == "private" else -100, type=chat_type),
+            from_user=User(id=1, is_bot=False, first_name="user"),
+            text=text
+        )
+        handler = AsyncMock()
+        with patch("middlewares.user_activity.activity_tracker", ActivityTracker(window=60, flush_interval=10)):
+            await UserActivityMiddleware()(handler, message, {"bot": self.bot, "session": MagicMock()})
+        handler.assert_awaited_once()
+        return self.upsert.await_count > 0
+
+    async def test_start_is_left_to_its_handler(self):
+        self.assertFalse(await self.creates_user("/start ref_5"))
+        self.assertFalse(await self.creates_user("/start@kpibet_bot"))
+
+    async def test_other_commands_create_user(self):
+        self.assertTrue(await self.creates_user("/startgame"))
+        self.upsert.reset_mock()
+        self.assertTrue(await self.creates_user("/start@other_bot"))
+
+    async def test_start_in_group_creates_user(self):
+        self.assertTrue(await self.creates_user("/start", chat_type="group"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram.types import ChatMemberAdministrator, ChatMemberMember, ChatMemberOwner, User
+
+from utils.admin_cache import ChatAdminCache
+
+
+def make_user(user_id: int) -> User:
+    return User(id=user_id, is_bot=False, first_name=f"user{user_id}")
+
+
+def make_admin(user_id: int) -> ChatMemberAdministrator:
+    # Набір обов'язкових прав змінюється між версіями Bot API, тому без валідації
+    return ChatMemberAdministrator.model_construct(user=make_user(user_id), can_restrict_members=True)
+
+
+class TestChatAdminCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.bot = MagicMock()
+        self.bot.get_chat_administrators = AsyncMock(return_value=[
+            ChatMemberOwner(user=make_user(1), is_anonymous=False),
+            make_admin(2)
+        ])
+        self.cache = ChatAdminCache(ttl=60)
+
+    async def test_admin_checks_are_cached(self):
+        results = await asyncio.gather(*(self.cache.is_admin(self.bot, -100, user_id) for user_id in (1, 2, 3)))
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(await self.cache.is_admin(self.bot, -100, 2), True)
+        self.assertEqual(self.bot.get_chat_administrators.await_count, 1)
+
+    async def test_chat_member_updates_change_admins(self):
+        await self.cache.get_admins(self.bot, -100)
+
+        self.cache.update_member(-100, make_admin(3))
+        self.cache.update_member(-100, ChatMemberMember(user=make_user(2)))
+
+        self.assertTrue(await self.cache.is_admin(self.bot, -100, 3))
+        self.assertFalse(await self.cache.is_admin(self.bot, -100, 2))
+        self.assertEqual(self.bot.get_chat_administrators.await_count, 1)
+
+    async def test_expired_chat_is_reloaded(self):
+        with patch("time.monotonic", return_value=1000.0):
+            await self.cache.get_admins(self.bot, -100)
+        with patch("time.monotonic", return_value=1061.0):
+            await self.cache.get_admins(self.bot, -100)
+        self.assertEqual(self.bot.get_chat_administrators.await_count, 2)
+
+    async def test_failures_are_cached_briefly(self):
+        self.bot.get_chat_administrators.side_effect = RuntimeError("bot was kicked")
+        with patch("time.monotonic", return_value=1000.0):
+            for _ in range(3):
+                with self.assertRaises(RuntimeError):
+                    await self.cache.is_admin(self.bot, -100, 1)
+        self.assertEqual(self.bot.get_chat_administrators.await_count, 1)
+
+        self.bot.get_chat_administrators.side_effect = None
+        with patch("time.monotonic", return_value=1000.0 + ChatAdminCache.FAILURE_TTL + 1):
+            self.assertTrue(await self.cache.is_admin(self.bot, -100, 1))
+        self.assertEqual(self.bot.get_chat_administrators.await_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
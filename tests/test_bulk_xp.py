@@ -0,0 +1,57 @@
+import unittest
+from unittest.mock import MagicMock
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handlers.admin_actions import _parse_bulk_row, _read_csv_rows
+
+
+class TestParseBulkRow(unittest.TestCase):
+    def test_valid_rows(self):
+        self.assertEqual(_parse_bulk_row(["1", "50"]), (1, 50, 0))
+        self.assertEqual(_parse_bulk_row(["1", "50", "3"]), (1, 50, 3))
+        self.assertEqual(_parse_bulk_row([" 1", " 50", " "]), (1, 50, 0))
+
+    def test_negative_rows(self):
+        self.assertEqual(_parse_bulk_row(["1", "-50"]), (1, -50, 0))
+        self.assertEqual(_parse_bulk_row(["1", "0", "-3"]), (1, 0, -3))
+
+    def test_header_row(self):
+        self.assertIsNone(_parse_bulk_row(["user_id", "xp_delta", "bonus_delta"]))
+
+    def test_malformed_rows(self):
+        self.assertIsNone(_parse_bulk_row(["1"]))
+        self.assertIsNone(_parse_bulk_row(["1", "2", "3", "4"]))
+        self.assertIsNone(_parse_bulk_row(["1", "abc"]))
+        self.assertIsNone(_parse_bulk_row(["1", "2.5"]))
+        self.assertIsNone(_parse_bulk_row(["1", "0", "0"]))
+
+
+class TestReadCsvRows(unittest.IsolatedAsyncioTestCase):
+    async def read_rows(self, chunks):
+        async def stream_content(url, **kwargs):
+            for chunk in chunks:
+                yield chunk
+
+        bot = MagicMock()
+        bot.session.stream_content = stream_content
+        return [row async for row in _read_csv_rows(bot, "documents/file.csv")]
+
+    async def test_rows_split_across_chunks(self):
+        data = "\ufeffuser_id,xp_delta\r\n1,10\r\n2,-5,ї\r\n3,7".encode("utf-8")
+        # Розрізаємо посеред рядків і посеред двобайтового символу
+        chunks = [data[i:i + 5] for i in range(0, len(data), 5)]
+
+        rows = await self.read_rows(chunks)
+        self.assertEqual(rows, [["user_id", "xp_delta"], ["1", "10"], ["2", "-5", "ї"], ["3", "7"]])
+
+    async def test_invalid_utf8(self):
+        with self.assertRaises(UnicodeDecodeError):
+            await self.read_rows([b"1,10\n", b"\xff\xfe,1\n"])
+
+
+if __name__ == "__main__":
+    unittest.main()
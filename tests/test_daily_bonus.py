@@ -0,0 +1,63 @@
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.dialects import postgresql
+
+from db.queries.users import claim_daily_bonus
+from handlers.personal_actions import give_daily_bonus, DAILY_BONUS_XP
+
+
+class TestClaimDailyBonus(unittest.IsolatedAsyncioTestCase):
+    async def test_update_is_guarded_by_day_start(self):
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=None)))
+        now = datetime(2026, 10, 17, 15, 30)
+        day_start = datetime(2026, 10, 17)
+
+        result = await claim_daily_bonus(session, 1, DAILY_BONUS_XP, now=now, day_start=day_start)
+        self.assertIsNone(result)
+
+        stmt = session.execute.await_args.args[0]
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        sql = " ".join(str(compiled).split())
+        self.assertIn("WHERE users.user_id = %(user_id_1)s", sql)
+        self.assertIn("(users.last_daily_bonus IS NULL OR users.last_daily_bonus < %(last_daily_bonus_1)s", sql)
+        self.assertIn("RETURNING users.xp", sql)
+        self.assertEqual(compiled.params["last_daily_bonus_1"], day_start)
+        self.assertEqual(compiled.params["last_daily_bonus"], now)
+
+
+class TestGiveDailyBonus(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.message = MagicMock()
+        self.message.answer = AsyncMock()
+        self.l10n = MagicMock()
+        self.l10n.format_value.side_effect = lambda key, args=None: key
+        patch("handlers.personal_actions.get_main_menu_kb", MagicMock()).start()
+        self.addCleanup(patch.stopall)
+
+    async def give(self, new_xp, user):
+        patch("handlers.personal_actions.claim_daily_bonus", AsyncMock(return_value=new_xp)).start()
+        patch("handlers.personal_actions.get_user", AsyncMock(return_value=user)).start()
+        await give_daily_bonus(MagicMock(), 1, self.message, self.l10n)
+        return self.message.answer.await_args.args[0]
+
+    async def test_claimed(self):
+        self.assertEqual(await self.give(125, MagicMock()), "daily-bonus-received")
+        self.l10n.format_value.assert_any_call("daily-bonus-received", {"bonus": DAILY_BONUS_XP, "total": 125})
+
+    async def test_already_claimed(self):
+        self.assertEqual(await self.give(None, MagicMock()), "daily-bonus-already-claimed")
+
+    async def test_unknown_user(self):
+        self.assertEqual(await self.give(None, None), "daily-bonus-register-first")
+
+
+if __name__ == "__main__":
+    unittest.main()
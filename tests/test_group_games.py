@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+
+from db.models import User
+from db.queries.users import ProfileBundle
+from handlers.group_events import cmd_profile_in_group, game_job_key, send_game_result, GAME_CLEANUP_DELAY
+
+
+class TestGroupGameJobs(unittest.IsolatedAsyncioTestCase):
+    def test_each_prompt_has_own_job(self):
+        self.assertNotEqual(game_job_key(-100, 1), game_job_key(-100, 2))
+        self.assertNotEqual(game_job_key(-100, 1), game_job_key(-200, 1))
+
+    async def run_result_job(self, bot):
+        payload = {"chat_id": -100, "reply_to": 11, "cleanup": [10, 11, 12], "text": "result"}
+        with patch("handlers.group_events.scheduler.schedule", AsyncMock()) as schedule:
+            await send_game_result(bot, MagicMock(), payload)
+        return schedule
+
+    async def test_result_is_cleaned_up_with_game(self):
+        bot = MagicMock()
+        bot.send_message = AsyncMock(return_value=MagicMock(message_id=13))
+
+        schedule = await self.run_result_job(bot)
+        schedule.assert_awaited_once()
+        self.assertEqual(schedule.await_args.args[1:], (
+            "delete_messages", GAME_CLEANUP_DELAY, {"chat_id": -100, "message_ids": [10, 11, 12, 13]}
+        ))
+
+    async def test_cleanup_scheduled_when_send_fails(self):
+        bot = MagicMock()
+        bot.send_message = AsyncMock(side_effect=Exception("chat not found"))
+
+        schedule = await self.run_result_job(bot)
+        self.assertEqual(schedule.await_args.args[3]["message_ids"], [10, 11, 12])
+
+
+class TestGroupProfile(unittest.IsolatedAsyncioTestCase):
+    async def test_commits_before_reply(self):
+        calls = []
+        session = MagicMock()
+        session.commit = AsyncMock(side_effect=lambda: calls.append("commit"))
+        message = MagicMock()
+        message.from_user.id = 1
+        message.reply = AsyncMock(side_effect=lambda *args, **kwargs: calls.append("reply"))
+        now = datetime(2026, 10, 17)
+        user = User(user_id=1, xp=10, bonuses=0, first_name="user", last_activity=now, created_at=now)
+        profile = ProfileBundle(user=user, rank=1, referral_count=0, total_users=1)
+
+        with patch("handlers.group_events.get_profile_bundle", AsyncMock(return_value=profile)), \
+                patch("handlers.group_events.profile_photo_cache.get_file_id", AsyncMock(return_value=None)):
+            await cmd_profile_in_group(message, MagicMock(), MagicMock(), session)
+        self.assertEqual(calls, ["commit", "reply"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import random
+import unittest
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.leaderboard import IndexableSkipList, Leaderboard
+
+
+class TestIndexableSkipList(unittest.TestCase):
+    def test_matches_sorted_list(self):
+        rng = random.Random(42)
+        skip_list = IndexableSkipList()
+        expected = []
+
+        for _ in range(2000):
+            key = rng.randint(0, 500)
+            if key in expected:
+                self.assertTrue(skip_list.remove(key))
+                expected.remove(key)
+            else:
+                skip_list.insert(key)
+                expected.append(key)
+            expected.sort()
+
+        self.assertEqual(len(skip_list), len(expected))
+        self.assertEqual(list(skip_list), expected)
+        for probe in (-1, 0, 123, 250, 501):
+            self.assertEqual(skip_list.count_less(probe), sum(1 for key in expected if key < probe))
+            self.assertEqual(skip_list.count_less_equal(probe), sum(1 for key in expected if key <= probe))
+        for index in (0, len(expected) // 2, len(expected) - 1):
+            self.assertEqual(skip_list[index], expected[index])
+        self.assertEqual(skip_list.slice(10, 5), expected[10:15])
+        self.assertFalse(skip_list.remove(1000))
+
+    def test_from_sorted(self):
+        keys = list(range(0, 3000, 3))
+        skip_list = IndexableSkipList.from_sorted(keys)
+
+        self.assertEqual(len(skip_list), len(keys))
+        self.assertEqual(skip_list[500], keys[500])
+        self.assertEqual(skip_list.count_less(301), 101)
+
+        skip_list.insert(301)
+        skip_list.remove(0)
+        self.assertEqual(skip_list.slice(99, 3), [300, 301, 303])
+
+
+class TestLeaderboard(unittest.TestCase):
+    def setUp(self):
+        self.leaderboard = Leaderboard()
+        self.leaderboard.rebuild([(1, 100, "A"), (2, 50, "B"), (3, 100, "C"), (4, 10, "D")])
+
+    def test_rank_shares_ties(self):
+        self.assertEqual(self.leaderboard.rank(1), 1)
+        self.assertEqual(self.leaderboard.rank(3), 1)
+        self.assertEqual(self.leaderboard.rank(2), 3)
+        self.assertEqual(self.leaderboard.rank(4), 4)
+        self.assertIsNone(self.leaderboard.rank(99))
+
+    def test_add_xp_reorders(self):
+        self.leaderboard.add_xp(4, 140)
+        self.leaderboard.add_user(5, 60, "E")
+
+        self.assertEqual([entry.user_id for entry in self.leaderboard.top(3)], [4, 1, 3])
+        self.assertEqual(self.leaderboard.get(4), (4, 150, "D"))
+        self.assertEqual(self.leaderboard.rank(5), 4)
+        self.assertEqual(len(self.leaderboard), 5)
+
+    def test_out_of_order_commits(self):
+        # Колбеки двох комітів (+10, потім -30) виконуються у зворотному порядку
+        self.leaderboard.add_xp(2, -30)
+        self.leaderboard.add_xp(2, 10)
+        self.assertEqual(self.leaderboard.get(2).xp, 30)
+
+        # Існуючий користувач, збережений повторно, не повертає старе XP
+        self.leaderboard.add_user(2, 50, "B2")
+        self.assertEqual(self.leaderboard.get(2), (2, 30, "B2"))
+
+    def test_xp_committed_before_user_callback(self):
+        self.leaderboard.add_xp(5, 10)
+        self.assertIsNone(self.leaderboard.get(5))
+
+        self.leaderboard.add_user(5, 0, "E")
+        self.assertEqual(self.leaderboard.get(5).xp, 10)
+        self.assertEqual(self.leaderboard.rank(5), 4)
+
+    def test_position_and_page(self):
+        self.assertEqual(self.leaderboard.position(3), 1)
+        self.assertEqual([entry.user_id for entry in self.leaderboard.page(1, 2)], [3, 2])
+
+    def test_keyset_pages(self):
+        # Порядок: 1 (100), 3 (100), 2 (50), 4 (10)
+        self.assertEqual([entry.user_id for entry in self.leaderboard.page_after(100, 1, 2)], [3, 2])
+        self.assertEqual([entry.user_id for entry in self.leaderboard.page_before(10, 4, 2)], [3, 2])
+        self.assertEqual([entry.user_id for entry in self.leaderboard.page_before(100, 3, 5)], [1])
+
+        # Курсор лишається дійсним, навіть якщо його користувач змінив XP
+        self.leaderboard.add_xp(3, -95)
+        self.assertEqual([entry.user_id for entry in self.leaderboard.page_after(100, 3, 5)], [2, 4, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.message_cleanup import MessageCleanup
+
+
+class TestMessageCleanup(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.bot = MagicMock()
+        self.bot.delete_messages = AsyncMock(return_value=True)
+        self.cleanup = MessageCleanup(flush_interval=0.05)
+        await self.cleanup.start(self.bot)
+
+    async def asyncTearDown(self):
+        await self.cleanup.stop()
+
+    async def test_games_in_same_chat_share_one_request(self):
+        await asyncio.wait_for(asyncio.gather(
+            self.cleanup.delete(-100, [1, 2, 3, 4]),
+            self.cleanup.delete(-100, [5, 6, 7, 8]),
+            self.cleanup.delete(-200, [1])
+        ), timeout=1)
+
+        calls = {call.args[0]: call.args[1] for call in self.bot.delete_messages.await_args_list}
+        self.assertEqual(calls, {-100: [1, 2, 3, 4, 5, 6, 7, 8], -200: [1]})
+
+    async def test_large_batches_are_split(self):
+        await asyncio.wait_for(self.cleanup.delete(-100, range(250)), timeout=1)
+
+        sizes = [len(call.args[1]) for call in self.bot.delete_messages.await_args_list]
+        self.assertEqual(sizes, [100, 100, 50])
+
+    async def test_errors_do_not_block_waiters(self):
+        self.bot.delete_messages.side_effect = Exception("not enough rights")
+        await asyncio.wait_for(self.cleanup.delete(-100, [1]), timeout=1)
+        self.assertEqual(self.cleanup.pending, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from unittest.mock import patch
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.periodic import PeriodicFlusher
+
+
+class FailingFlusher(PeriodicFlusher):
+    def __init__(self):
+        super().__init__(flush_interval=60)
+        self.flushes = 0
+
+    async def flush(self) -> None:
+        self.flushes += 1
+        raise RuntimeError("db is down")
+
+
+class TestPeriodicFlusher(unittest.IsolatedAsyncioTestCase):
+    def test_flush_is_abstract(self):
+        with self.assertRaises(TypeError):
+            PeriodicFlusher(flush_interval=60)
+
+    async def test_final_flush_error_is_logged(self):
+        flusher = FailingFlusher()
+        await flusher.start()
+        with patch("utils.periodic.logger") as log:
+            await flusher.stop()
+
+        self.assertEqual(flusher.flushes, 1)
+        log.error.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.photo_cache import ProfilePhotoCache
+
+
+def make_photos(*file_ids):
+    return SimpleNamespace(
+        total_count=len(file_ids),
+        photos=[[SimpleNamespace(file_id=f"{file_id}_small"), SimpleNamespace(file_id=file_id)] for file_id in file_ids]
+    )
+
+
+class TestProfilePhotoCache(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_lookups_share_one_request(self):
+        bot = MagicMock()
+
+        async def get_user_profile_photos(user_id, limit):
+            await asyncio.sleep(0.01)
+            return make_photos("photo")
+
+        bot.get_user_profile_photos = AsyncMock(side_effect=get_user_profile_photos)
+        cache = ProfilePhotoCache(ttl=60, max_size=10)
+
+        results = await asyncio.gather(*(cache.get_file_id(bot, 1) for _ in range(5)))
+        self.assertEqual(results, ["photo"] * 5)
+        self.assertEqual(bot.get_user_profile_photos.await_count, 1)
+
+        self.assertEqual(await cache.get_file_id(bot, 1), "photo")
+        self.assertEqual(bot.get_user_profile_photos.await_count, 1)
+
+    async def test_missing_photo_is_cached(self):
+        bot = MagicMock()
+        bot.get_user_profile_photos = AsyncMock(return_value=make_photos())
+        cache = ProfilePhotoCache(ttl=60, max_size=10)
+
+        self.assertIsNone(await cache.get_file_id(bot, 1))
+        self.assertIsNone(await cache.get_file_id(bot, 1))
+        self.assertEqual(cache.requests, 1)
+
+    async def test_errors_are_not_cached(self):
+        bot = MagicMock()
+        bot.get_user_profile_photos = AsyncMock(side_effect=[Exception("timeout"), make_photos("photo")])
+        cache = ProfilePhotoCache(ttl=60, max_size=10)
+
+        with self.assertRaises(Exception):
+            await cache.get_file_id(bot, 1)
+        self.assertEqual(await cache.get_file_id(bot, 1), "photo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from unittest.mock import MagicMock
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+from db.pool import InstrumentedQueuePool, get_pool_stats
+
+
+class TestInstrumentedQueuePool(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.pool = InstrumentedQueuePool(lambda: MagicMock(), pool_size=1, max_overflow=0, timeout=0.05)
+        self.engine = MagicMock(pool=self.pool)
+
+    async def test_checkouts_are_counted(self):
+        connection = await greenlet_spawn(self.pool.connect)
+        stats = get_pool_stats(self.engine)
+        self.assertEqual((stats.size, stats.checked_out, stats.checked_in), (1, 1, 0))
+        self.assertEqual((stats.checkouts, stats.timeouts), (1, 0))
+
+        await greenlet_spawn(connection.close)
+        connection = await greenlet_spawn(self.pool.connect)
+        await greenlet_spawn(connection.close)
+        stats = get_pool_stats(self.engine)
+        self.assertEqual((stats.checked_out, stats.checked_in, stats.overflow), (0, 1, 0))
+        self.assertEqual(stats.checkouts, 2)
+
+    async def test_timeout_is_counted_with_wait(self):
+        connection = await greenlet_spawn(self.pool.connect)
+        with self.assertRaises(exc.TimeoutError):
+            await greenlet_spawn(self.pool.connect)
+        await greenlet_spawn(connection.close)
+
+        stats = get_pool_stats(self.engine)
+        self.assertEqual((stats.checkouts, stats.timeouts), (2, 1))
+        # Очікування тайм-ауту потрапляє і в максимум, і в середнє
+        self.assertGreaterEqual(stats.max_wait_ms, 50)
+        self.assertGreaterEqual(stats.avg_wait_ms, stats.max_wait_ms / 2)
+        self.assertLess(stats.avg_wait_ms, stats.max_wait_ms)
+
+    async def test_counters_survive_recreate(self):
+        connection = await greenlet_spawn(self.pool.connect)
+        await greenlet_spawn(connection.close)
+
+        pool = self.pool.recreate()
+        self.assertIs(pool.counters, self.pool.counters)
+        self.assertEqual(get_pool_stats(MagicMock(pool=pool)).checkouts, 1)
+
+    def test_stats_without_checkouts(self):
+        stats = get_pool_stats(self.engine)
+        self.assertEqual((stats.checkouts, stats.avg_wait_ms, stats.max_wait_ms), (0, 0.0, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.dialects import postgresql
+
+from db.models import User
+from db.queries.users import get_profile_bundle, get_top_page, get_user_rank
+
+
+def compile_sql(stmt) -> str:
+    return " ".join(str(stmt.compile(dialect=postgresql.dialect())).split())
+
+
+class TestRankingView(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        patch("db.queries.users.ranking_config.materialized_view", True).start()
+        self.addCleanup(patch.stopall)
+        self.session = MagicMock()
+
+    def executed(self):
+        return [compile_sql(call.args[0]) for call in self.session.execute.await_args_list]
+
+    async def test_rank_from_view(self):
+        self.session.execute = AsyncMock(return_value=MagicMock(scalar=MagicMock(return_value=4)))
+
+        self.assertEqual(await get_user_rank(self.session, 1), 4)
+        self.assertIn("FROM user_ranking WHERE user_ranking.user_id", self.executed()[0])
+
+    async def test_user_missing_from_view_is_ranked_among_view_rows(self):
+        self.session.execute = AsyncMock(side_effect=[
+            MagicMock(scalar=MagicMock(return_value=None)),
+            MagicMock(scalar=MagicMock(return_value=2))
+        ])
+        user = User(user_id=1, xp=50, first_name="user", referral_count=0)
+        patch("db.queries.users.get_user", AsyncMock(return_value=user)).start()
+
+        self.assertEqual(await get_user_rank(self.session, 1), 3)
+        self.assertIn("count(DISTINCT user_ranking.xp)", self.executed()[1])
+
+    async def test_top_page_reads_view(self):
+        self.session.execute = AsyncMock(return_value=[])
+
+        await get_top_page(self.session, 10, after=(100, 5))
+        sql = self.executed()[0]
+        self.assertIn("FROM user_ranking", sql)
+        self.assertNotIn("FROM users", sql)
+
+    async def test_profile_uses_view_rank_and_count(self):
+        user = User(user_id=1, xp=50, first_name="user", referral_count=2)
+        patch("db.queries.users.get_user", AsyncMock(return_value=user)).start()
+        self.session.execute = AsyncMock(side_effect=[
+            MagicMock(scalar=MagicMock(return_value=7)),
+            MagicMock(scalar=MagicMock(return_value=120))
+        ])
+
+        profile = await get_profile_bundle(self.session, 1)
+        self.assertEqual((profile.rank, profile.referral_count, profile.total_users), (7, 2, 120))
+        self.assertIn("max(user_ranking.position)", self.executed()[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
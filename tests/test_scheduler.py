@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.scheduler import Job, JobScheduler
+
+
+class TestJobScheduler(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.scheduler = JobScheduler()
+        self.executed = []
+
+        async def execute(job):
+            self.executed.append(job.id)
+
+        patch.object(self.scheduler, "_load", AsyncMock(return_value=0)).start()
+        patch.object(self.scheduler, "_execute", execute).start()
+        self.addCleanup(patch.stopall)
+
+    def add_job(self, job_id: int, delay: float) -> None:
+        self.scheduler._add(Job(id=job_id, kind="test", run_at=datetime.now(timezone.utc) + timedelta(seconds=delay), payload={}))
+
+    async def test_jobs_run_in_time_order(self):
+        await self.scheduler.start(bot=None)
+        self.add_job(1, 0.1)
+        self.add_job(2, 0.05)
+        self.add_job(3, -10)  # прострочене після перезапуску
+
+        await asyncio.sleep(0.2)
+        await self.scheduler.stop()
+        self.assertEqual(self.executed, [3, 2, 1])
+
+    async def test_dropped_job_does_not_run(self):
+        await self.scheduler.start(bot=None)
+        self.add_job(1, 0.05)
+        self.scheduler._replace([1], Job(id=2, kind="test", run_at=datetime.now(timezone.utc), payload={}))
+
+        await asyncio.sleep(0.1)
+        await self.scheduler.stop()
+        self.assertEqual(self.executed, [2])
+
+    async def test_jobs_wait_for_start(self):
+        self.add_job(1, -1)
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.executed, [])
+
+        await self.scheduler.start(bot=None)
+        await asyncio.sleep(0.01)
+        await self.scheduler.stop()
+        self.assertEqual(self.executed, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+from config_reader import SchemaMode
+from db.schema import get_head_revisions
+
+
+class TestSchemaCheck(unittest.TestCase):
+    def test_migrations_have_single_head(self):
+        self.assertEqual(len(get_head_revisions()), 1)
+
+    def test_matching_revision_skips_migrations(self):
+        heads = get_head_revisions()
+        with patch("db.get_current_revisions", AsyncMock(return_value=heads)), \
+                patch("db.upgrade_schema", AsyncMock()) as upgrade:
+            asyncio.run(db.init_database())
+        upgrade.assert_not_awaited()
+
+    def test_outdated_revision_fails_in_check_mode(self):
+        config = MagicMock(schema_mode=SchemaMode.CHECK)
+        with patch("db.get_current_revisions", AsyncMock(return_value=set())), \
+                patch("db.upgrade_schema", AsyncMock()) as upgrade, \
+                patch("db.db_config", config):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(db.init_database())
+        upgrade.assert_not_awaited()
+
+    def test_outdated_revision_upgrades_in_migrate_mode(self):
+        config = MagicMock(schema_mode=SchemaMode.MIGRATE)
+        with patch("db.get_current_revisions", AsyncMock(return_value=set())), \
+                patch("db.upgrade_schema", AsyncMock()) as upgrade, \
+                patch("db.db_config", config):
+            asyncio.run(db.init_database())
+        upgrade.assert_awaited_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import DeleteMessages, GetChatAdministrators, SendMessage
+
+from middlewares.db_session import current_session
+from middlewares.send_limit import SendLimitMiddleware
+from utils.send_limiter import SendLimiter, SendPriority, TokenBucket
+
+
+def make_limiter(**kwargs) -> SendLimiter:
+    options = dict(global_rate=100, private_rate=100, private_burst=1, group_per_minute=6000, group_burst=1)
+    options.update(kwargs)
+    return SendLimiter(**options)
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_refill_and_block(self):
+        with patch("time.monotonic", return_value=100.0):
+            bucket = TokenBucket(rate=2, capacity=2)
+        bucket.consume()
+        bucket.consume()
+        self.assertEqual(bucket.delay(100.0), 0.5)
+        self.assertEqual(bucket.delay(100.5), 0)
+
+        with patch("time.monotonic", return_value=100.5):
+            bucket.block(3)
+        self.assertEqual(bucket.delay(103.0), 0.5)
+        self.assertEqual(bucket.delay(104.0), 0)
+
+
+class TestSendLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_passes_through_when_not_running(self):
+        limiter = make_limiter(global_rate=1)
+        for _ in range(5):
+            await asyncio.wait_for(limiter.acquire(1, SendPriority.MESSAGE), timeout=0.1)
+
+    async def test_callback_answers_go_before_cleanup(self):
+        limiter = make_limiter(global_rate=20)
+        limiter.global_bucket.tokens = 0
+        await limiter.start()
+        order = []
+
+        async def send(name, chat_id, priority):
+            await limiter.acquire(chat_id, priority)
+            order.append(name)
+
+        cleanup = asyncio.create_task(send("cleanup", -1, SendPriority.CLEANUP))
+        await asyncio.sleep(0)
+        callback = asyncio.create_task(send("callback", None, SendPriority.CALLBACK))
+        await asyncio.wait_for(asyncio.gather(cleanup, callback), timeout=1)
+        await limiter.stop()
+
+        self.assertEqual(order, ["callback", "cleanup"])
+
+    async def test_busy_chat_does_not_block_others(self):
+        limiter = make_limiter(private_rate=1)
+        await limiter.start()
+        await limiter.acquire(1, SendPriority.MESSAGE)
+
+        blocked = asyncio.create_task(limiter.acquire(1, SendPriority.MESSAGE))
+        await asyncio.wait_for(limiter.acquire(2, SendPriority.MESSAGE), timeout=0.1)
+        self.assertFalse(blocked.done())
+
+        # Після зупинки запити з черги проходять без обмежень
+        await limiter.stop()
+        await asyncio.wait_for(blocked, timeout=0.1)
+
+
+class TestSendLimitMiddleware(unittest.IsolatedAsyncioTestCase):
+    async def test_retries_after_flood_control(self):
+        limiter = make_limiter()
+        await limiter.start()
+        method = SendMessage(chat_id=1, text="test")
+        make_request = AsyncMock(side_effect=[TelegramRetryAfter(method, "Too Many Requests", 0), "ok"])
+
+        result = await SendLimitMiddleware(limiter)(make_request, None, method)
+        await limiter.stop()
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(make_request.await_count, 2)
+        self.assertEqual(limiter.retries, 1)
+
+    async def test_gives_up_after_max_retries(self):
+        limiter = make_limiter()
+        method = SendMessage(chat_id=1, text="test")
+        make_request = AsyncMock(side_effect=TelegramRetryAfter(method, "Too Many Requests", 0))
+
+        with self.assertRaises(TelegramRetryAfter):
+            await SendLimitMiddleware(limiter, max_retries=2)(make_request, None, method)
+        self.assertEqual(make_request.await_count, 3)
+
+    async def test_reads_are_not_limited(self):
+        limiter = MagicMock()
+        make_request = AsyncMock(return_value=[])
+
+        await SendLimitMiddleware(limiter)(make_request, None, GetChatAdministrators(chat_id=-100))
+        limiter.try_acquire.assert_not_called()
+        limiter.acquire.assert_not_called()
+
+    async def test_deletes_skip_chat_bucket(self):
+        limiter = make_limiter(group_per_minute=1)
+        await limiter.start()
+        await limiter.acquire(-100, SendPriority.MESSAGE)
+        make_request = AsyncMock(return_value=True)
+
+        # Відро чату порожнє, але видалення обмежує лише загальне відро
+        await asyncio.wait_for(
+            SendLimitMiddleware(limiter)(make_request, None, DeleteMessages(chat_id=-100, message_ids=[1])),
+            timeout=0.1
+        )
+        self.assertFalse(limiter.try_acquire(-100))
+        await limiter.stop()
+
+    async def test_does_not_commit_handler_transaction(self):
+        limiter = make_limiter(private_rate=10)
+        await limiter.start()
+        await limiter.acquire(1, SendPriority.MESSAGE)
+        session = MagicMock()
+        session.in_transaction.return_value = True
+        session.commit = AsyncMock()
+        make_request = AsyncMock(return_value="ok")
+
+        token = current_session.set(session)
+        try:
+            # Запит чекає на відро чату, але транзакцію хендлера не чіпає
+            with patch("middlewares.send_limit.logger") as log:
+                await asyncio.wait_for(
+                    SendLimitMiddleware(limiter)(make_request, None, SendMessage(chat_id=1, text="test")),
+                    timeout=1
+                )
+            session.commit.assert_not_awaited()
+            log.warning.assert_called_once()
+        finally:
+            current_session.reset(token)
+            await limiter.stop()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import patch
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.user_cache import UserCache
+
+
+class TestUserCache(unittest.TestCase):
+    def test_hit_and_miss(self):
+        cache = UserCache(ttl=30, max_size=10)
+        self.assertIsNone(cache.get(1))
+        cache.set(1, "user")
+        self.assertEqual(cache.get(1), "user")
+
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+        self.assertEqual(stats.hit_rate, 0.5)
+
+    def test_entries_expire(self):
+        cache = UserCache(ttl=30, max_size=10)
+        with patch("time.monotonic", return_value=1000.0):
+            cache.set(1, "user")
+        with patch("time.monotonic", return_value=1029.0):
+            self.assertEqual(cache.get(1), "user")
+        with patch("time.monotonic", return_value=1031.0):
+            self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.stats().expirations, 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = UserCache(ttl=30, max_size=2)
+        cache.set(1, "first")
+        cache.set(2, "second")
+        cache.get(1)
+        cache.set(3, "third")
+
+        self.assertEqual(cache.get(1), "first")
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(3), "third")
+        self.assertEqual(cache.stats().evictions, 1)
+
+    def test_invalidate_drops_entry_and_stale_fill(self):
+        cache = UserCache(ttl=30, max_size=10)
+        cache.set(1, "old")
+        generation = cache.generation(1)
+        cache.invalidate(1)
+        self.assertIsNone(cache.get(1))
+
+        # Дані, прочитані до інвалідації, не повинні потрапити в кеш
+        cache.set(1, "stale", generation=generation)
+        self.assertIsNone(cache.get(1))
+
+        cache.set(1, "fresh", generation=cache.generation(1))
+        self.assertEqual(cache.get(1), "fresh")
+
+    def test_invalidating_other_users_keeps_fill(self):
+        cache = UserCache(ttl=30, max_size=10)
+        generation = cache.generation(1)
+        cache.invalidate(2)
+        cache.invalidate_many([3, 4])
+
+        cache.set(1, "fresh", generation=generation)
+        self.assertEqual(cache.get(1), "fresh")
+
+    def test_generations_stay_bounded(self):
+        cache = UserCache(ttl=30, max_size=2)
+        generation = cache.generation(1)
+        cache.invalidate(1)
+        cache.invalidate_many(range(100, 120))
+
+        self.assertLessEqual(len(cache._generations), 8)
+        # Після очищення словника старе покоління все одно застаріле
+        cache.set(1, "stale", generation=generation)
+        self.assertIsNone(cache.get(1))
+
+    def test_zero_ttl_disables_cache(self):
+        cache = UserCache(ttl=0, max_size=10)
+        cache.set(1, "user")
+        self.assertIsNone(cache.get(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
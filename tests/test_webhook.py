@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram import Bot, Dispatcher
+from aiohttp.test_utils import TestClient, TestServer
+
+from webhook import create_webhook_app
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 1700000000,
+        "chat": {"id": 1, "type": "private"},
+        "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+        "text": "/start"
+    }
+}
+
+
+class TestWebhook(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dispatcher = Dispatcher()
+        self.bot = Bot(token="42:TEST")
+        app = create_webhook_app(self.dispatcher, self.bot, "/webhook", "secret")
+        self.client = TestClient(TestServer(app))
+
+    async def test_rejects_wrong_secret(self):
+        with patch.object(self.dispatcher, "feed_raw_update", AsyncMock()) as feed:
+            async with self.client:
+                response = await self.client.post(
+                    "/webhook", json=UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"}
+                )
+                self.assertEqual(response.status, 401)
+        feed.assert_not_awaited()
+
+    async def test_acknowledges_and_feeds_update(self):
+        with patch.object(self.dispatcher, "feed_raw_update", AsyncMock()) as feed:
+            async with self.client:
+                response = await self.client.post(
+                    "/webhook", json=UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": "secret"}
+                )
+                self.assertEqual(response.status, 200)
+            # Зупинка сервера дочікується оновлень в обробці
+        feed.assert_awaited_once()
+        self.assertEqual(feed.await_args.kwargs["update"], UPDATE)
+
+
+if __name__ == "__main__":
+    unittest.main()
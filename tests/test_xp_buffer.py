@@ -0,0 +1,36 @@
+import unittest
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.xp_buffer import XpAccumulator
+
+
+class TestXpAccumulator(unittest.IsolatedAsyncioTestCase):
+    async def test_add_merges_deltas(self):
+        accumulator = XpAccumulator(flush_interval=60, max_pending=100)
+        accumulator.add(1, 1, chat_id=-100)
+        accumulator.add(1, 1, chat_id=-100)
+        accumulator.add(2, 5)
+
+        self.assertEqual(accumulator.pending, 2)
+        self.assertEqual(accumulator._xp_deltas, {1: 2, 2: 5})
+        self.assertEqual(accumulator._memberships, {(1, -100): False})
+
+    async def test_max_pending_requests_flush(self):
+        accumulator = XpAccumulator(flush_interval=60, max_pending=2)
+        await accumulator.start()
+        try:
+            accumulator.add(1, 1)
+            self.assertFalse(accumulator._wakeup.is_set())
+            accumulator.add(2, 1)
+            self.assertTrue(accumulator._wakeup.is_set())
+        finally:
+            accumulator._xp_deltas.clear()
+            await accumulator.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.models import XpSource
+from utils.xp_ledger import XpLedger
+
+
+class TestXpLedger(unittest.IsolatedAsyncioTestCase):
+    async def test_record_skips_zero_delta(self):
+        ledger = XpLedger(flush_interval=60, max_pending=100, partitions_ahead=2)
+        ledger.record(1, 10, XpSource.GAME)
+        ledger.record(1, 0, XpSource.GAME)
+        ledger.record(2, -5, XpSource.ADMIN, chat_id=-100)
+
+        self.assertEqual(ledger.pending, 2)
+        self.assertEqual(ledger._records[1][:4], (2, -100, "admin", -5))
+
+    async def test_max_pending_requests_flush(self):
+        ledger = XpLedger(flush_interval=60, max_pending=2, partitions_ahead=2)
+        patch("db.queries.xp_events.start_xp_ledger_run", AsyncMock(return_value=False)).start()
+        patch("db.queries.xp_events.finish_xp_ledger_run", AsyncMock()).start()
+        self.addCleanup(patch.stopall)
+        await ledger.start()
+        try:
+            ledger.record(1, 1, XpSource.CHAT_ACTIVITY)
+            self.assertFalse(ledger._wakeup.is_set())
+            ledger.record(2, 1, XpSource.CHAT_ACTIVITY)
+            self.assertTrue(ledger._wakeup.is_set())
+        finally:
+            ledger._records.clear()
+            await ledger.stop()
+
+    async def test_failed_flush_keeps_records(self):
+        ledger = XpLedger(flush_interval=60, max_pending=100, partitions_ahead=2)
+        ledger.record(1, 10, XpSource.GAME)
+
+        with patch("db.queries.xp_events.ensure_xp_event_partitions", AsyncMock()), \
+                patch("db.queries.xp_events.copy_xp_events", AsyncMock(side_effect=RuntimeError("db is down"))):
+            with self.assertRaises(RuntimeError):
+                await ledger.flush()
+            ledger.record(2, 5, XpSource.GAME)
+
+        self.assertEqual([record[0] for record in ledger._records], [1, 2])
+
+    async def test_failed_flush_caps_buffer(self):
+        ledger = XpLedger(flush_interval=60, max_pending=100, partitions_ahead=2, max_buffered=3)
+        for user_id in range(5):
+            ledger.record(user_id, 1, XpSource.GAME)
+
+        with patch("db.queries.xp_events.ensure_xp_event_partitions", AsyncMock()), \
+                patch("db.queries.xp_events.copy_xp_events", AsyncMock(side_effect=RuntimeError("db is down"))):
+            with self.assertRaises(RuntimeError):
+                await ledger.flush()
+
+        self.assertEqual([record[0] for record in ledger._records], [2, 3, 4])
+        self.assertEqual(ledger.dropped, 2)
+
+        # Втрата записується в БД з першим успішним записом журналу
+        mark_incomplete = AsyncMock()
+        with patch("db.queries.xp_events.ensure_xp_event_partitions", AsyncMock()), \
+                patch("db.queries.xp_events.copy_xp_events", AsyncMock()), \
+                patch("db.queries.xp_events.mark_xp_ledger_incomplete", mark_incomplete):
+            await ledger.flush()
+            await ledger.flush()
+        mark_incomplete.assert_awaited_once()
+
+    async def test_unclean_stop_keeps_running_marker(self):
+        ledger = XpLedger(flush_interval=60, max_pending=100, partitions_ahead=2)
+        finish = AsyncMock()
+        with patch("db.queries.xp_events.start_xp_ledger_run", AsyncMock(return_value=False)), \
+                patch("db.queries.xp_events.finish_xp_ledger_run", finish), \
+                patch("db.queries.xp_events.ensure_xp_event_partitions", AsyncMock()), \
+                patch("db.queries.xp_events.copy_xp_events", AsyncMock(side_effect=RuntimeError("db is down"))):
+            await ledger.start()
+            ledger.record(1, 10, XpSource.GAME)
+            await ledger.stop()
+        finish.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import time
+from typing import Dict, Set
+
+import structlog
+
+from config_reader import get_config, ActivityConfig
+from utils.periodic import PeriodicFlusher
+
+logger = structlog.get_logger()
+
+
+class ActivityTracker(PeriodicFlusher):
+    """
+    Дебаунс запису last_activity.
+    Пам'ятає, коли активність кожного користувача востаннє записувалась,
+    і записує її не частіше ніж раз на window секунд, пакетом для всіх користувачів.
+    """
+
+    def __init__(self, window: float, flush_interval: float):
+        super().__init__(flush_interval)
+        self.window = window
+        self._last_written: Dict[int, float] = {}
+        self._pending: Set[int] = set()
+
+    def is_known(self, user_id: int) -> bool:
+        """Чи бачили ми користувача протягом останнього вікна"""
+        return user_id in self._last_written
+
+    def mark_written(self, user_id: int) -> None:
+        """Позначити, що активність користувача щойно записана в БД"""
+        self._last_written[user_id] = time.monotonic()
+        self._pending.discard(user_id)
+
+    def touch(self, user_id: int) -> None:
+        """Зареєструвати активність; поставити в чергу запису, якщо вікно минуло"""
+        now = time.monotonic()
+        last_written = self._last_written.get(user_id)
+        if last_written is None or now - last_written >= self.window:
+            self._last_written[user_id] = now
+            self._pending.add(user_id)
+
+    async def flush(self) -> None:
+        """Записати last_activity для всіх користувачів з черги"""
+        self._forget_stale()
+        if not self._pending:
+            return
+
+        from db.connection import async_session_maker
+        from db.queries import touch_users_activity
+
+        user_ids, self._pending = self._pending, set()
+        try:
+            async with async_session_maker() as session:
+                await touch_users_activity(session, user_ids)
+                await session.commit()
+        except Exception:
+            self._pending |= user_ids
+            raise
+
+        logger.debug(f"Flushed activity for {len(user_ids)} users")
+
+    def _forget_stale(self) -> None:
+        # Користувачі, неактивні довше за вікно, знову пройдуть повну перевірку в middleware
+        threshold = time.monotonic() - self.window
+        stale = [
+            user_id for user_id, written_at in self._last_written.items()
+            if written_at < threshold and user_id not in self._pending
+        ]
+        for user_id in stale:
+            del self._last_written[user_id]
+
+
+activity_config: ActivityConfig = get_config(model=ActivityConfig, root_key="activity")
+
+activity_tracker = ActivityTracker(
+    window=activity_config.window,
+    flush_interval=activity_config.flush_interval
+)
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import Dict, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.types import ChatMember, ChatMemberAdministrator, ChatMemberOwner
+
+from config_reader import get_config, AdminCacheConfig
+
+ChatAdmin = Union[ChatMemberOwner, ChatMemberAdministrator]
+
+
+class ChatAdminCache:
+    """
+    Кеш адміністраторів чатів.
+    Список чату завантажується одним getChatAdministrators і далі оновлюється з оновлень
+    chat_member і my_chat_member; через ttl секунд список завантажується заново на випадок
+    пропущених оновлень (chat_member приходять, лише якщо бот - адміністратор чату).
+    Помилка getChatAdministrators (бота видалили з чату тощо) теж кешується на FAILURE_TTL секунд:
+    до того часу запити в цей чат отримують ту саму помилку без звернення до Bot API.
+    """
+
+    # Скільки чатів тримати, перш ніж видаляти застарілі записи
+    MAX_CHATS = 10000
+
+    # Скільки секунд пам'ятати помилку завантаження адміністраторів чату
+    FAILURE_TTL = 30.0
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._chats: Dict[int, Tuple[float, Dict[int, ChatAdmin]]] = {}
+        self._failures: Dict[int, Tuple[float, Exception]] = {}
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self.requests = 0
+
+    async def get_admins(self, bot: Bot, chat_id: int) -> Dict[int, ChatAdmin]:
+        """Отримати адміністраторів чату {user_id: учасник}"""
+        entry = self._chats.get(chat_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        failure = self._failures.get(chat_id)
+        if failure is not None:
+            if failure[0] > time.monotonic():
+                raise failure[1]
+            del self._failures[chat_id]
+
+        task = self._inflight.get(chat_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(bot, chat_id))
+            self._inflight[chat_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(chat_id, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, bot: Bot, chat_id: int) -> Dict[int, ChatAdmin]:
+        self.requests += 1
+        try:
+            members = await bot.get_chat_administrators(chat_id)
+        except Exception as e:
+            if len(self._failures) >= self.MAX_CHATS:
+                now = time.monotonic()
+                self._failures = {key: value for key, value in self._failures.items() if value[0] > now}
+            self._failures[chat_id] = (time.monotonic() + self.FAILURE_TTL, e)
+            raise
+        admins = {member.user.id: member for member in members}
+        if len(self._chats) >= self.MAX_CHATS:
+            now = time.monotonic()
+            self._chats = {key: value for key, value in self._chats.items() if value[0] > now}
+        self._chats[chat_id] = (time.monotonic() + self.ttl, admins)
+        return admins
+
+    async def get_admin(self, bot: Bot, chat_id: int, user_id: int) -> Optional[ChatAdmin]:
+        """Отримати адміністратора чату або None, якщо користувач не адміністратор"""
+        admins = await self.get_admins(bot, chat_id)
+        return admins.get(user_id)
+
+    async def is_admin(self, bot: Bot, chat_id: int, user_id: int) -> bool:
+        return await self.get_admin(bot, chat_id, user_id) is not None
+
+    def update_member(self, chat_id: int, member: ChatMember) -> None:
+        """Врахувати зміну статусу учасника (з оновлень chat_member і my_chat_member)"""
+        # Бот знову отримує оновлення чату - збережена помилка могла застаріти
+        self._failures.pop(chat_id, None)
+        entry = self._chats.get(chat_id)
+        if entry is None:
+            return
+
+        admins = entry[1]
+        if isinstance(member, (ChatMemberOwner, ChatMemberAdministrator)):
+            admins[member.user.id] = member
+        else:
+            admins.pop(member.user.id, None)
+
+    def invalidate(self, chat_id: int) -> None:
+        """Прибрати чат з кешу"""
+        self._chats.pop(chat_id, None)
+        self._failures.pop(chat_id, None)
+
+
+admin_cache_config: AdminCacheConfig = get_config(model=AdminCacheConfig, root_key="admin_cache")
+
+admin_cache = ChatAdminCache(ttl=admin_cache_config.ttl)
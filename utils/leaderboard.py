@@ -0,0 +1,305 @@
+import random
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from config_reader import get_config, LeaderboardConfig
+
+
+class _End:
+    """Ключ кінцевого вузла, більший за будь-який інший ключ"""
+
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return self is other
+
+    def __repr__(self):
+        return "<End>"
+
+
+_END = _End()
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key: Any, levels: int):
+        self.key = key
+        self.next: List[Optional["_Node"]] = [None] * levels
+        self.width: List[int] = [1] * levels
+
+
+class IndexableSkipList:
+    """
+    Skip list з шириною посилань (order-statistic структура).
+    Вставка, видалення, пошук рангу та доступ за індексом - O(log n).
+    Ключі мають бути унікальними і порівнюваними між собою.
+    """
+
+    MAX_LEVELS = 32
+
+    def __init__(self):
+        self._nil = _Node(_END, 0)
+        self._head = _Node(None, self.MAX_LEVELS)
+        self._head.next = [self._nil] * self.MAX_LEVELS
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self):
+        node = self._head.next[0]
+        while node is not self._nil:
+            yield node.key
+            node = node.next[0]
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable[Any]) -> "IndexableSkipList":
+        """Побудувати список з уже відсортованих ключів за O(n)"""
+        skip_list = cls()
+        last = [skip_list._head] * cls.MAX_LEVELS
+        last_position = [0] * cls.MAX_LEVELS
+
+        position = 0
+        for position, key in enumerate(keys, 1):
+            levels = cls._random_levels()
+            node = _Node(key, levels)
+            for level in range(levels):
+                previous = last[level]
+                previous.next[level] = node
+                previous.width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+
+        for level in range(cls.MAX_LEVELS):
+            last[level].next[level] = skip_list._nil
+            last[level].width[level] = position + 1 - last_position[level]
+
+        skip_list._size = position
+        return skip_list
+
+    def insert(self, key: Any) -> None:
+        """Вставити ключ"""
+        chain = [self._head] * self.MAX_LEVELS
+        steps_at_level = [0] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = self._random_levels()
+        new_node = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+
+        self._size += 1
+
+    def remove(self, key: Any) -> bool:
+        """Видалити ключ; повертає False, якщо ключа немає"""
+        chain = [self._head] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is self._nil or target.key != key:
+            return False
+
+        levels = len(target.next)
+        for level in range(levels):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+
+        self._size -= 1
+        return True
+
+    def count_less(self, key: Any) -> int:
+        """Кількість ключів, строго менших за key"""
+        position = 0
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def count_less_equal(self, key: Any) -> int:
+        """Кількість ключів, менших або рівних key"""
+        position = 0
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key <= key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def slice(self, start: int, count: int) -> List[Any]:
+        """Отримати до count ключів, починаючи з індексу start"""
+        if start < 0 or start >= self._size or count <= 0:
+            return []
+
+        node = self._head
+        remaining = start + 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.width[level] <= remaining and node.next[level] is not self._nil:
+                remaining -= node.width[level]
+                node = node.next[level]
+
+        keys = []
+        while node is not self._nil and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += self._size
+        keys = self.slice(index, 1)
+        if not keys:
+            raise IndexError("skip list index out of range")
+        return keys[0]
+
+    @classmethod
+    def _random_levels(cls) -> int:
+        levels = 1
+        while levels < cls.MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        return levels
+
+
+class LeaderboardEntry(NamedTuple):
+    user_id: int
+    xp: int
+    first_name: str
+
+
+class Leaderboard:
+    """
+    Рейтинг користувачів в пам'яті процесу.
+    Впорядкований за (xp за спаданням, user_id), оновлюється інкрементально при кожній зміні XP.
+    Ранг рахується як у get_user_rank: кількість користувачів з більшим XP + 1.
+
+    Зміни застосовуються після коміту як дельти: колбеки паралельних транзакцій можуть
+    виконатися не в порядку комітів, а сума дельт від цього не залежить.
+    Рейтинг бачить лише зміни свого процесу, тому бот має працювати в одному процесі.
+    """
+
+    def __init__(self):
+        self._ranking = IndexableSkipList()
+        self._entries: Dict[int, LeaderboardEntry] = {}
+        # Дельти користувачів, колбек створення яких ще не виконався
+        self._pending: Dict[int, int] = {}
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(user_id: int, xp: int) -> Tuple[int, int]:
+        return -xp, user_id
+
+    def rebuild(self, rows: Iterable[Tuple[int, int, str]]) -> None:
+        """Перебудувати рейтинг з рядків (user_id, xp, first_name)"""
+        entries = {
+            user_id: LeaderboardEntry(user_id, xp or 0, first_name or "")
+            for user_id, xp, first_name in rows
+        }
+        keys = sorted(self._key(entry.user_id, entry.xp) for entry in entries.values())
+
+        self._ranking = IndexableSkipList.from_sorted(keys)
+        self._entries = entries
+        self._pending = {}
+        self.ready = True
+
+    def add_user(self, user_id: int, xp: int, first_name: str) -> None:
+        """
+        Додати створеного користувача з його початковим XP.
+        Для наявного користувача оновлюється лише ім'я: його XP змінюють тільки дельти.
+        """
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            if entry.first_name != first_name:
+                self._entries[user_id] = entry._replace(first_name=first_name)
+            return
+
+        xp += self._pending.pop(user_id, 0)
+        self._ranking.insert(self._key(user_id, xp))
+        self._entries[user_id] = LeaderboardEntry(user_id, xp, first_name)
+
+    def add_xp(self, user_id: int, delta: int) -> None:
+        """Застосувати закомічену зміну XP користувача"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            # Зміна закомічена раніше, ніж виконався колбек створення користувача
+            self._pending[user_id] = self._pending.get(user_id, 0) + delta
+            return
+        if delta == 0:
+            return
+
+        self._ranking.remove(self._key(user_id, entry.xp))
+        self._ranking.insert(self._key(user_id, entry.xp + delta))
+        self._entries[user_id] = entry._replace(xp=entry.xp + delta)
+
+    def remove(self, user_id: int) -> None:
+        """Прибрати користувача з рейтингу"""
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._ranking.remove(self._key(user_id, entry.xp))
+
+    def get(self, user_id: int) -> Optional[LeaderboardEntry]:
+        return self._entries.get(user_id)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """Місце користувача в рейтингу або None, якщо його немає"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        return self._ranking.count_less((-entry.xp, float("-inf"))) + 1
+
+    def position(self, user_id: int) -> Optional[int]:
+        """Порядковий індекс користувача (з 0) у впорядкованому рейтингу"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        return self._ranking.count_less(self._key(user_id, entry.xp))
+
+    def page(self, start: int, count: int) -> List[LeaderboardEntry]:
+        """Отримати count записів рейтингу, починаючи з індексу start"""
+        return [self._entries[user_id] for _, user_id in self._ranking.slice(start, count)]
+
+    def top(self, limit: int) -> List[LeaderboardEntry]:
+        """Отримати топ користувачів за XP"""
+        return self.page(0, limit)
+
+    def page_after(self, xp: int, user_id: int, count: int) -> List[LeaderboardEntry]:
+        """Отримати count записів, що йдуть у рейтингу після позиції (xp, user_id)"""
+        start = self._ranking.count_less_equal(self._key(user_id, xp))
+        return self.page(start, count)
+
+    def page_before(self, xp: int, user_id: int, count: int) -> List[LeaderboardEntry]:
+        """Отримати до count записів, що йдуть у рейтингу перед позицією (xp, user_id)"""
+        end = self._ranking.count_less(self._key(user_id, xp))
+        start = max(end - count, 0)
+        return self.page(start, end - start)
+
+
+leaderboard_config: LeaderboardConfig = get_config(model=LeaderboardConfig, root_key="leaderboard")
+
+leaderboard = Leaderboard()
@@ -0,0 +1,87 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set
+
+import structlog
+from aiogram import Bot
+
+from config_reader import get_config, MessageCleanupConfig
+from utils.periodic import PeriodicFlusher
+
+logger = structlog.get_logger()
+
+
+class MessageCleanup(PeriodicFlusher):
+    """
+    Черга видалення повідомлень.
+    Id повідомлень збираються по чатах і видаляються пакетами через deleteMessages
+    (до BATCH_SIZE за запит) раз на flush_interval, тому кілька ігор, що завершились разом,
+    прибираються одним запитом на чат. Поки черга не запущена, видалення відбувається одразу.
+    """
+
+    # Максимум повідомлень в одному запиті deleteMessages
+    BATCH_SIZE = 100
+
+    def __init__(self, flush_interval: float):
+        super().__init__(flush_interval)
+        self.bot: Optional[Bot] = None
+        self._pending: Dict[int, Set[int]] = {}
+        self._waiters: List[asyncio.Future] = []
+        self.requests = 0
+
+    @property
+    def pending(self) -> int:
+        """Кількість повідомлень, які очікують видалення"""
+        return sum(len(message_ids) for message_ids in self._pending.values())
+
+    async def start(self, bot: Bot) -> None:
+        self.bot = bot
+        await super().start()
+
+    async def delete(self, chat_id: int, message_ids: Iterable[int]) -> None:
+        """Додати повідомлення чату в чергу і дочекатися їх видалення"""
+        chat_pending = self._pending.setdefault(chat_id, set())
+        chat_pending.update(message_ids)
+
+        if self._task is None:
+            await self.flush()
+            return
+
+        if len(chat_pending) >= self.BATCH_SIZE:
+            self.request_flush()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        await future
+
+    async def _delete_chat_messages(self, chat_id: int, message_ids: List[int]) -> None:
+        for start in range(0, len(message_ids), self.BATCH_SIZE):
+            batch = message_ids[start:start + self.BATCH_SIZE]
+            self.requests += 1
+            try:
+                await self.bot.delete_messages(chat_id, batch)
+            except Exception as e:
+                logger.error(f"Error deleting {len(batch)} messages in chat {chat_id}: {e}")
+
+    async def flush(self) -> None:
+        """Видалити накопичені повідомлення"""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        waiters, self._waiters = self._waiters, []
+        try:
+            if self.bot is None:
+                logger.error(f"Message cleanup is not started, {len(pending)} chats skipped")
+                return
+            await asyncio.gather(*(
+                self._delete_chat_messages(chat_id, sorted(message_ids))
+                for chat_id, message_ids in pending.items()
+            ))
+        finally:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+
+message_cleanup_config: MessageCleanupConfig = get_config(model=MessageCleanupConfig, root_key="message_cleanup")
+
+message_cleanup = MessageCleanup(flush_interval=message_cleanup_config.flush_interval)
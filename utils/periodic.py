@@ -0,0 +1,70 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class PeriodicFlusher(ABC):
+    """
+    Базовий клас для буферів, які періодично скидають накопичені дані в БД.
+    Скидання відбувається за таймером або достроково через request_flush().
+    """
+
+    # Чи скидати дані ще раз при зупинці
+    flush_on_stop = True
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @abstractmethod
+    async def flush(self) -> None:
+        """Скинути накопичені дані"""
+
+    def request_flush(self) -> None:
+        """Попросити фонову задачу скинути дані, не чекаючи таймера"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        """Запустити фонову задачу скидання"""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Зупинити фонову задачу і скинути все, що залишилось.
+        Помилка останнього скидання лише логується, щоб зупинка інших буферів не переривалась.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        if self.flush_on_stop:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error in {type(self).__name__} final flush: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error in {type(self).__name__} flush: {e}")
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Dict, Optional
+
+from aiogram import Bot
+
+from config_reader import get_config, ProfilePhotoCacheConfig
+from utils.user_cache import UserCache
+
+
+class ProfilePhotoCache:
+    """
+    Кеш file_id останнього фото профілю користувачів.
+    Відсутність фото теж кешується. Одночасні запити фото одного користувача
+    об'єднуються в один виклик getUserProfilePhotos.
+    """
+
+    # Значення в кеші для користувача без фото
+    NO_PHOTO = ""
+
+    def __init__(self, ttl: float, max_size: int):
+        self._cache = UserCache(ttl=ttl, max_size=max_size)
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self.requests = 0
+
+    async def get_file_id(self, bot: Bot, user_id: int) -> Optional[str]:
+        """Отримати file_id фото профілю користувача (None - фото немає)"""
+        cached = self._cache.get(user_id)
+        if cached is not None:
+            return cached or None
+
+        task = self._inflight.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(bot, user_id))
+            self._inflight[user_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(user_id, None))
+        # shield: скасування одного з тих, хто чекає, не скасовує запит для інших
+        return await asyncio.shield(task)
+
+    async def _fetch(self, bot: Bot, user_id: int) -> Optional[str]:
+        generation = self._cache.generation(user_id)
+        self.requests += 1
+        user_photos = await bot.get_user_profile_photos(user_id, limit=1)
+        file_id = user_photos.photos[0][-1].file_id if user_photos.total_count > 0 and user_photos.photos else None
+        self._cache.set(user_id, file_id or self.NO_PHOTO, generation=generation)
+        return file_id
+
+
+profile_photo_cache_config: ProfilePhotoCacheConfig = get_config(
+    model=ProfilePhotoCacheConfig, root_key="profile_photo_cache"
+)
+
+profile_photo_cache = ProfilePhotoCache(
+    ttl=profile_photo_cache_config.ttl,
+    max_size=profile_photo_cache_config.max_size
+)
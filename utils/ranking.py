@@ -0,0 +1,31 @@
+import structlog
+
+from config_reader import get_config, RankingConfig
+from utils.periodic import PeriodicFlusher
+
+logger = structlog.get_logger()
+
+
+class RankingRefresher(PeriodicFlusher):
+    """
+    Періодичне оновлення матеріалізованого представлення рейтингу user_ranking.
+    REFRESH ... CONCURRENTLY не блокує читання рейтингу під час оновлення.
+    """
+
+    flush_on_stop = False
+
+    async def flush(self) -> None:
+        """Оновити представлення рейтингу"""
+        from db.connection import async_session_maker
+        from db.queries import refresh_user_ranking
+
+        async with async_session_maker() as session:
+            await refresh_user_ranking(session)
+            await session.commit()
+
+        logger.debug("User ranking refreshed")
+
+
+ranking_config: RankingConfig = get_config(model=RankingConfig, root_key="ranking")
+
+ranking_refresher = RankingRefresher(flush_interval=ranking_config.refresh_interval)
@@ -0,0 +1,187 @@
+import asyncio
+import heapq
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import structlog
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = structlog.get_logger()
+
+JobHandler = Callable[[Bot, AsyncSession, dict], Awaitable[None]]
+
+# Скільки секунд при зупинці чекати на завдання, які зараз виконуються
+STOP_TIMEOUT = 5.0
+
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    run_at: datetime
+    payload: dict
+
+
+class JobScheduler:
+    """
+    Планувальник відкладених завдань: одна фонова задача і купа за часом виконання.
+    Завдання записується в scheduled_jobs у транзакції хендлера і потрапляє в купу після коміту;
+    при запуску невиконані завдання завантажуються з БД. Обробник завдання отримує власну сесію,
+    у тій самій транзакції рядок завдання видаляється (разом з новими завданнями, які він запланував).
+    Завдання, що впало з помилкою, не повторюється.
+    Купа живе в пам'яті процесу: з двома процесами бота кожен виконав би всі завдання з БД.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: Dict[int, Job] = {}
+        self._heap: List[Tuple[datetime, int]] = []
+        self._running: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._bot: Optional[Bot] = None
+
+    @property
+    def pending(self) -> int:
+        """Кількість запланованих завдань"""
+        return len(self._jobs)
+
+    def job(self, kind: str) -> Callable[[JobHandler], JobHandler]:
+        """Декоратор для реєстрації обробника завдань виду kind"""
+
+        def register(handler: JobHandler) -> JobHandler:
+            self._handlers[kind] = handler
+            return handler
+
+        return register
+
+    async def schedule(
+        self,
+        session: AsyncSession,
+        kind: str,
+        delay: float,
+        payload: dict,
+        key: Optional[str] = None
+    ) -> None:
+        """
+        Запланувати завдання через delay секунд.
+        Завдання з тим самим key замінюється новим.
+        """
+        from db.connection import on_commit
+        from db.queries.jobs import delete_scheduled_jobs_by_key, insert_scheduled_job
+
+        replaced = await delete_scheduled_jobs_by_key(session, key) if key is not None else []
+        run_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        job_id = await insert_scheduled_job(session, kind, run_at, payload, key)
+
+        job = Job(id=job_id, kind=kind, run_at=run_at, payload=payload)
+        on_commit(session, lambda: self._replace(replaced, job))
+
+    async def cancel(self, session: AsyncSession, key: str) -> None:
+        """Скасувати завдання з ключем key"""
+        from db.connection import on_commit
+        from db.queries.jobs import delete_scheduled_jobs_by_key
+
+        cancelled = await delete_scheduled_jobs_by_key(session, key)
+        if cancelled:
+            on_commit(session, lambda: self._drop(cancelled))
+
+    def _add(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        heapq.heappush(self._heap, (job.run_at, job.id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _replace(self, job_ids: Iterable[int], job: Job) -> None:
+        self._drop(job_ids)
+        self._add(job)
+
+    def _drop(self, job_ids: Iterable[int]) -> None:
+        # Записи в купі залишаються і пропускаються, коли настане їхній час
+        for job_id in job_ids:
+            self._jobs.pop(job_id, None)
+
+    async def _load(self) -> int:
+        """Завантажити невиконані завдання з БД"""
+        from db.connection import async_session_maker
+        from db.queries.jobs import get_scheduled_jobs
+
+        async with async_session_maker() as session:
+            rows = await get_scheduled_jobs(session)
+        for row in rows:
+            self._add(Job(id=row.id, kind=row.kind, run_at=row.run_at, payload=row.payload))
+        return len(rows)
+
+    async def _execute(self, job: Job) -> None:
+        from db.connection import async_session_maker
+        from db.queries.jobs import delete_scheduled_jobs
+
+        try:
+            async with async_session_maker() as session:
+                handler = self._handlers.get(job.kind)
+                if handler is None:
+                    logger.error(f"No handler for scheduled job {job.kind}")
+                else:
+                    try:
+                        await handler(self._bot, session, job.payload)
+                    except Exception as e:
+                        logger.error(f"Error in scheduled job {job.kind}: {e}")
+                        await session.rollback()
+
+                await delete_scheduled_jobs(session, (job.id,))
+                await session.commit()
+        except Exception as e:
+            # Рядок залишився в БД: завдання виконається ще раз після перезапуску
+            logger.error(f"Error finishing scheduled job {job.id}: {e}")
+
+    async def start(self, bot: Bot) -> None:
+        """Завантажити збережені завдання і запустити таймер"""
+        if self._task is not None:
+            return
+        self._bot = bot
+        loaded = await self._load()
+        logger.info(f"Scheduled jobs loaded: {loaded}")
+
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Зупинити таймер; невиконані завдання залишаються в БД до наступного запуску"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wakeup = None
+
+        if self._running:
+            await asyncio.wait(set(self._running), timeout=STOP_TIMEOUT)
+        self._jobs.clear()
+        self._heap.clear()
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = datetime.now(timezone.utc)
+            while self._heap and self._heap[0][0] <= now:
+                _, job_id = heapq.heappop(self._heap)
+                job = self._jobs.pop(job_id, None)
+                if job is None:
+                    continue
+                task = asyncio.create_task(self._execute(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+            timeout = (self._heap[0][0] - now).total_seconds() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+scheduler = JobScheduler()
@@ -0,0 +1,237 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple, Union
+
+from aiogram.methods import (
+    AnswerCallbackQuery, CopyMessage, CopyMessages, DeleteMessage, DeleteMessages, EditMessageCaption,
+    EditMessageLiveLocation, EditMessageMedia, EditMessageReplyMarkup, EditMessageText, ForwardMessage,
+    ForwardMessages, SendAnimation, SendAudio, SendContact, SendDice, SendDocument, SendGame, SendInvoice,
+    SendLocation, SendMediaGroup, SendMessage, SendPaidMedia, SendPhoto, SendPoll, SendSticker, SendVenue,
+    SendVideo, SendVideoNote, SendVoice, StopMessageLiveLocation, StopPoll, TelegramMethod
+)
+
+from config_reader import get_config, SendLimiterConfig
+
+ChatId = Union[int, str]
+
+# Методи, що надсилають або змінюють повідомлення в чаті: на них діють ліміти чату
+CHAT_SEND_METHODS = (
+    SendMessage, SendPhoto, SendAnimation, SendAudio, SendDocument, SendVideo, SendVideoNote, SendVoice,
+    SendSticker, SendDice, SendPoll, SendLocation, SendVenue, SendContact, SendMediaGroup, SendGame,
+    SendInvoice, SendPaidMedia, CopyMessage, CopyMessages, ForwardMessage, ForwardMessages,
+    EditMessageText, EditMessageCaption, EditMessageMedia, EditMessageReplyMarkup,
+    EditMessageLiveLocation, StopMessageLiveLocation, StopPoll
+)
+
+
+class SendPriority(IntEnum):
+    """Класи пріоритету вихідних запитів (менше значення - раніше)"""
+    CALLBACK = 0
+    MESSAGE = 1
+    CLEANUP = 2
+
+
+def get_send_priority(method: TelegramMethod) -> Optional[SendPriority]:
+    """Визначити пріоритет запиту за методом Bot API (None - запит не обмежується)"""
+    if isinstance(method, AnswerCallbackQuery):
+        return SendPriority.CALLBACK
+    if isinstance(method, (DeleteMessage, DeleteMessages)):
+        return SendPriority.CLEANUP
+    if isinstance(method, CHAT_SEND_METHODS):
+        return SendPriority.MESSAGE
+    return None
+
+
+class TokenBucket:
+    """Відро токенів: rate токенів за секунду, але не більше capacity"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Скільки секунд чекати на наступний токен (0 - токен є)"""
+        self._refill(now)
+        wait = max(self.blocked_until - now, 0.0)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+    def block(self, seconds: float) -> None:
+        """Не видавати токени seconds секунд (після відповіді 429 з Retry-After)"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+    def is_idle(self, now: float) -> bool:
+        """Відро повне і не заблоковане - його можна видалити без втрати стану"""
+        return self.delay(now) == 0 and self.tokens >= self.capacity
+
+
+class SendLimiter:
+    """
+    Обмеження частоти вихідних запитів до Telegram: загальне відро і відро на кожен чат.
+    Запити чекають у черзі з пріоритетом; одна фонова задача видає дозволи, щойно в обох відрах
+    є токени. Запит, заблокований лімітом свого чату, не затримує запити в інші чати.
+    Поки limiter не запущено (до старту і після зупинки), запити проходять без обмежень.
+    """
+
+    # Скільки відер чатів тримати, перш ніж видаляти повні
+    MAX_IDLE_CHATS = 10000
+
+    def __init__(self, global_rate: float, private_rate: float, private_burst: int,
+                 group_per_minute: float, group_burst: int):
+        self.global_bucket = TokenBucket(global_rate, max(global_rate, 1))
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self.group_rate = group_per_minute / 60
+        self.group_burst = group_burst
+        self._chats: Dict[ChatId, TokenBucket] = {}
+        self._waiting: List[Tuple[int, int, Optional[ChatId], asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.retries = 0
+
+    def _chat_bucket(self, chat_id: ChatId) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.MAX_IDLE_CHATS:
+                now = time.monotonic()
+                self._chats = {key: value for key, value in self._chats.items() if not value.is_idle(now)}
+            # Позитивний id - особистий чат, решта - групи і канали
+            if isinstance(chat_id, int) and chat_id > 0:
+                bucket = TokenBucket(self.private_rate, self.private_burst)
+            else:
+                bucket = TokenBucket(self.group_rate, self.group_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def try_acquire(self, chat_id: Optional[ChatId]) -> bool:
+        """Отримати дозвіл одразу, якщо черга порожня і в відрах є токени (без очікування)"""
+        if self._task is None:
+            return True
+        if self._waiting:
+            return False
+
+        chat_bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+        now = time.monotonic()
+        if self.global_bucket.delay(now) > 0 or (chat_bucket is not None and chat_bucket.delay(now) > 0):
+            return False
+        self.global_bucket.consume()
+        if chat_bucket is not None:
+            chat_bucket.consume()
+        return True
+
+    async def acquire(self, chat_id: Optional[ChatId], priority: SendPriority) -> None:
+        """Дочекатися дозволу на запит у чат chat_id (None - лише загальний ліміт)"""
+        if self._task is None:
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._seq), chat_id, future))
+        self._wakeup.set()
+        await future
+
+    def retry_after(self, chat_id: Optional[ChatId], seconds: float) -> None:
+        """Врахувати відповідь 429: призупинити чат (або всі запити, якщо чат невідомий)"""
+        self.retries += 1
+        bucket = self._chat_bucket(chat_id) if chat_id is not None else self.global_bucket
+        bucket.block(seconds)
+
+    def _grant(self) -> Optional[float]:
+        """Видати дозволи, на які є токени; повертає, скільки чекати до наступного (None - черга порожня)"""
+        now = time.monotonic()
+        delay = None
+        blocked = []
+        while self._waiting:
+            entry = heapq.heappop(self._waiting)
+            _, _, chat_id, future = entry
+            if future.done():
+                continue
+
+            global_wait = self.global_bucket.delay(now)
+            chat_bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+            wait = max(global_wait, chat_bucket.delay(now) if chat_bucket is not None else 0.0)
+            if wait > 0:
+                blocked.append(entry)
+                delay = wait if delay is None else min(delay, wait)
+                if global_wait > 0:
+                    break
+                continue
+
+            self.global_bucket.consume()
+            if chat_bucket is not None:
+                chat_bucket.consume()
+            future.set_result(None)
+
+        for entry in blocked:
+            heapq.heappush(self._waiting, entry)
+        return delay
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def queued(self) -> int:
+        """Кількість запитів, які чекають на дозвіл"""
+        return len(self._waiting)
+
+    async def start(self) -> None:
+        """Запустити фонову задачу видачі дозволів"""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Зупинити фонову задачу; запити з черги відправляються без обмежень"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wakeup = None
+
+        while self._waiting:
+            _, _, _, future = heapq.heappop(self._waiting)
+            if not future.done():
+                future.set_result(None)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            delay = self._grant()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+send_limiter_config: SendLimiterConfig = get_config(model=SendLimiterConfig, root_key="send_limiter")
+
+send_limiter = SendLimiter(
+    global_rate=send_limiter_config.global_rate,
+    private_rate=send_limiter_config.private_rate,
+    private_burst=send_limiter_config.private_burst,
+    group_per_minute=send_limiter_config.group_per_minute,
+    group_burst=send_limiter_config.group_burst
+)
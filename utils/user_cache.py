@@ -0,0 +1,123 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from config_reader import get_config, UserCacheConfig
+
+
+@dataclass
+class CacheStats:
+    """Знімок стану кешу користувачів"""
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+class UserCache:
+    """
+    LRU-кеш користувачів з обмеженим розміром і часом життя записів.
+    Інвалідація користувача збільшує його покоління: запис, прочитаний з БД до інвалідації,
+    не потрапить у кеш (set з застарілим generation(user_id) ігнорується). Покоління окремі
+    для кожного користувача, тому запис XP одного користувача не заважає кешувати інших.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        # Покоління інвалідованих користувачів; _epoch збільшується, коли словник очищається
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0
+        self._entries: "OrderedDict[int, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def generation(self, user_id: int) -> Tuple[int, int]:
+        """Поточне покоління запису користувача (запам'ятати перед читанням з БД)"""
+        return self._epoch, self._generations.get(user_id, 0)
+
+    def get(self, user_id: int) -> Optional[Any]:
+        """Отримати запис або None, якщо його немає чи він застарів"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return value
+
+    def set(self, user_id: int, value: Any, generation: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Покласти запис у кеш.
+        generation - значення generation(user_id) на момент читання з БД.
+        """
+        if generation is not None and generation != self.generation(user_id):
+            return
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+
+        self._entries[user_id] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        """Прибрати запис користувача з кешу"""
+        self.invalidate_many((user_id,))
+
+    def invalidate_many(self, user_ids: Iterable[int]) -> None:
+        """Прибрати записи кількох користувачів з кешу"""
+        # Словник поколінь обмежений: замість видалення окремих ключів (що повернуло б їм
+        # покоління 0) очищаємо його весь і змінюємо epoch - незавершені читання стануть застарілими
+        for user_id in user_ids:
+            if len(self._generations) >= max(self.max_size, 1) * 4:
+                self._generations.clear()
+                self._epoch += 1
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Очистити кеш"""
+        self._generations.clear()
+        self._epoch += 1
+        self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            size=len(self._entries),
+            max_size=self.max_size,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations
+        )
+
+
+user_cache_config: UserCacheConfig = get_config(model=UserCacheConfig, root_key="user_cache")
+
+user_cache = UserCache(
+    ttl=user_cache_config.ttl,
+    max_size=user_cache_config.max_size
+)
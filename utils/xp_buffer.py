@@ -0,0 +1,81 @@
+from typing import Dict, Optional, Tuple
+
+import structlog
+
+from config_reader import get_config, XpBufferConfig
+from utils.periodic import PeriodicFlusher
+
+logger = structlog.get_logger()
+
+
+class XpAccumulator(PeriodicFlusher):
+    """
+    Накопичувач XP за активність у групах.
+    Зливає дельти XP по користувачах (і по чатах для рейтингів чатів) у пам'яті і записує їх
+    пакетними запитами за таймером або коли кількість користувачів в буфері досягає max_pending.
+    """
+
+    def __init__(self, flush_interval: float, max_pending: int):
+        super().__init__(flush_interval)
+        self.max_pending = max_pending
+        self._xp_deltas: Dict[int, int] = {}
+        self._memberships: Dict[Tuple[int, int], bool] = {}
+        self._chat_xp: Dict[Tuple[int, int], int] = {}
+
+    @property
+    def pending(self) -> int:
+        """Кількість користувачів, які очікують запису"""
+        return len(self._xp_deltas)
+
+    def add(self, user_id: int, xp_delta: int, chat_id: Optional[int] = None, is_admin: bool = False) -> None:
+        """Додати XP користувачу (і запам'ятати його членство в чаті)"""
+        self._xp_deltas[user_id] = self._xp_deltas.get(user_id, 0) + xp_delta
+        if chat_id is not None:
+            key = (user_id, chat_id)
+            self._memberships[key] = is_admin
+            self._chat_xp[key] = self._chat_xp.get(key, 0) + xp_delta
+
+        if len(self._xp_deltas) >= self.max_pending:
+            self.request_flush()
+
+    async def flush(self) -> None:
+        """Записати накопичені XP та членства в БД"""
+        if not self._xp_deltas:
+            return
+
+        from db.connection import async_session_maker
+        from db.models import XpSource
+        from db.queries import update_users_xp, register_chat_members
+
+        xp_deltas, self._xp_deltas = self._xp_deltas, {}
+        memberships, self._memberships = self._memberships, {}
+        chat_xp, self._chat_xp = self._chat_xp, {}
+
+        try:
+            async with async_session_maker() as session:
+                awarded = await update_users_xp(session, xp_deltas, XpSource.CHAT_ACTIVITY, chat_xp=chat_xp)
+                await register_chat_members(session, [
+                    (user_id, chat_id, is_admin)
+                    for (user_id, chat_id), is_admin in memberships.items()
+                    if user_id in awarded
+                ], chat_xp=chat_xp)
+                await session.commit()
+        except Exception:
+            # Повертаємо дельти в буфер, щоб не втратити XP при збої БД
+            for user_id, xp_delta in xp_deltas.items():
+                self._xp_deltas[user_id] = self._xp_deltas.get(user_id, 0) + xp_delta
+            for key, is_admin in memberships.items():
+                self._memberships.setdefault(key, is_admin)
+            for key, xp_delta in chat_xp.items():
+                self._chat_xp[key] = self._chat_xp.get(key, 0) + xp_delta
+            raise
+
+        logger.debug(f"Flushed XP for {len(xp_deltas)} users")
+
+
+xp_buffer_config: XpBufferConfig = get_config(model=XpBufferConfig, root_key="xp_buffer")
+
+xp_accumulator = XpAccumulator(
+    flush_interval=xp_buffer_config.flush_interval,
+    max_pending=xp_buffer_config.max_pending
+)
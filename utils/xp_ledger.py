@@ -0,0 +1,127 @@
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+import structlog
+
+from config_reader import get_config, XpLedgerConfig
+from utils.periodic import PeriodicFlusher
+
+logger = structlog.get_logger()
+
+
+class XpLedger(PeriodicFlusher):
+    """
+    Буфер журналу змін XP.
+    Події додаються після коміту зміни XP і записуються в xp_events пакетами через COPY.
+    Події, що не встигли записатись до аварійної зупинки процесу, втрачаються;
+    при звичайній зупинці буфер скидається повністю. Поки БД недоступна, буфер росте
+    лише до max_buffered подій, найстаріші понад це відкидаються (лічильник dropped).
+    Час подій - UTC без часового поясу (created_at має тип timestamp without time zone).
+    Можливу втрату подій журнал зберігає в БД (xp_ledger_state): при запуску позначається,
+    що процес пише журнал, при штатній зупинці після останнього запису - що він зупинився.
+    Якщо при запуску попередній процес не зупинився штатно, або події було відкинуто,
+    журнал позначається неповним, і /replay_xp apply відмовляється перераховувати баланси.
+    """
+
+    def __init__(self, flush_interval: float, max_pending: int, partitions_ahead: int, max_buffered: int = 100000):
+        super().__init__(flush_interval)
+        self.max_pending = max_pending
+        self.max_buffered = max_buffered
+        self.partitions_ahead = partitions_ahead
+        self._records: List[tuple] = []
+        self._partitions_month: Optional[date] = None
+        self.dropped = 0
+        # Відкинуті події, про які ще не записано в БД
+        self._loss_unrecorded = False
+
+    @property
+    def pending(self) -> int:
+        """Кількість подій, які очікують запису"""
+        return len(self._records)
+
+    def record(self, user_id: int, delta: int, source: str, chat_id: Optional[int] = None) -> None:
+        """Додати подію зміни XP"""
+        if not delta:
+            return
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        self._records.append((user_id, chat_id, str(source), delta, now))
+
+        if len(self._records) >= self.max_pending:
+            self.request_flush()
+
+    async def start(self) -> None:
+        """Позначити в БД початок запису журналу і запустити фонову задачу"""
+        from db.connection import async_session_maker
+        from db.queries.xp_events import start_xp_ledger_run
+
+        async with async_session_maker() as session:
+            incomplete = await start_xp_ledger_run(session)
+            await session.commit()
+        if incomplete:
+            logger.warning("XP ledger may be missing events (unclean shutdown or dropped events)")
+        await super().start()
+
+    async def stop(self) -> None:
+        """Записати все, що залишилось, і позначити штатну зупинку"""
+        from db.connection import async_session_maker
+        from db.queries.xp_events import finish_xp_ledger_run
+
+        await super().stop()
+        if self._records or self._loss_unrecorded:
+            # Позначка running залишається: наступний запуск позначить журнал неповним
+            logger.error(f"XP ledger stopped with {len(self._records)} unwritten events")
+            return
+        async with async_session_maker() as session:
+            await finish_xp_ledger_run(session)
+            await session.commit()
+
+    async def flush(self) -> None:
+        """Записати накопичені події в БД"""
+        if not self._records and not self._loss_unrecorded:
+            return
+
+        from db.connection import async_session_maker
+        from db.queries.xp_events import copy_xp_events, ensure_xp_event_partitions, mark_xp_ledger_incomplete
+
+        records, self._records = self._records, []
+        loss_unrecorded = self._loss_unrecorded
+        try:
+            async with async_session_maker() as session:
+                # Секції на поточний і наступні місяці створюються раз на місяць
+                month = datetime.now(timezone.utc).date().replace(day=1)
+                if self._partitions_month != month:
+                    await ensure_xp_event_partitions(session, month, self.partitions_ahead)
+                await copy_xp_events(session, records)
+                if loss_unrecorded:
+                    await mark_xp_ledger_incomplete(session)
+                await session.commit()
+            self._partitions_month = month
+            if loss_unrecorded:
+                self._loss_unrecorded = False
+        except Exception:
+            # Повертаємо події в буфер, щоб не втратити їх при збої БД
+            self._records[:0] = records
+            self._trim()
+            raise
+
+        logger.debug(f"Flushed {len(records)} XP events")
+
+    def _trim(self) -> None:
+        """Відкинути найстаріші події, якщо буфер перевищив max_buffered"""
+        excess = len(self._records) - self.max_buffered
+        if excess <= 0:
+            return
+        del self._records[:excess]
+        self.dropped += excess
+        self._loss_unrecorded = True
+        logger.error(f"XP ledger buffer is full, dropped {excess} oldest events ({self.dropped} in total)")
+
+
+xp_ledger_config: XpLedgerConfig = get_config(model=XpLedgerConfig, root_key="xp_ledger")
+
+xp_ledger = XpLedger(
+    flush_interval=xp_ledger_config.flush_interval,
+    max_pending=xp_ledger_config.max_pending,
+    max_buffered=xp_ledger_config.max_buffered,
+    partitions_ahead=xp_ledger_config.partitions_ahead
+)
@@ -0,0 +1,69 @@
+import asyncio
+import secrets
+from typing import Optional
+
+import structlog
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config_reader import WebhookConfig
+
+logger = structlog.get_logger()
+
+# Скільки секунд при зупинці чекати на оновлення, які ще обробляються
+SHUTDOWN_TIMEOUT = 30.0
+
+
+class WebhookRequestHandler(SimpleRequestHandler):
+    """
+    Обробник запитів Telegram: перевіряє секрет, одразу відповідає 200 і обробляє оновлення у фоні.
+    При зупинці сервера дочікується оновлень в обробці, перш ніж диспетчер зупинить фонові записи.
+    """
+
+    async def close(self) -> None:
+        pending = set(self._background_feed_update_tasks)
+        if pending:
+            logger.info(f"Waiting for {len(pending)} updates in progress...")
+            await asyncio.wait(pending, timeout=SHUTDOWN_TIMEOUT)
+        await super().close()
+
+
+def create_webhook_app(dispatcher: Dispatcher, bot: Bot, path: str, secret_token: Optional[str]) -> web.Application:
+    """Створити aiohttp-застосунок, який приймає оновлення на path"""
+    app = web.Application()
+    # Обробник реєструється першим: його close виконується до зупинки диспетчера
+    WebhookRequestHandler(dispatcher=dispatcher, bot=bot, secret_token=secret_token).register(app, path=path)
+    setup_application(app, dispatcher, bot=bot)
+    return app
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot, config: WebhookConfig) -> None:
+    """
+    Запустити вбудований сервер вебхука і працювати до скасування.
+    Якщо задано url, вебхук реєструється в Telegram після запуску сервера.
+    """
+    secret_token = config.secret_token.get_secret_value() if config.secret_token else ""
+    if not secret_token and config.url:
+        secret_token = secrets.token_urlsafe(32)
+    if not secret_token:
+        logger.warning("Webhook secret token is not set: incoming requests are not verified")
+
+    runner = web.AppRunner(create_webhook_app(dispatcher, bot, config.path, secret_token or None))
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, config.host, config.port)
+        await site.start()
+
+        if config.url:
+            await bot.set_webhook(
+                url=config.url.rstrip("/") + config.path,
+                secret_token=secret_token,
+                allowed_updates=dispatcher.resolve_used_update_types(),
+                drop_pending_updates=False
+            )
+        logger.info(f"Webhook server listening on {config.host}:{config.port}{config.path}")
+
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()